@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
 
 import argparse
-from math import pi, isclose
+from math import pi
 from pathlib import Path
 
 import numpy as np
 from tqdm import tqdm
 import openmc
 
-from smr.materials import materials, clone
+from smr.materials import materials, CloneRange
 from smr.surfaces import surfs, lattice_pitch, pin_pitch, bottom_fuel_stack, \
     top_active_core, pellet_OR, clad_OR, clad_IR, guide_tube_IR, guide_tube_OR
-from smr.pins import pin_universes
+from smr.pins import pin_universes, FuelRegions
+from smr.export import export_materials
+from smr.instances import cell_instances
+from smr.cache import BuildCache, DEFAULT_CACHE_DIR, fingerprint, \
+    export_if_changed
 
 
 # Define command-line options
@@ -26,7 +30,14 @@ parser.add_argument('-a', '--axial', type=int, default=10,
                     help='Number of axial subdivisions in fuel')
 parser.add_argument('-d', '--depleted', action='store_true',
                     help='Whether UO2 compositions should represent depleted fuel')
+parser.add_argument('--compact', action='store_true',
+                    help='Write cloned materials to materials-compact.xml with '
+                    'each composition written once (see expand-materials.py)')
 parser.add_argument('-o', '--output-dir', type=Path, default=None)
+parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                    help='Directory in which generated models are cached')
+parser.add_argument('--no-cache', dest='cache', action='store_false',
+                    help='Regenerate the model even if a cached copy exists')
 parser.set_defaults(multipole=True)
 args = parser.parse_args()
 
@@ -40,97 +51,153 @@ else:
     directory = args.output_dir
 directory.mkdir(exist_ok=True)
 
-rings = [0.1*pin_pitch, 0.2*pin_pitch]
-
-# Define the NumPy array indices for assembly locations where there
-# may be CR guide tubes, instrument tubes and burnable absorbers
-nonfuel_y = np.array([2,2,2,3,3,5,5,5,5,5,8,8,8,8,8,11,11,11,11,11,13,13,14,14,14])
-nonfuel_x = np.array([5,8,11,3,13,2,5,8,11,14,2,5,8,11,14,2,5,8,11,14,3,13,5,8,11])
-
-# NO BURNABLE ABSORBERS
-pins = pin_universes(rings, args.axial, args.depleted)
-gtu = pins['GT empty']
-#gti = pins['GT empty instr']
-universes = np.empty((17,17), dtype=openmc.Universe)
-universes[:,:] = pins['Fuel pin (3.1%) no grid']
-universes[nonfuel_y, nonfuel_x] = [    gtu,   gtu,   gtu,
-                                     gtu,              gtu,
-                                   gtu, gtu,  gtu,  gtu, gtu,
-                                   gtu, gtu,  gtu,  gtu, gtu,
-                                   gtu, gtu,  gtu,  gtu, gtu,
-                                     gtu,              gtu,
-                                       gtu,   gtu,   gtu     ]
-
-# Instantiate the lattice
-lattice = openmc.RectLattice(name='Pin lattice')
-lattice.lower_left = (-17.*pin_pitch/2., -17.*pin_pitch/2.)
-lattice.pitch = (pin_pitch, pin_pitch)
-lattice.universes = universes
-
-# Add lattice to bounding cell
-root_universe = openmc.Universe(name='Root universe')
-cell = openmc.Cell(name='Lattice cell')
-cell.fill = lattice
-z_bounds = +surfs['bot active core'] & -surfs['top active core']
-cell.region = surfs['lat grid box inner'] & z_bounds
-root_universe.add_cell(cell)
-
-# Apply reflective boundaries
-surfs['bot active core'].boundary_type = 'reflective'
-surfs['top active core'].boundary_type = 'reflective'
-for halfspace in surfs['lat grid box inner']:
-    halfspace.surface.boundary_type = 'reflective'
-
-# Define geometry with a single assembly
-geometry = openmc.Geometry(root_universe)
-
-#### "Differentiate" the geometry if using distribmats
-h = 10.0*pin_pitch / args.axial
-if args.tallies == 'mat':
-    # Count the number of instances for each cell and material
-    geometry.determine_paths(instances_only=True)
-
-    for cell in tqdm(geometry.get_all_material_cells().values(),
-                     desc='Differentiating materials'):
-        if cell.fill in materials:
-            # Fill cell with list of "differentiated" materials
-            cell.fill = [clone(cell.fill) for i in range(cell.num_instances)]
-
-            # Determine volume of each fuel material
-            if 'UO2 Fuel' in cell.fill[0].name:
-                lower_left, _ = cell.region.bounding_box
-                if isclose(lower_left[0], rings[0]):
-                    ri, ro = 0.0, rings[0]
-                elif isclose(lower_left[0], rings[1]):
-                    ri, ro = rings[0], rings[1]
-                else:
-                    ri, ro = rings[1], pellet_OR
-                for mat in cell.fill:
-                    mat.volume = pi * (ro*ro - ri*ri) * h
-            elif cell.fill[0].name == 'Borated Water':
-                for mat in cell.fill:
-                    mat.volume = pin_pitch**2 - pi*clad_OR**2 * h
-            elif cell.fill[0].name == 'Helium':
-                for mat in cell.fill:
-                    mat.volume = pi * (clad_IR**2 - pellet_OR**2) * h
-            elif cell.fill[0].name == 'M5':
-                for mat in cell.fill:
-                    mat.volume = pi * (clad_OR**2 - clad_IR**2) * h
-            elif cell.fill[0].name == 'Zircaloy-4':
-                for mat in cell.fill:
-                    mat.volume = pi * (guide_tube_OR**2 - guide_tube_IR**2) * h
-
-#### Create OpenMC "materials.xml" file
-print('Getting materials...')
-all_materials = geometry.get_all_materials()
-print('Creating materials collection...')
-materials = openmc.Materials(all_materials.values())
-print('Exporting materials to XML...')
-materials.export_to_xml(str(directory / 'materials.xml'))
-
-
-#### Create OpenMC "geometry.xml" file
-geometry.export_to_xml(str(directory / 'geometry.xml'))
+#### Reuse model files from a previous build with the same fingerprint
+if args.compact and args.tallies == 'mat':
+    materials_file = 'materials-compact.xml'
+else:
+    materials_file = 'materials.xml'
+model_files = [materials_file, 'geometry.xml', 'tallies.xml']
+# Options that only affect settings.xml or where files are written
+exclude = ('output_dir', 'cache', 'cache_dir', 'multipole', 'no_multipole')
+model_key = fingerprint(__file__, args, exclude)
+cache = BuildCache(args.cache_dir) if args.cache else None
+if cache is not None and cache.restore(model_key, directory, model_files):
+    print('Reusing cached model files ({})'.format(model_key[:12]))
+else:
+    rings = [0.1*pin_pitch, 0.2*pin_pitch]
+
+    # Define the NumPy array indices for assembly locations where there
+    # may be CR guide tubes, instrument tubes and burnable absorbers
+    nonfuel_y = np.array([2,2,2,3,3,5,5,5,5,5,8,8,8,8,8,11,11,11,11,11,13,13,14,14,14])
+    nonfuel_x = np.array([5,8,11,3,13,2,5,8,11,14,2,5,8,11,14,2,5,8,11,14,3,13,5,8,11])
+
+    # NO BURNABLE ABSORBERS
+    fuel_regions = FuelRegions()
+    pins = pin_universes(rings, args.axial, args.depleted, fuel_regions)
+    gtu = pins['GT empty']
+    #gti = pins['GT empty instr']
+    universes = np.empty((17,17), dtype=openmc.Universe)
+    universes[:,:] = pins['Fuel pin (3.1%) no grid']
+    universes[nonfuel_y, nonfuel_x] = [    gtu,   gtu,   gtu,
+                                         gtu,              gtu,
+                                       gtu, gtu,  gtu,  gtu, gtu,
+                                       gtu, gtu,  gtu,  gtu, gtu,
+                                       gtu, gtu,  gtu,  gtu, gtu,
+                                         gtu,              gtu,
+                                           gtu,   gtu,   gtu     ]
+
+    # Instantiate the lattice
+    lattice = openmc.RectLattice(name='Pin lattice')
+    lattice.lower_left = (-17.*pin_pitch/2., -17.*pin_pitch/2.)
+    lattice.pitch = (pin_pitch, pin_pitch)
+    lattice.universes = universes
+
+    # Add lattice to bounding cell
+    root_universe = openmc.Universe(name='Root universe')
+    cell = openmc.Cell(name='Lattice cell')
+    cell.fill = lattice
+    z_bounds = +surfs['bot active core'] & -surfs['top active core']
+    cell.region = surfs['lat grid box inner'] & z_bounds
+    root_universe.add_cell(cell)
+
+    # Apply reflective boundaries
+    surfs['bot active core'].boundary_type = 'reflective'
+    surfs['top active core'].boundary_type = 'reflective'
+    for halfspace in surfs['lat grid box inner']:
+        halfspace.surface.boundary_type = 'reflective'
+
+    # Define geometry with a single assembly
+    geometry = openmc.Geometry(root_universe)
+
+    #### "Differentiate" the geometry if using distribmats
+    h = 10.0*pin_pitch / args.axial
+    if args.tallies == 'mat':
+        # Count the number of instances for each cell and material
+        num_instances = cell_instances(geometry)
+
+        # Volume of each fuel region from the dimensions recorded for each fuel
+        # cell when the pin universes were created
+        fuel_regions = fuel_regions.select(geometry.get_all_cells())
+        fuel_ids = [cell.id for cell in fuel_regions.cells]
+        fuel_volumes = dict(zip(fuel_ids, fuel_regions.volumes))
+
+        clone_ranges = []
+        for cell in tqdm(geometry.get_all_material_cells().values(),
+                         desc='Differentiating materials'):
+            if cell.fill in materials:
+                # Fill cell with a range of "differentiated" materials
+                cell.fill = CloneRange(cell.fill, num_instances[cell.id])
+                clone_ranges.append(cell.fill)
+
+                # Determine volume of each fuel material
+                name = cell.fill.material.name
+                if cell.id in fuel_volumes:
+                    cell.fill.volume = fuel_volumes[cell.id]
+                elif name == 'Borated Water':
+                    cell.fill.volume = pin_pitch**2 - pi*clad_OR**2 * h
+                elif name == 'Helium':
+                    cell.fill.volume = pi * (clad_IR**2 - pellet_OR**2) * h
+                elif name == 'M5':
+                    cell.fill.volume = pi * (clad_OR**2 - clad_IR**2) * h
+                elif name == 'Zircaloy-4':
+                    cell.fill.volume = pi * (guide_tube_OR**2 - guide_tube_IR**2) * h
+
+    #### Create OpenMC "materials.xml" file
+    if args.tallies == 'mat':
+        # Every material-filled cell holds a range of clones at this point
+        print('Exporting materials to XML...')
+        export_materials(clone_ranges, directory / materials_file,
+                         compact=args.compact)
+    else:
+        print('Getting materials...')
+        all_materials = geometry.get_all_materials()
+        print('Creating materials collection...')
+        materials = openmc.Materials(all_materials.values())
+        print('Exporting materials to XML...')
+        materials.export_to_xml(str(directory / 'materials.xml'))
+
+    #### Create OpenMC "geometry.xml" file
+    geometry.export_to_xml(str(directory / 'geometry.xml'))
+
+    ####  Create OpenMC "tallies.xml" file
+    tallies = openmc.Tallies()
+
+    # Extract all fuel materials
+    if args.tallies == 'mat':
+        fuel_ranges = [c for c in clone_ranges if 'Fuel' in c.material.name]
+        # Clones are referred to by ID so that they are never instantiated
+        material_bins = np.concatenate(
+            [np.arange(c.first_id, c.first_id + len(c)) for c in fuel_ranges])
+        fuel_nuclides = fuel_ranges[0].material.get_nuclides()
+    else:
+        materials = geometry.get_materials_by_name(name='Fuel', matching=False)
+
+    # If using distribcells, create distribcell tally needed for depletion
+    if args.tallies == 'cell':
+        # Extract all cells filled by a fuel material
+        fuel_cells = []
+        for cell in geometry.get_all_cells().values():
+            if cell.fill in materials:
+                tally = openmc.Tally(name='depletion tally')
+                tally.scores = ['(n,p)', '(n,a)', '(n,gamma)',
+                                'fission', '(n,2n)', '(n,3n)', '(n,4n)']
+                tally.nuclides = cell.fill.get_nuclides()
+                tally.filters.append(openmc.DistribcellFilter([cell]))
+                tallies.append(tally)
+
+    # If using distribmats, create material tally needed for depletion
+    elif args.tallies == 'mat':
+        tally = openmc.Tally(name='depletion tally')
+        tally.scores = ['(n,p)', '(n,a)', '(n,gamma)',
+                        'fission', '(n,2n)', '(n,3n)', '(n,4n)']
+        tally.nuclides = fuel_nuclides
+        tally.filters = [openmc.MaterialFilter(material_bins)]
+        tallies.append(tally)
+
+    tallies.export_to_xml(str(directory / 'tallies.xml'))
+
+    if cache is not None:
+        cache.store(model_key, directory, model_files)
 
 
 #### Create OpenMC "settings.xml" file
@@ -158,35 +225,4 @@ if args.multipole:
         'range': (500.0, 1300.0)
     }
 
-settings.export_to_xml(str(directory / 'settings.xml'))
-
-
-####  Create OpenMC "tallies.xml" file
-tallies = openmc.Tallies()
-
-# Extract all fuel materials
-materials = geometry.get_materials_by_name(name='Fuel', matching=False)
-
-# If using distribcells, create distribcell tally needed for depletion
-if args.tallies == 'cell':
-    # Extract all cells filled by a fuel material
-    fuel_cells = []
-    for cell in geometry.get_all_cells().values():
-        if cell.fill in materials:
-            tally = openmc.Tally(name='depletion tally')
-            tally.scores = ['(n,p)', '(n,a)', '(n,gamma)',
-                            'fission', '(n,2n)', '(n,3n)', '(n,4n)']
-            tally.nuclides = cell.fill.get_nuclides()
-            tally.filters.append(openmc.DistribcellFilter([cell]))
-            tallies.append(tally)
-
-# If using distribmats, create material tally needed for depletion
-elif args.tallies == 'mat':
-    tally = openmc.Tally(name='depletion tally')
-    tally.scores = ['(n,p)', '(n,a)', '(n,gamma)',
-                    'fission', '(n,2n)', '(n,3n)', '(n,4n)']
-    tally.nuclides = materials[0].get_nuclides()
-    tally.filters = [openmc.MaterialFilter(materials)]
-    tallies.append(tally)
-
-tallies.export_to_xml(str(directory / 'tallies.xml'))
+export_if_changed(settings, directory / 'settings.xml')
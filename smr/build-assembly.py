@@ -7,10 +7,17 @@ import numpy as np
 from tqdm import tqdm
 
 import openmc
-from smr.materials import materials, clone
-from smr.surfaces import surfs, lattice_pitch, bottom_fuel_stack, top_active_core, pellet_OR
+from smr.materials import materials, CloneRange
+from smr.surfaces import surfs, lattice_pitch, bottom_fuel_stack, top_active_core, pellet_OR, \
+    get_registry
 from smr.assemblies import assembly_universes
+from smr.export import export_materials
+from smr.instances import cell_instances
+from smr.optimize import flatten_universes, merge_universes, order_cells, \
+    simplify_regions
 from smr import inlet_temperature
+from smr.cache import BuildCache, DEFAULT_CACHE_DIR, fingerprint, \
+    export_if_changed
 
 
 # Define command-line options
@@ -31,7 +38,31 @@ parser.add_argument('-a', '--axial', type=int, default=196,
                     help='Number of axial subdivisions in fuel')
 parser.add_argument('-d', '--depleted', action='store_true',
                     help='Whether UO2 compositions should represent depleted fuel')
+parser.add_argument('--axial-lattice', action='store_true',
+                    help='Stack axial segments of fuel in a z-lattice instead '
+                    'of bounding them by planes')
+parser.add_argument('--lattice-stacks', action='store_true',
+                    help='Index axial stacks of pin cells by a z-lattice '
+                    'instead of bounding their layers by planes')
+parser.add_argument('--merge-universes', action='store_true',
+                    help='Merge structurally identical universes before export')
+parser.add_argument('--simplify-regions', action='store_true',
+                    help='Split cells with complex regions into cells bounded '
+                    'by intersections of half-spaces before export')
+parser.add_argument('--flatten-universes', action='store_true',
+                    help='Remove levels of universe nesting that do not change '
+                    'the geometry before export')
+parser.add_argument('--order-cells', action='store_true',
+                    help='Order the cells of each universe by decreasing '
+                    'volume before export')
+parser.add_argument('--compact', action='store_true',
+                    help='Write cloned materials to materials-compact.xml with '
+                    'each composition written once (see expand-materials.py)')
 parser.add_argument('-o', '--output-dir', type=Path, default=None)
+parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                    help='Directory in which generated models are cached')
+parser.add_argument('--no-cache', dest='cache', action='store_false',
+                    help='Regenerate the model even if a cached copy exists')
 parser.set_defaults(clone=False, multipole=True)
 args = parser.parse_args()
 
@@ -45,46 +76,135 @@ else:
     directory = args.output_dir
 directory.mkdir(exist_ok=True)
 
-# Define geometry with a single assembly
-if args.rings > 1:
-    ring_radii = np.sqrt(np.arange(1, args.rings)*pellet_OR**2 / args.rings)
+#### Reuse model files from a previous build with the same fingerprint
+if args.compact and args.clone:
+    materials_file = 'materials-compact.xml'
 else:
-    ring_radii = None
-assembly = assembly_universes(ring_radii, args.axial, args.depleted)
-lattice_sides = openmc.model.rectangular_prism(lattice_pitch, lattice_pitch,
-                                               boundary_type='reflective')
-main_cell = openmc.Cell(
-    fill=assembly['Assembly (3.1%)'],
-    region=lattice_sides & +surfs['lower bound'] & -surfs['upper bound']
-)
-root_univ = openmc.Universe(cells=[main_cell])
-geometry = openmc.Geometry(root_univ)
-
-#### "Differentiate" the geometry if using distribmats
-if args.clone:
-    # Count the number of instances for each cell and material
-    geometry.determine_paths(instances_only=True)
-
-    # Extract all cells filled by a fuel material
-    fuel_mats = {m for m in materials if 'UO2 Fuel' in m.name}
-
-    for cell in tqdm(geometry.get_all_material_cells().values(),
-                     desc='Differentiating materials'):
-        if cell.fill in fuel_mats:
-            # Fill cell with list of "differentiated" materials
-            cell.fill = [clone(cell.fill) for i in range(cell.num_instances)]
-
-#### Create OpenMC "materials.xml" file
-print('Getting materials...')
-all_materials = geometry.get_all_materials()
-print('Creating materials collection...')
-materials = openmc.Materials(all_materials.values())
-print('Exporting materials to XML...')
-materials.export_to_xml(str(directory / 'materials.xml'))
-
-
-#### Create OpenMC "geometry.xml" file
-geometry.export_to_xml(str(directory / 'geometry.xml'))
+    materials_file = 'materials.xml'
+model_files = [materials_file, 'geometry.xml', 'tallies.xml']
+# Options that only affect settings.xml or where files are written
+exclude = ('output_dir', 'cache', 'cache_dir', 'multipole')
+model_key = fingerprint(__file__, args, exclude)
+cache = BuildCache(args.cache_dir) if args.cache else None
+if cache is not None and cache.restore(model_key, directory, model_files):
+    print('Reusing cached model files ({})'.format(model_key[:12]))
+else:
+    # Define geometry with a single assembly
+    if args.rings > 1:
+        ring_radii = np.sqrt(np.arange(1, args.rings)*pellet_OR**2 / args.rings)
+    else:
+        ring_radii = None
+    registry = get_registry()
+    merged = registry.merged
+    assembly = assembly_universes(ring_radii, args.axial, args.depleted,
+                                  axial_lattice=args.axial_lattice,
+                                  lattice_stacks=args.lattice_stacks)
+    lattice_sides = openmc.model.rectangular_prism(lattice_pitch, lattice_pitch,
+                                                   boundary_type='reflective')
+    registry.intern_region(lattice_sides)
+    main_cell = openmc.Cell(
+        fill=assembly['Assembly (3.1%)'],
+        region=lattice_sides & +surfs['lower bound'] & -surfs['upper bound']
+    )
+    root_univ = openmc.Universe(cells=[main_cell])
+    geometry = openmc.Geometry(root_univ)
+    print('Merged {} coincident surfaces'.format(registry.merged - merged))
+    if args.simplify_regions:
+        stats = simplify_regions(geometry)
+        print('Simplified regions of {} cells ({} cells added, {} half-spaces '
+              'removed)'.format(stats['converted'], stats['added'],
+                                stats['removed half-spaces']))
+    if args.merge_universes:
+        merged = merge_universes(geometry)
+        print('Merged {} duplicate universes'.format(len(merged)))
+    if args.flatten_universes:
+        stats = flatten_universes(geometry)
+        print('Flattened universes from depth {} to {} ({} bypassed, {} '
+              'inlined)'.format(stats['depth before'], stats['depth after'],
+                                stats['collapsed'], stats['inlined']))
+    if args.order_cells:
+        print('Reordered and renumbered cells of {} universes'.format(
+            order_cells(geometry)))
+
+    #### "Differentiate" the geometry if using distribmats
+    if args.clone:
+        # Count the number of instances for each cell and material
+        num_instances = cell_instances(geometry)
+
+        # Extract all cells filled by a fuel material
+        fuel_mats = {m for m in materials if 'UO2 Fuel' in m.name}
+
+        # Collect materials before any cells are filled with clones
+        print('Getting materials...')
+        all_materials = geometry.get_all_materials()
+
+        clone_ranges = []
+        for cell in tqdm(geometry.get_all_material_cells().values(),
+                         desc='Differentiating materials'):
+            if cell.fill in fuel_mats:
+                # Fill cell with a range of "differentiated" materials
+                cell.fill = CloneRange(cell.fill, num_instances[cell.id])
+                clone_ranges.append(cell.fill)
+
+    #### Create OpenMC "materials.xml" file
+    if args.clone:
+        print('Exporting materials to XML...')
+        regular = [m for m in all_materials.values() if m not in fuel_mats]
+        export_materials(regular + clone_ranges,
+                         directory / materials_file, compact=args.compact)
+    else:
+        print('Getting materials...')
+        all_materials = geometry.get_all_materials()
+        print('Creating materials collection...')
+        materials = openmc.Materials(all_materials.values())
+        print('Exporting materials to XML...')
+        materials.export_to_xml(str(directory / 'materials.xml'))
+
+    #### Create OpenMC "geometry.xml" file
+    geometry.export_to_xml(str(directory / 'geometry.xml'))
+
+    ####  Create OpenMC "tallies.xml" file
+    tallies = openmc.Tallies()
+
+    # Extract all fuel materials
+    if args.clone:
+        # Clones are referred to by ID so that they are never instantiated;
+        # no cell is filled with a single clone
+        materials = []
+        material_bins = np.concatenate(
+            [np.arange(c.first_id, c.first_id + len(c)) for c in clone_ranges])
+        fuel_nuclides = clone_ranges[0].material.get_nuclides()
+    else:
+        materials = geometry.get_materials_by_name(name='Fuel', matching=False)
+        material_bins = materials
+        fuel_nuclides = materials[0].get_nuclides()
+
+    # If using distribcells, create distribcell tally needed for depletion
+    if args.tallies == 'cell':
+        # Extract all cells filled by a fuel material
+        fuel_cells = []
+        for cell in geometry.get_all_cells().values():
+            if cell.fill in materials:
+                tally = openmc.Tally(name='depletion tally')
+                tally.scores = ['(n,p)', '(n,a)', '(n,gamma)',
+                                'fission', '(n,2n)', '(n,3n)', '(n,4n)']
+                tally.nuclides = cell.fill.get_nuclides()
+                tally.filters.append(openmc.DistribcellFilter([cell]))
+                tallies.append(tally)
+
+    # If using distribmats, create material tally needed for depletion
+    elif args.tallies == 'mat':
+        tally = openmc.Tally(name='depletion tally')
+        tally.scores = ['(n,p)', '(n,a)', '(n,gamma)',
+                        'fission', '(n,2n)', '(n,3n)', '(n,4n)']
+        tally.nuclides = fuel_nuclides
+        tally.filters = [openmc.MaterialFilter(material_bins)]
+        tallies.append(tally)
+
+    tallies.export_to_xml(str(directory / 'tallies.xml'))
+
+    if cache is not None:
+        cache.store(model_key, directory, model_files)
 
 
 #### Create OpenMC "settings.xml" file
@@ -111,35 +231,4 @@ if args.multipole:
     settings.temperature['multipole'] = True
     settings.temperature['tolerance'] = 1000
 
-settings.export_to_xml(str(directory / 'settings.xml'))
-
-
-####  Create OpenMC "tallies.xml" file
-tallies = openmc.Tallies()
-
-# Extract all fuel materials
-materials = geometry.get_materials_by_name(name='Fuel', matching=False)
-
-# If using distribcells, create distribcell tally needed for depletion
-if args.tallies == 'cell':
-    # Extract all cells filled by a fuel material
-    fuel_cells = []
-    for cell in geometry.get_all_cells().values():
-        if cell.fill in materials:
-            tally = openmc.Tally(name='depletion tally')
-            tally.scores = ['(n,p)', '(n,a)', '(n,gamma)',
-                            'fission', '(n,2n)', '(n,3n)', '(n,4n)']
-            tally.nuclides = cell.fill.get_nuclides()
-            tally.filters.append(openmc.DistribcellFilter([cell]))
-            tallies.append(tally)
-
-# If using distribmats, create material tally needed for depletion
-elif args.tallies == 'mat':
-    tally = openmc.Tally(name='depletion tally')
-    tally.scores = ['(n,p)', '(n,a)', '(n,gamma)',
-                    'fission', '(n,2n)', '(n,3n)', '(n,4n)']
-    tally.nuclides = materials[0].get_nuclides()
-    tally.filters = [openmc.MaterialFilter(materials)]
-    tallies.append(tally)
-
-tallies.export_to_xml(str(directory / 'tallies.xml'))
+export_if_changed(settings, directory / 'settings.xml')
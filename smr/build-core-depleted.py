@@ -4,44 +4,31 @@ import numpy as np
 import opendeplete
 
 from smr.surfaces import lattice_pitch, bottom_fuel_stack, top_active_core
-from smr.core import geometry
+from smr.core import core_geometry
+from smr.instances import cell_instances
+from smr.pins import FuelRegions
 
 
-# FIXME: Automatically extract info needed to calculate burnable cell volumes
+# Full core with fuel that is neither divided into rings nor axial segments
+# and that contains the nuclides produced by depletion
+fuel_regions = FuelRegions()
+geometry = core_geometry(None, 1, True, fuel_regions)
+fuel_regions = fuel_regions.select(geometry.get_all_cells())
+
 # Fuel rod geometric parameters
-radius = 0.39218
 height = 200.
 
 # Count the number of instances for each cell and material
-geometry.determine_paths(instances_only=True)
-
-# Extract all cells filled by a fuel material
-fuel_cells = geometry.get_cells_by_name(
-    name='(1.6%) (0)', case_sensitive=True)
-fuel_cells.extend(geometry.get_cells_by_name(
-    name='(1.6%) grid (bottom) (0)', case_sensitive=True))
-fuel_cells.extend(geometry.get_cells_by_name(
-    name='(1.6%) grid (intermediate) (0)', case_sensitive=True))
-fuel_cells.extend(geometry.get_cells_by_name(
-    name='(2.4%) (0)', case_sensitive=True))
-fuel_cells.extend(geometry.get_cells_by_name(
-    name='(2.4%) grid (bottom) (0)', case_sensitive=True))
-fuel_cells.extend(geometry.get_cells_by_name(
-    name='(2.4%) grid (intermediate) (0)', case_sensitive=True))
-fuel_cells.extend(geometry.get_cells_by_name(
-    name='(3.1%) (0)', case_sensitive=True))
-fuel_cells.extend(geometry.get_cells_by_name(
-    name='(3.1%) grid (bottom) (0)', case_sensitive=True))
-fuel_cells.extend(geometry.get_cells_by_name(
-    name='(3.1%) grid (intermediate) (0)', case_sensitive=True))
+num_instances = cell_instances(geometry)
 
-# Assign distribmats for each material
-for cell in fuel_cells:
-    cell.fill.volume = np.pi * radius**2 * height
+# Assign distribmats for each fuel cell, each with the volume of one fuel
+# region as recorded when the pin universes were created
+for cell, volume in zip(fuel_regions.cells, fuel_regions.volumes):
+    cell.fill.volume = volume
     cell.fill.depletable = True
     cell.fill.temperature = 300.0
 
-    cell.fill = [cell.fill.clone() for i in range(cell.num_instances)]
+    cell.fill = [cell.fill.clone() for i in range(num_instances[cell.id])]
 
 # Create dt vector for 1 month with 5 day timesteps
 dt1 = 5*24*60*60  # 5 days
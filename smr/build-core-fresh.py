@@ -1,18 +1,27 @@
 #!/usr/bin/env python3
 
 import argparse
-from math import pi
 from pathlib import Path
 
 import numpy as np
 import openmc
 from tqdm import tqdm
 
-from smr.materials import materials, clone
+from smr.materials import CloneRange
+from smr.export import export_materials
+from smr.hdf5 import export_model
 from smr.surfaces import lattice_pitch, bottom_fuel_stack, top_active_core, \
-    pellet_OR, active_fuel_length
+    pellet_OR, get_registry
+from smr.pins import FuelRegions
 from smr.core import core_geometry
+from smr.instances import cell_instances
+from smr.memory import estimate_memory
+from smr.volumes import check_volumes, format_checks
+from smr.optimize import flatten_universes, merge_universes, order_cells, \
+    simplify_regions
 from smr import inlet_temperature
+from smr.cache import BuildCache, DEFAULT_CACHE_DIR, fingerprint, \
+    export_if_changed
 
 
 # Define command-line options
@@ -31,10 +40,60 @@ parser.add_argument('-a', '--axial', type=int, default=196,
                     help='Number of axial subdivisions in fuel')
 parser.add_argument('-d', '--depleted', action='store_true',
                     help='Whether UO2 compositions should represent depleted fuel')
+parser.add_argument('--axial-lattice', action='store_true',
+                    help='Stack axial segments of fuel in a z-lattice instead '
+                    'of bounding them by planes')
+parser.add_argument('--lattice-stacks', action='store_true',
+                    help='Index axial stacks of pin cells by a z-lattice '
+                    'instead of bounding their layers by planes')
+parser.add_argument('--reflector-partitions', type=int, default=1,
+                    help='Number of blocks in x and y that each heavy '
+                    'reflector block is divided into')
+parser.add_argument('--merge-universes', action='store_true',
+                    help='Merge structurally identical universes before export')
+parser.add_argument('--simplify-regions', action='store_true',
+                    help='Split cells with complex regions into cells bounded '
+                    'by intersections of half-spaces before export')
+parser.add_argument('--flatten-universes', action='store_true',
+                    help='Remove levels of universe nesting that do not change '
+                    'the geometry before export')
+parser.add_argument('--order-cells', action='store_true',
+                    help='Order the cells of each universe by decreasing '
+                    'volume before export')
+parser.add_argument('--compact', action='store_true',
+                    help='Write cloned materials to materials-compact.xml with '
+                    'each composition written once (see expand-materials.py)')
+parser.add_argument('--hdf5', action='store_true',
+                    help='Write the geometry and materials to model.h5 instead '
+                    'of XML (see model-to-xml.py)')
 parser.add_argument('-o', '--output-dir', type=Path, default=None)
+parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                    help='Directory in which generated models are cached')
+parser.add_argument('--no-cache', dest='cache', action='store_false',
+                    help='Regenerate the model even if a cached copy exists')
+parser.add_argument('--memory-budget', type=float, default=None,
+                    help='Memory available to each rank of an OpenMC run in '
+                    'GB; the model is not built if it is estimated to need '
+                    'more (see estimate-memory.py)')
+parser.add_argument('--check-volumes', type=int, default=None,
+                    metavar='SAMPLES',
+                    help='Check the volumes assigned to fuel materials against '
+                    'estimates from sampling this many points; the build '
+                    'fails if any is inconsistent')
 parser.set_defaults(clone=False, multipole=True)
 args = parser.parse_args()
 
+# Check that an OpenMC run of the model would fit in memory before building it
+if args.memory_budget is not None:
+    estimate = estimate_memory(
+        args.rings, args.axial, args.depleted, args.clone,
+        axial_lattice=args.axial_lattice, lattice_stacks=args.lattice_stacks,
+        reflector_partitions=args.reflector_partitions)
+    print('Estimated memory per rank: {:.2f} GB'.format(estimate.total/1e9))
+    if not estimate.fits(args.memory_budget*1e9):
+        parser.exit(1, 'Model exceeds memory budget of {} GB per rank\n'
+                    .format(args.memory_budget))
+
 # Make directory for inputs
 if args.output_dir is None:
     if args.depleted:
@@ -45,53 +104,128 @@ else:
     directory = args.output_dir
 directory.mkdir(exist_ok=True)
 
-if args.rings > 1:
-    ring_radii = np.sqrt(np.arange(1, args.rings)*pellet_OR**2 / args.rings)
+#### Reuse model files from a previous build with the same fingerprint
+if args.compact and args.clone:
+    materials_file = 'materials-compact.xml'
+else:
+    materials_file = 'materials.xml'
+if args.hdf5:
+    model_files = ['model.h5']
 else:
-    ring_radii = None
-geometry = core_geometry(ring_radii, args.axial, args.depleted)
-
-h = active_fuel_length / args.axial
-fuel_mats = {}
-
-# Count the number of instances for each cell and material
-if args.clone:
-    geometry.determine_paths(instances_only=True)
-
-fuel_volume = pi * pellet_OR**2 * h / args.rings
-for cell in tqdm(geometry.get_all_cells().values(),
-                 desc='Differentiating materials / assigning volume'):
-    if cell.fill in materials:
-        # Determine if this material is fuel
-        name = cell.fill.name
-        is_fuel = 'UO2 Fuel' in name
-
-        # Determine volume of each fuel material
-        if is_fuel:
-            if args.clone:
-                # Fill cell with list of "differentiated" materials if requested
-                cell.fill = [clone(cell.fill) for i in range(cell.num_instances)]
-                for mat in cell.fill:
-                    mat.volume = fuel_volume
-            else:
-                r_o = cell.region.bounding_box[1][0]
-                if (name, r_o) not in fuel_mats:
-                    cell.fill = cell.fill.clone()
-                    cell.fill.volume = fuel_volume
-                    fuel_mats[name, r_o] = cell.fill
-                else:
-                    cell.fill = fuel_mats[name, r_o]
+    model_files = [materials_file, 'geometry.xml']
+# Options that only affect settings.xml, where files are written, or whether
+# the model is built at all
+exclude = ('output_dir', 'cache', 'cache_dir', 'multipole', 'memory_budget',
+           'check_volumes')
+model_key = fingerprint(__file__, args, exclude)
+cache = BuildCache(args.cache_dir) if args.cache else None
+if cache is not None and cache.restore(model_key, directory, model_files):
+    print('Reusing cached model files ({})'.format(model_key[:12]))
+    if args.check_volumes is not None:
+        # The check needs the geometry in memory, which is not rebuilt
+        print('Skipped checking fuel volumes of the cached model; use '
+              '--no-cache to rebuild and check it')
+else:
+    if args.rings > 1:
+        ring_radii = np.sqrt(np.arange(1, args.rings)*pellet_OR**2 / args.rings)
+    else:
+        ring_radii = None
+    registry = get_registry()
+    merged = registry.merged
+    fuel_regions = FuelRegions()
+    geometry = core_geometry(ring_radii, args.axial, args.depleted, fuel_regions,
+                             axial_lattice=args.axial_lattice,
+                             lattice_stacks=args.lattice_stacks,
+                             reflector_partitions=args.reflector_partitions)
+    print('Merged {} coincident surfaces'.format(registry.merged - merged))
+    if args.simplify_regions:
+        stats = simplify_regions(geometry)
+        print('Simplified regions of {} cells ({} cells added, {} half-spaces '
+              'removed)'.format(stats['converted'], stats['added'],
+                                stats['removed half-spaces']))
+    if args.merge_universes:
+        merged = merge_universes(geometry)
+        print('Merged {} duplicate universes'.format(len(merged)))
+    if args.flatten_universes:
+        stats = flatten_universes(geometry, preserve=fuel_regions.cells)
+        print('Flattened universes from depth {} to {} ({} bypassed, {} '
+              'inlined)'.format(stats['depth before'], stats['depth after'],
+                                stats['collapsed'], stats['inlined']))
+    if args.order_cells:
+        print('Reordered and renumbered cells of {} universes'.format(
+            order_cells(geometry)))
+    all_cells = geometry.get_all_cells()
+    fuel_regions = fuel_regions.select(all_cells)
+
+    # Count the number of instances for each cell and material
+    num_instances = cell_instances(geometry)
+
+    # Collect materials before any cells are filled with clones so that the
+    # clones themselves are never gathered into a collection
+    all_materials = geometry.get_all_materials()
+    for mat in all_materials.values():
+        if 'UO2 Fuel' not in mat.name:
+            mat.volume = 1.0
+
+    # Assign volumes to fuel materials using the dimensions recorded for each
+    # fuel region when the pin universes were created
+    fuel_mats = {}
+    fuel_table = zip(fuel_regions.cells, fuel_regions.ring, fuel_regions.volumes)
+    for cell, ring, volume in tqdm(fuel_table, total=len(fuel_regions),
+                                   desc='Differentiating materials / assigning volume'):
+        if args.clone:
+            # Fill cell with a range of "differentiated" materials if requested;
+            # clones are written out one by one at export time
+            cell.fill = CloneRange(cell.fill, num_instances[cell.id])
+            cell.fill.volume = volume
         else:
-            cell.fill.volume = 1.0
-
-#### Create OpenMC "materials.xml" file
-all_materials = geometry.get_all_materials()
-materials = openmc.Materials(all_materials.values())
-materials.export_to_xml(str(directory / 'materials.xml'))
+            # Materials shared by every instance of the fuel cells of a ring
+            # have the volume of all of them
+            key = (cell.fill.name, ring)
+            if key not in fuel_mats:
+                fuel_mats[key] = cell.fill.clone()
+                fuel_mats[key].volume = 0.
+            fuel_mats[key].volume += volume*num_instances[cell.id]
+            cell.fill = fuel_mats[key]
+
+    if args.clone:
+        # Clones are written out one by one rather than instantiated
+        fills = [cell.fill for cell in geometry.get_all_material_cells().values()]
+        clone_ranges = [f for f in fills if isinstance(f, CloneRange)]
+        templates = {c.material.id for c in clone_ranges}
+        regular = [m for m in all_materials.values() if m.id not in templates]
+        materials = regular + clone_ranges
+    else:
+        materials = list(geometry.get_all_materials().values())
+
+    if args.check_volumes is not None:
+        checks = check_volumes(
+            geometry, clone_ranges if args.clone else fuel_mats.values(),
+            [-9.*lattice_pitch/2., -9.*lattice_pitch/2., bottom_fuel_stack],
+            [+9.*lattice_pitch/2., +9.*lattice_pitch/2., top_active_core],
+            args.check_volumes)
+        print(format_checks(checks))
+        if not all(c.consistent() for c in checks):
+            parser.exit(1, 'Assigned fuel volumes are inconsistent with the '
+                        'geometry\n')
+
+    if args.hdf5:
+        #### Create binary model file (convert with model-to-xml.py)
+        export_model(directory / 'model.h5', geometry, materials)
+    else:
+        #### Create OpenMC "materials.xml" file
+        if args.clone:
+            export_materials(materials, directory / materials_file,
+                             compact=args.compact)
+        else:
+            openmc.Materials(materials).export_to_xml(
+                str(directory / 'materials.xml'))
 
+        #### Create OpenMC "geometry.xml" file
+        geometry.export_to_xml(str(directory / 'geometry.xml'))
 
-#### Create OpenMC "geometry.xml" file
-geometry.export_to_xml(str(directory / 'geometry.xml'))
+    if cache is not None:
+        cache.store(model_key, directory, model_files)
 
 
 #### Create OpenMC "settings.xml" file
@@ -118,4 +252,4 @@ if args.multipole:
     settings.temperature['multipole'] = True
     settings.temperature['tolerance'] = 1000
 
-settings.export_to_xml(str(directory / 'settings.xml'))
+export_if_changed(settings, directory / 'settings.xml')
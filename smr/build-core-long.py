@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
 
 import argparse
-from math import pi, isclose
+from math import pi
 from pathlib import Path
 
 import openmc
-from smr.materials import materials
-from smr.surfaces import bottom_fuel_stack, top_active_core, \
-    pellet_OR, pin_pitch, clad_IR, clad_OR, active_fuel_length
+from smr.surfaces import DEFAULT_PARAMETERS, bottom_fuel_stack, \
+    top_active_core, pellet_OR, pin_pitch, clad_IR, clad_OR, active_fuel_length
+from smr.pins import FuelRegions
 from smr.core import core_geometry
+from smr.instances import cell_instances
 from smr import inlet_temperature
-import smr.surfaces
+from smr.cache import BuildCache, DEFAULT_CACHE_DIR, fingerprint, \
+    export_if_changed
 
 # Define command-line options
 parser = argparse.ArgumentParser()
@@ -23,6 +25,10 @@ parser.add_argument('-a', '--axial', type=int, default=100,
 parser.add_argument('-d', '--depleted', action='store_true',
                     help='Whether UO2 compositions should represent depleted fuel')
 parser.add_argument('-o', '--output-dir', type=Path, default=None)
+parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR,
+                    help='Directory in which generated models are cached')
+parser.add_argument('--no-cache', dest='cache', action='store_false',
+                    help='Regenerate the model even if a cached copy exists')
 parser.set_defaults(multipole=True)
 args = parser.parse_args()
 
@@ -37,49 +43,72 @@ else:
 directory.mkdir(exist_ok=True)
 
 # Modify lattice pitch
-smr.surfaces.lattice_pitch = lattice_pitch = 17*smr.surfaces.pin_pitch
-
-ring_radii = [0.1*pin_pitch, 0.2*pin_pitch]
-
-geometry = core_geometry(ring_radii, args.axial, args.depleted)
-
-h = active_fuel_length / args.axial
-fuel_mats = {}
-
-for cell in geometry.get_all_cells().values():
-    if cell.fill in materials:
-        # Determine volume of each fuel material
-        name = cell.fill.name
-        if 'UO2 Fuel' in name:
-            upper_right = cell.region.bounding_box[1][0]
-            if isclose(upper_right, ring_radii[0]):
-                ri, ro = 0.0, ring_radii[0]
-            elif isclose(upper_right, ring_radii[1]):
-                ri, ro = ring_radii[0], ring_radii[1]
-            else:
-                ri, ro = ring_radii[1], pellet_OR
-            if (name, ri) not in fuel_mats:
-                cell.fill = cell.fill.clone()
-                cell.fill.volume = pi * (ro*ro - ri*ri) * h
-                fuel_mats[name, ri] = cell.fill
-            else:
-                cell.fill = fuel_mats[name, ri]
-        elif name == 'Helium':
-            cell.fill.volume = pi * (clad_IR**2 - pellet_OR**2) * h
-        elif name == 'M5':
-            # Clad is not subdivided
-            cell.fill.volume = pi * (clad_OR**2 - clad_IR**2) * active_fuel_length
-        else:
-            cell.fill.volume = 1.0
+lattice_pitch = 17*pin_pitch
+params = DEFAULT_PARAMETERS.replace(lattice_pitch=lattice_pitch)
+
+#### Reuse model files from a previous build with the same fingerprint
+model_files = ['materials.xml', 'geometry.xml', 'tallies.xml']
+# Options that only affect settings.xml or where files are written
+exclude = ('output_dir', 'cache', 'cache_dir', 'multipole')
+model_key = fingerprint(__file__, args, exclude, params)
+cache = BuildCache(args.cache_dir) if args.cache else None
+if cache is not None and cache.restore(model_key, directory, model_files):
+    print('Reusing cached model files ({})'.format(model_key[:12]))
+else:
+    ring_radii = [0.1*pin_pitch, 0.2*pin_pitch]
 
+    fuel_regions = FuelRegions()
+    geometry = core_geometry(ring_radii, args.axial, args.depleted, fuel_regions,
+                             params)
+    fuel_regions = fuel_regions.select(geometry.get_all_cells())
 
-#### Create OpenMC "materials.xml" file
-all_materials = geometry.get_all_materials()
-materials = openmc.Materials(all_materials.values())
-materials.export_to_xml(str(directory / 'materials.xml'))
+    # Count the number of instances for each cell
+    num_instances = cell_instances(geometry)
 
-#### Create OpenMC "geometry.xml" file
-geometry.export_to_xml(str(directory / 'geometry.xml'))
+    h = active_fuel_length / args.axial
+
+    for mat in geometry.get_all_materials().values():
+        name = mat.name
+        if name == 'Helium':
+            mat.volume = pi * (clad_IR**2 - pellet_OR**2) * h
+        elif name == 'M5':
+            # Clad is not subdivided
+            mat.volume = pi * (clad_OR**2 - clad_IR**2) * active_fuel_length
+        elif 'UO2 Fuel' not in name:
+            mat.volume = 1.0
+
+    # Determine volume of each fuel material from the dimensions recorded for
+    # each fuel region when the pin universes were created. Materials shared by
+    # every instance of the fuel cells of a ring have the volume of all of them
+    fuel_mats = {}
+    fuel_table = zip(fuel_regions.cells, fuel_regions.ring, fuel_regions.volumes)
+    for cell, ring, volume in fuel_table:
+        key = (cell.fill.name, ring)
+        if key not in fuel_mats:
+            fuel_mats[key] = cell.fill.clone()
+            fuel_mats[key].volume = 0.
+        fuel_mats[key].volume += volume*num_instances[cell.id]
+        cell.fill = fuel_mats[key]
+
+    #### Create OpenMC "materials.xml" file
+    all_materials = geometry.get_all_materials()
+    materials = openmc.Materials(all_materials.values())
+    materials.export_to_xml(str(directory / 'materials.xml'))
+
+    #### Create OpenMC "geometry.xml" file
+    geometry.export_to_xml(str(directory / 'geometry.xml'))
+
+    # Check assembly power distribution
+    core_lattice = geometry.get_cells_by_fill_name('Main core')[0].fill
+    mesh = openmc.RegularMesh.from_rect_lattice(core_lattice)
+    assembly_power = openmc.Tally()
+    assembly_power.filters = [openmc.MeshFilter(mesh)]
+    assembly_power.scores = ['nu-fission']
+    tallies = openmc.Tallies([assembly_power])
+    tallies.export_to_xml(directory / 'tallies.xml')
+
+    if cache is not None:
+        cache.store(model_key, directory, model_files)
 
 
 #### Create OpenMC "settings.xml" file
@@ -106,13 +135,4 @@ if args.multipole:
     settings.temperature['multipole'] = True
     settings.temperature['tolerance'] = 1000
 
-settings.export_to_xml(str(directory / 'settings.xml'))
-
-# Check assembly power distribution
-core_lattice = geometry.get_cells_by_fill_name('Main core')[0].fill
-mesh = openmc.RegularMesh.from_rect_lattice(core_lattice)
-assembly_power = openmc.Tally()
-assembly_power.filters = [openmc.MeshFilter(mesh)]
-assembly_power.scores = ['nu-fission']
-tallies = openmc.Tallies([assembly_power])
-tallies.export_to_xml(directory / 'tallies.xml')
+export_if_changed(settings, directory / 'settings.xml')
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+"""Build a model at every combination of a grid of fuel subdivisions.
+
+Each variant is built by running the corresponding build script in its own
+process since the smr modules keep global state (surfaces, materials, and
+automatically assigned IDs) that cannot be shared between builds. Variants are
+run concurrently as long as their estimated memory use fits within a budget. A
+JSON manifest linking each output directory to its parameters and build time is
+written to the sweep directory.
+
+"""
+
+import argparse
+from itertools import product
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import time
+
+
+# Build script for each model that can be swept
+SCRIPTS = {
+    'core': 'build-core-fresh.py',
+    'assembly': 'build-assembly.py',
+}
+
+# Number of fuel pins in each model
+FUEL_PINS = {
+    'core': 37*264,
+    'assembly': 264,
+}
+
+# Rough memory use of a build: a fixed cost for the Python interpreter, OpenMC,
+# and the unsubdivided model; a cost for each subdivided fuel cell (cell,
+# region, and XML element), of which there are rings*axial for each of the
+# three fuel enrichments; and, for assembly builds that tally on cloned
+# materials, a cost for each clone
+BASE_MEMORY = 300e6
+MEMORY_PER_FUEL_CELL = 8e3
+MEMORY_PER_CLONE = 2e3
+
+
+def estimate_memory(model, rings, axial, clone):
+    """Estimate the peak memory used when building a model variant.
+
+    Parameters
+    ----------
+    model : {'core', 'assembly'}
+        Model to build
+    rings : int
+        Number of annular regions in fuel
+    axial : int
+        Number of axial subdivisions in fuel
+    clone : bool
+        Whether materials are cloned for each cell instance
+
+    Returns
+    -------
+    float
+        Estimated memory in bytes
+
+    """
+    memory = BASE_MEMORY + 3*rings*axial*MEMORY_PER_FUEL_CELL
+    if clone and model == 'assembly':
+        memory += FUEL_PINS[model]*rings*axial*MEMORY_PER_CLONE
+    return memory
+
+
+def physical_memory():
+    """Return the amount of physical memory in bytes."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 8e9
+
+
+# Define command-line options
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('-m', '--model', choices=SCRIPTS, nargs='+',
+                    default=['core'], help='Models to build')
+parser.add_argument('-r', '--rings', type=int, nargs='+', default=[10],
+                    help='Numbers of annular regions in fuel')
+parser.add_argument('-a', '--axial', type=int, nargs='+', default=[196],
+                    help='Numbers of axial subdivisions in fuel')
+parser.add_argument('--fuel', choices=('fresh', 'depleted'), nargs='+',
+                    default=['fresh'], help='Fuel compositions')
+parser.add_argument('--materials', choices=('shared', 'cloned'), nargs='+',
+                    default=['shared'],
+                    help='Whether materials are cloned for each cell instance')
+parser.add_argument('--memory', type=float, default=None,
+                    help='Memory budget in GB (default: half of physical memory)')
+parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                    help='Maximum number of concurrent builds')
+parser.add_argument('--no-cache', dest='cache', action='store_false',
+                    help='Regenerate models even if cached copies exist')
+parser.add_argument('-o', '--output-dir', type=Path, default=Path('sweep'))
+args = parser.parse_args()
+
+if args.memory is None:
+    budget = physical_memory() / 2
+else:
+    budget = args.memory * 1e9
+
+args.output_dir.mkdir(parents=True, exist_ok=True)
+script_dir = Path(__file__).resolve().parent
+
+# Enumerate variants, largest first so that small builds fill in around them
+variants = []
+for model, rings, axial, fuel, mats in product(
+        args.model, args.rings, args.axial, args.fuel, args.materials):
+    name = '{}-r{}-a{}-{}'.format(model, rings, axial, fuel)
+    if mats == 'cloned':
+        name += '-clone'
+    directory = (args.output_dir / name).resolve()
+    command = [sys.executable, str(script_dir / SCRIPTS[model]),
+               '--rings', str(rings), '--axial', str(axial),
+               '--output-dir', str(directory)]
+    if fuel == 'depleted':
+        command.append('--depleted')
+    if mats == 'cloned':
+        command.append('--clone')
+    if not args.cache:
+        command.append('--no-cache')
+
+    variants.append({
+        'directory': name,
+        'model': model,
+        'rings': rings,
+        'axial': axial,
+        'depleted': fuel == 'depleted',
+        'clone': mats == 'cloned',
+        'command': command,
+        'estimated_memory': estimate_memory(model, rings, axial,
+                                            mats == 'cloned'),
+    })
+variants.sort(key=lambda v: v['estimated_memory'], reverse=True)
+
+# Launch builds while they fit in the memory budget. A build is always started
+# when nothing else is running so that a variant larger than the budget still
+# gets built, just on its own.
+pending = list(variants)
+running = []
+manifest = []
+while pending or running:
+    in_use = sum(v['estimated_memory'] for v, _, _, _ in running)
+    for variant in list(pending):
+        if len(running) >= args.jobs:
+            break
+        if running and in_use + variant['estimated_memory'] > budget:
+            continue
+        directory = args.output_dir / variant['directory']
+        directory.mkdir(exist_ok=True)
+        log = open(str(directory / 'build.log'), 'w')
+        proc = subprocess.Popen(variant['command'], cwd=str(script_dir),
+                                stdout=log, stderr=subprocess.STDOUT)
+        print('Started {} (~{:.1f} GB)'.format(
+            variant['directory'], variant['estimated_memory']/1e9))
+        running.append((variant, proc, log, time.perf_counter()))
+        pending.remove(variant)
+        in_use += variant['estimated_memory']
+
+    time.sleep(0.5)
+    for item in list(running):
+        variant, proc, log, start = item
+        if proc.poll() is None:
+            continue
+        log.close()
+        running.remove(item)
+
+        elapsed = time.perf_counter() - start
+        status = 'done' if proc.returncode == 0 else 'FAILED'
+        print('{} {} in {:.1f} s'.format(status, variant['directory'], elapsed))
+        entry = {k: v for k, v in variant.items() if k != 'command'}
+        entry['command'] = ' '.join(variant['command'])
+        entry['build_time'] = elapsed
+        entry['returncode'] = proc.returncode
+        manifest.append(entry)
+
+        # Rewrite the manifest after each build so that it reflects progress
+        manifest.sort(key=lambda e: e['directory'])
+        with open(str(args.output_dir / 'manifest.json'), 'w') as fh:
+            json.dump(manifest, fh, indent=2)
+
+failed = [e['directory'] for e in manifest if e['returncode'] != 0]
+if failed:
+    sys.exit('Failed builds: {}'.format(', '.join(failed)))
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+"""Check a model for overlapping cells and undefined regions.
+
+The geometry is built in memory and a regular grid of points over the model
+(or over a given box) is tested against every cell of each universe the
+points reach, in parallel over chunks of the grid. Each problem is reported
+with the cells involved and the coordinates of a few of the points, and the
+exit status is nonzero if any problem is found.
+
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from smr.overlaps import find_overlaps, format_problems
+from smr.surfaces import get_surfaces, lattice_pitch, pellet_OR, pin_pitch, \
+    rpv_OR
+
+
+# Define command-line options
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('-m', '--model', choices=('core', 'assembly', 'pin'),
+                    default='core', help='Model to check')
+parser.add_argument('-r', '--rings', type=int, default=10,
+                    help='Number of annular regions in fuel')
+parser.add_argument('-a', '--axial', type=int, default=196,
+                    help='Number of axial subdivisions in fuel')
+parser.add_argument('-d', '--depleted', action='store_true',
+                    help='Whether UO2 compositions should represent depleted fuel')
+parser.add_argument('--axial-lattice', action='store_true',
+                    help='Stack axial segments of fuel in a z-lattice instead '
+                    'of bounding them by planes')
+parser.add_argument('--lattice-stacks', action='store_true',
+                    help='Index axial stacks of pin cells by a z-lattice '
+                    'instead of bounding their layers by planes')
+parser.add_argument('--reflector-partitions', type=int, default=1,
+                    help='Number of blocks in x and y that each heavy '
+                    'reflector block is divided into')
+parser.add_argument('-s', '--shape', type=int, nargs=3, default=(1000, 1000, 50),
+                    metavar=('NX', 'NY', 'NZ'),
+                    help='Number of grid points along x, y, and z')
+parser.add_argument('-b', '--box', type=float, nargs=6, default=None,
+                    metavar=('X0', 'Y0', 'Z0', 'X1', 'Y1', 'Z1'),
+                    help='Lower left and upper right corner of the grid in '
+                    'cm; defaults to the extent of the model')
+parser.add_argument('-j', '--jobs', type=int, default=None,
+                    help='Number of processes checking the grid in parallel')
+parser.add_argument('--chunk-size', type=int, default=1000000,
+                    help='Number of points checked at once by a process')
+args = parser.parse_args()
+
+if args.rings > 1:
+    ring_radii = np.sqrt(np.arange(1, args.rings)*pellet_OR**2 / args.rings)
+else:
+    ring_radii = None
+options = dict(axial_lattice=args.axial_lattice,
+               lattice_stacks=args.lattice_stacks)
+
+if args.model == 'core':
+    from smr.core import core_geometry
+    root = core_geometry(ring_radii, args.axial, args.depleted,
+                         reflector_partitions=args.reflector_partitions,
+                         **options).root_universe
+    half_width = rpv_OR
+elif args.model == 'assembly':
+    from smr.assemblies import assembly_universes
+    root = assembly_universes(ring_radii, args.axial, args.depleted,
+                              **options)['Assembly (3.1%)']
+    half_width = lattice_pitch/2
+else:
+    from smr.pins import pin_universes
+    root = pin_universes(ring_radii, args.axial, args.depleted,
+                         **options)['Fuel (3.1%) stack']
+    half_width = pin_pitch/2
+
+if args.box is None:
+    surfs = get_surfaces()
+    lower_left = (-half_width, -half_width, surfs['lower bound'].z0)
+    upper_right = (half_width, half_width, surfs['upper bound'].z0)
+else:
+    lower_left, upper_right = args.box[:3], args.box[3:]
+
+problems = find_overlaps(root, lower_left, upper_right, args.shape,
+                         args.jobs, args.chunk_size)
+print(format_problems(problems))
+if problems:
+    sys.exit(1)
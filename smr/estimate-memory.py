@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""Estimate the memory an OpenMC run of a model needs on each MPI rank.
+
+The estimate is computed from the build options without building the model.
+If a budget is given, the exit status is nonzero when the estimate exceeds it.
+
+"""
+
+import argparse
+import sys
+
+from smr.memory import estimate_memory
+
+
+# Define command-line options
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('-m', '--model', choices=('core', 'assembly'),
+                    default='core', help='Model to estimate memory for')
+parser.add_argument('-r', '--rings', type=int, default=10,
+                    help='Number of annular regions in fuel')
+parser.add_argument('-a', '--axial', type=int, default=196,
+                    help='Number of axial subdivisions in fuel')
+parser.add_argument('-d', '--depleted', action='store_true',
+                    help='Whether UO2 compositions should represent depleted fuel')
+parser.add_argument('--clone', action='store_true',
+                    help='Clone materials for each cell instance')
+parser.add_argument('-t', '--tallies', choices=('cell', 'mat'), default=None,
+                    help='Depletion tallies over fuel cell instances or fuel '
+                    'materials')
+parser.add_argument('--axial-lattice', action='store_true',
+                    help='Stack axial segments of fuel in a z-lattice')
+parser.add_argument('--lattice-stacks', action='store_true',
+                    help='Index axial stacks of pin cells by a z-lattice')
+parser.add_argument('--reflector-partitions', type=int, default=1,
+                    help='Number of blocks in x and y that each heavy '
+                    'reflector block is divided into')
+parser.add_argument('-p', '--particles', type=int, default=10000,
+                    help='Number of particles per generation')
+parser.add_argument('-n', '--ranks', type=int, default=1,
+                    help='Number of MPI ranks')
+parser.add_argument('-b', '--budget', type=float, default=None,
+                    help='Memory available to each rank in GB')
+args = parser.parse_args()
+
+estimate = estimate_memory(args.rings, args.axial, args.depleted, args.clone,
+                           args.model, args.tallies, args.particles,
+                           args.ranks, args.axial_lattice, args.lattice_stacks,
+                           args.reflector_partitions)
+print(estimate.report())
+
+if args.budget is not None:
+    if estimate.fits(args.budget*1e9):
+        print('Fits within {} GB per rank'.format(args.budget))
+    else:
+        print('Exceeds {} GB per rank'.format(args.budget))
+        sys.exit(1)
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+import argparse
+from pathlib import Path
+
+from smr.export import expand_materials
+
+
+# Define command-line options
+parser = argparse.ArgumentParser(
+    description='Convert a compact materials file into a standard '
+    'materials.xml file that OpenMC can read')
+parser.add_argument('source', type=Path,
+                    help='Compact materials file, e.g. materials-compact.xml')
+parser.add_argument('-o', '--output', type=Path, default=None,
+                    help='Path of materials.xml file to write (defaults to '
+                    'materials.xml in the same directory as the source)')
+args = parser.parse_args()
+
+if args.output is None:
+    args.output = args.source.parent / 'materials.xml'
+expand_materials(args.source, args.output)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""Report structural statistics of a model geometry.
+
+The geometry is read from a model.h5 file or a directory containing
+geometry.xml and materials.xml, or, if neither is given, the core geometry is
+built in memory from the given options without writing any files. Optionally,
+the universes estimated to dominate the cost of tracking particles are listed.
+
+"""
+
+import argparse
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import openmc
+
+from smr.stats import format_costs, geometry_statistics, tracking_costs
+
+
+# Define command-line options
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('model', type=Path, nargs='?', default=None,
+                    help='HDF5 model file or directory containing XML files')
+parser.add_argument('-r', '--rings', type=int, default=10,
+                    help='Number of annular regions in fuel')
+parser.add_argument('-a', '--axial', type=int, default=196,
+                    help='Number of axial subdivisions in fuel')
+parser.add_argument('-d', '--depleted', action='store_true',
+                    help='Whether UO2 compositions should represent depleted fuel')
+parser.add_argument('--axial-lattice', action='store_true',
+                    help='Stack axial segments of fuel in a z-lattice instead '
+                    'of bounding them by planes')
+parser.add_argument('--lattice-stacks', action='store_true',
+                    help='Index axial stacks of pin cells by a z-lattice '
+                    'instead of bounding their layers by planes')
+parser.add_argument('--reflector-partitions', type=int, default=1,
+                    help='Number of blocks in x and y that each heavy '
+                    'reflector block is divided into')
+parser.add_argument('--costs', type=int, default=0, metavar='N',
+                    help='List the N universes with the highest estimated '
+                    'tracking cost')
+parser.add_argument('--sigma-t', type=float, default=1.0,
+                    help='Macroscopic total cross section in 1/cm used to '
+                    'estimate tracking costs')
+parser.add_argument('--json', action='store_true',
+                    help='Write the statistics as JSON')
+args = parser.parse_args()
+
+if args.model is None:
+    from smr.core import core_geometry
+    from smr.surfaces import pellet_OR
+
+    if args.rings > 1:
+        ring_radii = np.sqrt(np.arange(1, args.rings)*pellet_OR**2 / args.rings)
+    else:
+        ring_radii = None
+    geometry = core_geometry(ring_radii, args.axial, args.depleted,
+                             axial_lattice=args.axial_lattice,
+                             lattice_stacks=args.lattice_stacks,
+                             reflector_partitions=args.reflector_partitions)
+elif args.model.is_dir():
+    materials = openmc.Materials.from_xml(str(args.model / 'materials.xml'))
+    geometry = openmc.Geometry.from_xml(str(args.model / 'geometry.xml'),
+                                        materials)
+else:
+    from smr.hdf5 import load_model
+    geometry, _ = load_model(args.model)
+
+stats = geometry_statistics(geometry)
+if args.costs > 0:
+    costs = tracking_costs(geometry, args.sigma_t)
+if args.json:
+    output = stats.to_dict()
+    if args.costs > 0:
+        output['tracking costs'] = [asdict(c) for c in costs[:args.costs]]
+    print(json.dumps(output, indent=2))
+else:
+    print(stats.report())
+    if args.costs > 0:
+        print()
+        print(format_costs(costs, args.costs))
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+import argparse
+from pathlib import Path
+
+from smr.hdf5 import export_xml
+
+
+# Define command-line options
+parser = argparse.ArgumentParser(
+    description='Write geometry.xml and materials.xml from a model.h5 file')
+parser.add_argument('model', type=Path, help='HDF5 model file, e.g. model.h5')
+parser.add_argument('-o', '--output-dir', type=Path, default=None,
+                    help='Directory in which to write XML files (defaults to '
+                    'the directory containing the model file)')
+args = parser.parse_args()
+
+directory = args.model.parent if args.output_dir is None else args.output_dir
+directory.mkdir(parents=True, exist_ok=True)
+export_xml(args.model, directory)
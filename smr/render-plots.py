@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+"""Render the slice plots of the core model without running OpenMC.
+
+The core geometry is built in memory from the given options and each plot of
+:func:`smr.plots.core_plots` is written as a portable pixmap (.ppm) image.
+
+"""
+
+import argparse
+from pathlib import Path
+import time
+
+import numpy as np
+
+from smr.core import core_geometry
+from smr.locate import PointLocator
+from smr.plots import core_plots, render_plot, write_ppm
+from smr.surfaces import pellet_OR
+
+
+# Define command-line options
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('-r', '--rings', type=int, default=10,
+                    help='Number of annular regions in fuel')
+parser.add_argument('-a', '--axial', type=int, default=196,
+                    help='Number of axial subdivisions in fuel')
+parser.add_argument('-d', '--depleted', action='store_true',
+                    help='Whether UO2 compositions should represent depleted fuel')
+parser.add_argument('--axial-lattice', action='store_true',
+                    help='Stack axial segments of fuel in a z-lattice instead '
+                    'of bounding them by planes')
+parser.add_argument('--lattice-stacks', action='store_true',
+                    help='Index axial stacks of pin cells by a z-lattice '
+                    'instead of bounding their layers by planes')
+parser.add_argument('--reflector-partitions', type=int, default=1,
+                    help='Number of blocks in x and y that each heavy '
+                    'reflector block is divided into')
+parser.add_argument('-o', '--output-dir', type=Path, default=Path('plots'),
+                    help='Directory to write images to')
+args = parser.parse_args()
+
+if args.rings > 1:
+    ring_radii = np.sqrt(np.arange(1, args.rings)*pellet_OR**2 / args.rings)
+else:
+    ring_radii = None
+geometry = core_geometry(ring_radii, args.axial, args.depleted,
+                         axial_lattice=args.axial_lattice,
+                         lattice_stacks=args.lattice_stacks,
+                         reflector_partitions=args.reflector_partitions)
+locator = PointLocator(geometry)
+
+args.output_dir.mkdir(parents=True, exist_ok=True)
+for plot in core_plots():
+    start = time.perf_counter()
+    image = render_plot(plot, locator)
+    path = args.output_dir / '{}.ppm'.format(plot.filename)
+    write_ppm(image, path)
+    elapsed = time.perf_counter() - start
+    print('{}: {} pixels in {:.1f} s'.format(path, image.shape[0]*image.shape[1],
+                                             elapsed))
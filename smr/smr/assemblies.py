@@ -1,19 +1,21 @@
 """Instantiate each fuel assembly as an OpenMC Lattice."""
 
+import re
+
 import numpy as np
 
 import openmc
 
 from .materials import mats
-from .surfaces import surfs, pin_pitch
-from .pins import pin_universes
+from .surfaces import get_surfaces, DEFAULT_PARAMETERS
+from .pins import pin_universes, clear_cache as _clear_pin_cache
 
 
-def make_assembly(name, universes):
+def make_assembly(name, universes, params=None):
     """Instantiate an OpenMC Lattice for this fuel assembly.
 
     This method creates a 17x17 PWR lattice with axially spaced
-    sleeves defined in the global surfs dictionary.
+    sleeves defined in the surfs dictionary for the given parameters.
 
     Parameters
     ----------
@@ -21,12 +23,18 @@ def make_assembly(name, universes):
         The string name to assign to the Lattice
     universes: numpy.ndarray of openmc.Universe
         A 2D NumPy array of Universes to use for the Lattice
+    params: smr.surfaces.GeometryParameters, optional
+        Geometric parameters of the model
 
     Returns
     -------
     universe: openmc.Universe
         A Universe with a Cell filled by the Lattice
     """
+    if params is None:
+        params = DEFAULT_PARAMETERS
+    surfs = get_surfaces(params)
+    pin_pitch = params.pin_pitch
 
     # Instantiate the lattice
     lattice = openmc.RectLattice(name=name)
@@ -120,9 +128,92 @@ def make_assembly(name, universes):
     return universe
 
 
-def assembly_universes(ring_radii, num_axial, depleted):
+# Define the NumPy array indices for assembly locations where there
+# may be CR guide tubes, instrument tubes and burnable absorbers
+_NONFUEL_Y = \
+    np.array([2,2,2,3,3,5,5,5,5,5,8,8,8,8,8,11,11,11,11,11,13,13,14,14,14])
+_NONFUEL_X = \
+    np.array([5,8,11,3,13,2,5,8,11,14,2,5,8,11,14,2,5,8,11,14,3,13,5,8,11])
+
+# Control rod banks that may be inserted in assemblies of each enrichment
+_BANKS = {
+    '1.6': ('A', 'B', 'C', 'D', 'SB', 'SC', 'SD', 'SE'),
+    '2.4': ('D',),
+    '3.1': ('SA',),
+}
+
+
+class AssemblyUniverses(dict):
+    """Dictionary of assembly universes that are created when first looked up.
+
+    Keys have the form ``'Assembly (<enrichment>%)[ CR <bank>][ instr]'``.
+    Only the assemblies that are looked up are created, along with the pin
+    universes they contain. Iterating over the dictionary only yields
+    assemblies that have been created.
+
+    Parameters
+    ----------
+    pins : smr.pins.PinUniverses
+        Pin universes to fill the assemblies with
+
+    """
+    def __init__(self, pins):
+        super().__init__()
+        self.pins = pins
+
+    def __missing__(self, key):
+        match = re.match(r'Assembly \((\d\.\d)%\)(?: CR (\w+))?( instr)?$', key)
+        if match is None:
+            raise KeyError(key)
+        enrichment, bank, instr = match.groups()
+        if enrichment not in _BANKS or (bank is not None and
+                                        bank not in _BANKS[enrichment]):
+            raise KeyError(key)
+
+        self[key] = self._build(enrichment, bank, instr is not None)
+        return dict.__getitem__(self, key)
+
+    def _build(self, enrichment, bank, instr):
+        pins = self.pins
+
+        # Instrument tube or empty guide tube at the center of the assembly
+        cent = pins['IT stack'] if instr else pins['GT empty instr']
+
+        # Guide tubes, either empty or with a control rod bank inserted
+        if bank is None:
+            tube = pins['GT empty stack']
+            name = 'Assembly ({}%) no BAs'.format(enrichment)
+        else:
+            tube = pins['GT CR bank {}'.format(bank)]
+            name = 'Assembly ({}%) CR {}'.format(enrichment, bank)
+        if instr:
+            name += ' instr'
+
+        universes = np.empty((17,17), dtype=openmc.Universe)
+        universes[:,:] = pins['Fuel ({}%) stack'.format(enrichment)]
+        universes[_NONFUEL_Y, _NONFUEL_X] = [    tube,   tube,   tube,
+                                               tube,                tube,
+                                             tube, tube,  tube,  tube, tube,
+                                             tube, tube,  cent,  tube, tube,
+                                             tube, tube,  tube,  tube, tube,
+                                               tube,                tube,
+                                                 tube,   tube,   tube     ]
+        return make_assembly(name, universes, pins.params)
+
+
+# Assembly universes already created, keyed by the parameters passed to
+# assembly_universes()
+_assembly_cache = {}
+
+
+def assembly_universes(ring_radii, num_axial, depleted, fuel_regions=None,
+                       params=None, axial_lattice=False, lattice_stacks=False):
     """Generate universes for SMR fuel assemblies.
 
+    Assemblies are created only when they are first looked up in the returned
+    dictionary, and calls with the same parameters return the same dictionary.
+    Call :func:`clear_cache` to start over.
+
     Parameters
     ----------
     ring_radii : iterable of float
@@ -132,134 +223,30 @@ def assembly_universes(ring_radii, num_axial, depleted):
         Number of axial subdivisions in fuel
     depleted : bool
         Whether fuel should contain nuclides as though it were depleted
+    fuel_regions : smr.pins.FuelRegions, optional
+        If given, a row is appended to this table for every fuel cell created
+    params : smr.surfaces.GeometryParameters, optional
+        Geometric parameters of the model
+    axial_lattice : bool
+        Whether axial segments of fuel are placed in a lattice stacked in z
+    lattice_stacks : bool
+        Whether axial stacks of pin cells are indexed by a z-lattice
 
     Returns
     -------
-    dict
+    AssemblyUniverses
         Dictionary mapping a universe name to a openmc.Universe object
 
     """
-    pins = pin_universes(ring_radii, num_axial, depleted)
-
-    # Create dictionary to store assembly universes
-    univs = {}
-
-    # commonly needed universes
-    gtu = pins['GT empty stack']
-    gti = pins['GT empty instr']
-    ins = pins['IT stack']
-    crA = pins['GT CR bank A']
-    crB = pins['GT CR bank B']
-    crC = pins['GT CR bank C']
-    crD = pins['GT CR bank D']
-    crSA = pins['GT CR bank SA']
-    crSB = pins['GT CR bank SB']
-    crSC = pins['GT CR bank SC']
-    crSD = pins['GT CR bank SD']
-    crSE = pins['GT CR bank SE']
-
-
-    # Define the NumPy array indices for assembly locations where there
-    # may be CR guide tubes, instrument tubes and burnable absorbers
-    nonfuel_y = \
-        np.array([2,2,2,3,3,5,5,5,5,5,8,8,8,8,8,11,11,11,11,11,13,13,14,14,14])
-    nonfuel_x = \
-        np.array([5,8,11,3,13,2,5,8,11,14,2,5,8,11,14,2,5,8,11,14,3,13,5,8,11])
-
-
-    #### 1.6% ENRICHED ASSEMBLIES
-
-    for cent, comment in [(gti, ''), (ins, ' instr')]:
-
-        # NO BURNABLE ABSORBERS
-        universes = np.empty((17,17), dtype=openmc.Universe)
-        universes[:,:] = pins['Fuel (1.6%) stack']
-        universes[nonfuel_y, nonfuel_x] = [    gtu,   gtu,   gtu,
-                                             gtu,              gtu,
-                                           gtu, gtu,  gtu,  gtu, gtu,
-                                           gtu, gtu,  cent, gtu, gtu,
-                                           gtu, gtu,  gtu,  gtu, gtu,
-                                             gtu,              gtu,
-                                               gtu,   gtu,   gtu     ]
-        univs['Assembly (1.6%)' + comment] = \
-            make_assembly('Assembly (1.6%) no BAs' + comment, universes)
-
-        # WITH EACH CONTROL ROD BANK
-        for bank, comment2 in [(crA, 'A'), (crB, 'B'), (crC, 'C'), (crD, 'D'),
-                     (crSB, 'SB'), (crSC, 'SC'), (crSD, 'SD'), (crSE, 'SE')]:
-
-            universes = np.empty((17,17), dtype=openmc.Universe)
-            universes[:,:] = pins['Fuel (1.6%) stack']
-            universes[nonfuel_y, nonfuel_x] = [    bank,    bank,   bank,
-                                                 bank,                 bank,
-                                               bank, bank,  bank,  bank, bank,
-                                               bank, bank,  cent,  bank, bank,
-                                               bank, bank,  bank,  bank, bank,
-                                                 bank,                 bank,
-                                                   bank,    bank,   bank     ]
-            univs['Assembly (1.6%) CR {}'.format(comment2) + comment] = \
-                make_assembly('Assembly (1.6%) CR {}'.format(comment2) + comment, universes)
-
-
-    #### 2.4% ENRICHED ASSEMBLIES
-
-    for cent, comment in [(gti, ''), (ins, ' instr')]:
-
-        # NO BURNABLE ABSORBERS
-        universes = np.empty((17,17), dtype=openmc.Universe)
-        universes[:,:] = pins['Fuel (2.4%) stack']
-        universes[nonfuel_y, nonfuel_x] = [    gtu,   gtu,   gtu,
-                                             gtu,              gtu,
-                                           gtu, gtu,  gtu,  gtu, gtu,
-                                           gtu, gtu,  cent, gtu, gtu,
-                                           gtu, gtu,  gtu,  gtu, gtu,
-                                             gtu,              gtu,
-                                               gtu,   gtu,   gtu     ]
-        univs['Assembly (2.4%)' + comment] = \
-            make_assembly('Assembly (2.4%) no BAs' + comment, universes)
-
-        # WITH CONTROL ROD D BANK
-        universes = np.empty((17,17), dtype=openmc.Universe)
-        universes[:,:] = pins['Fuel (2.4%) stack']
-        universes[nonfuel_y, nonfuel_x] = [    crD,   crD,   crD,
-                                             crD,              crD,
-                                           crD, crD,  crD,  crD, crD,
-                                           crD, crD,  cent, crD, crD,
-                                           crD, crD,  crD,  crD, crD,
-                                             crD,              crD,
-                                               crD,   crD,   crD     ]
-        univs['Assembly (2.4%) CR D' + comment] = \
-            make_assembly('Assembly (2.4%) CR D' + comment, universes)
-
-    #### 3.1% ENRICHED ASSEMBLIES
-
-    for cent, comment in [(gti, ''), (ins, ' instr')]:
-
-        # NO BURNABLE ABSORBERS
-        universes = np.empty((17,17), dtype=openmc.Universe)
-        universes[:,:] = pins['Fuel (3.1%) stack']
-        universes[nonfuel_y, nonfuel_x] = [    gtu,   gtu,   gtu,
-                                             gtu,              gtu,
-                                           gtu, gtu,  gtu,  gtu, gtu,
-                                           gtu, gtu,  cent, gtu, gtu,
-                                           gtu, gtu,  gtu,  gtu, gtu,
-                                             gtu,              gtu,
-                                               gtu,   gtu,   gtu     ]
-        univs['Assembly (3.1%)' + comment] = \
-            make_assembly('Assembly (3.1%) no BAs' + comment, universes)
-
-        # WITH CONTROL ROD SA BANK
-        universes = np.empty((17,17), dtype=openmc.Universe)
-        universes[:,:] = pins['Fuel (3.1%) stack']
-        universes[nonfuel_y, nonfuel_x] = [     crSA,    crSA,   crSA,
-                                              crSA,                crSA,
-                                           crSA,  crSA,  crSA,  crSA,  crSA,
-                                           crSA,  crSA,  cent,  crSA,  crSA,
-                                           crSA,  crSA,  crSA,  crSA,  crSA,
-                                              crSA,                crSA,
-                                                crSA,    crSA,   crSA     ]
-        univs['Assembly (3.1%) CR SA' + comment] = \
-            make_assembly('Assembly (3.1%) CR SA' + comment, universes)
+    pins = pin_universes(ring_radii, num_axial, depleted, fuel_regions, params,
+                         axial_lattice, lattice_stacks)
+    univs = _assembly_cache.get(id(pins))
+    if univs is None or univs.pins is not pins:
+        univs = _assembly_cache[id(pins)] = AssemblyUniverses(pins)
+    return univs
 
 
-    return univs
+def clear_cache():
+    """Discard assembly and pin universes created by previous calls."""
+    _assembly_cache.clear()
+    _clear_pin_cache()
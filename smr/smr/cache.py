@@ -0,0 +1,253 @@
+"""Content-addressed cache of generated model files.
+
+A build is identified by a fingerprint of the build script, its command-line
+options, the parameter values of the smr package and the source of the smr
+package itself. Since objects are created in the same order every time a given
+build runs in a fresh process, their automatically assigned IDs (and therefore
+the generated XML files) are identical whenever the fingerprint matches.
+Generated files are only replaced when their contents differ, so a change that
+only affects settings.xml leaves the other files untouched.
+
+"""
+
+import dataclasses
+import filecmp
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+
+import numpy as np
+import openmc
+
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    'SMR_CACHE_DIR', Path.home() / '.cache' / 'smr'))
+
+_PACKAGE_DIR = Path(__file__).parent
+
+
+def _surface_state(surface):
+    return [surface.type, sorted(surface.coefficients.items()),
+            surface.boundary_type]
+
+
+def parameters(geometry_params=None):
+    """Return the current parameter values of the smr package.
+
+    Values are read at call time, so parameters that a build script has
+    modified (e.g., boundary conditions of surfaces) are reflected.
+
+    Parameters
+    ----------
+    geometry_params : smr.surfaces.GeometryParameters, optional
+        Geometric parameters of the model being built. Defaults to
+        :data:`smr.surfaces.DEFAULT_PARAMETERS`.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping a qualified parameter name to its value
+
+    """
+    import smr
+    from smr import surfaces, pins
+
+    if geometry_params is None:
+        geometry_params = surfaces.DEFAULT_PARAMETERS
+
+    params = {}
+    for module in (smr, surfaces, pins):
+        for name, value in vars(module).items():
+            if name.startswith('_') or isinstance(value, bool):
+                continue
+            if isinstance(value, (int, float)):
+                params['{}.{}'.format(module.__name__, name)] = value
+            elif isinstance(value, np.ndarray):
+                params['{}.{}'.format(module.__name__, name)] = value.tolist()
+
+    for name, value in dataclasses.asdict(geometry_params).items():
+        params['geometry.{}'.format(name)] = value
+
+    # Surfaces can be modified in place, e.g. to change boundary conditions
+    for key, surf in surfaces.get_surfaces(geometry_params).items():
+        if isinstance(surf, openmc.Region):
+            state = [_surface_state(s) for s in surf.get_surfaces().values()]
+        else:
+            state = _surface_state(surf)
+        params['surfs[{}]'.format(key)] = state
+
+    return params
+
+
+def _source_digest():
+    """Return a digest of the source files in the smr package."""
+    sha = hashlib.sha256()
+    for path in sorted(_PACKAGE_DIR.glob('*.py')):
+        sha.update(path.name.encode())
+        sha.update(path.read_bytes())
+    return sha.hexdigest()
+
+
+def fingerprint(script, options, exclude=(), params=None):
+    """Compute the fingerprint identifying a model build.
+
+    Parameters
+    ----------
+    script : str or pathlib.Path
+        Path of the build script
+    options : argparse.Namespace or dict
+        Command-line options of the build
+    exclude : iterable of str
+        Options that do not affect the cached files (e.g., the output
+        directory)
+    params : smr.surfaces.GeometryParameters, optional
+        Geometric parameters of the model being built
+
+    Returns
+    -------
+    str
+        Hexadecimal SHA-256 digest
+
+    """
+    if not isinstance(options, dict):
+        options = vars(options)
+    options = {k: v for k, v in options.items() if k not in exclude}
+    data = {
+        'script': Path(script).name,
+        'options': options,
+        'parameters': parameters(params),
+        'source': _source_digest()
+    }
+    text = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def update_file(source, destination):
+    """Copy a file unless the destination already has the same contents.
+
+    Parameters
+    ----------
+    source : pathlib.Path
+        File to copy
+    destination : pathlib.Path
+        Path to copy to
+
+    Returns
+    -------
+    bool
+        Whether the destination was written
+
+    """
+    destination = Path(destination)
+    if destination.exists() and filecmp.cmp(source, destination, shallow=False):
+        return False
+
+    # Copy to a temporary file first so that the destination is replaced
+    # atomically and never left partially written
+    fd, tmp = tempfile.mkstemp(dir=str(destination.parent),
+                               prefix=destination.name)
+    os.close(fd)
+    shutil.copyfile(str(source), tmp)
+    os.replace(tmp, str(destination))
+    return True
+
+
+def export_if_changed(obj, path):
+    """Export an object to XML, keeping the existing file if it is identical.
+
+    Parameters
+    ----------
+    obj : object
+        Object with an ``export_to_xml`` method, e.g. openmc.Settings
+    path : pathlib.Path
+        Path of XML file to write
+
+    Returns
+    -------
+    bool
+        Whether the file was written
+
+    """
+    path = Path(path)
+    with tempfile.TemporaryDirectory(dir=str(path.parent)) as tmpdir:
+        tmp = Path(tmpdir) / path.name
+        obj.export_to_xml(str(tmp))
+        if path.exists() and filecmp.cmp(str(tmp), str(path), shallow=False):
+            return False
+        os.replace(str(tmp), str(path))
+    return True
+
+
+class BuildCache:
+    """Directory of previously generated model files keyed by fingerprint.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        Root directory of the cache
+
+    Attributes
+    ----------
+    directory : pathlib.Path
+        Root directory of the cache
+
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def entry(self, key):
+        """Return the directory holding the files for a fingerprint."""
+        return self.directory / key
+
+    def restore(self, key, destination, filenames):
+        """Copy cached files into a directory if they exist.
+
+        Parameters
+        ----------
+        key : str
+            Fingerprint of the build
+        destination : pathlib.Path
+            Directory to copy files into
+        filenames : iterable of str
+            Names of the files making up the cached model
+
+        Returns
+        -------
+        bool
+            Whether all files were found in the cache
+
+        """
+        entry = self.entry(key)
+        if not all((entry / name).exists() for name in filenames):
+            return False
+        for name in filenames:
+            update_file(entry / name, Path(destination) / name)
+        return True
+
+    def store(self, key, source, filenames):
+        """Add generated files to the cache.
+
+        Parameters
+        ----------
+        key : str
+            Fingerprint of the build
+        source : pathlib.Path
+            Directory containing the generated files
+        filenames : iterable of str
+            Names of the files making up the model
+
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = self.entry(key)
+        if entry.exists():
+            shutil.rmtree(str(entry))
+
+        # Populate a temporary directory and rename it so that an interrupted
+        # build never leaves a partial entry behind
+        tmp = Path(tempfile.mkdtemp(dir=str(self.directory), prefix=key))
+        for name in filenames:
+            shutil.copyfile(str(Path(source) / name), str(tmp / name))
+        os.replace(str(tmp), str(entry))
@@ -7,10 +7,45 @@ import openmc
 from .materials import mats
 from .reflector import reflector_universes
 from .assemblies import assembly_universes
-from smr import surfaces
+from .surfaces import get_surfaces, DEFAULT_PARAMETERS
 
 
-def core_geometry(ring_radii, num_axial, depleted):
+# Fuel assemblies in the core lattice, where '1', '2', and '3' stand for
+# assemblies of 1.6%, 2.4%, and 3.1% enriched fuel. All other positions hold
+# heavy reflector blocks.
+CORE_LAYOUT = (
+    '         ',
+    '   333   ',
+    '  32123  ',
+    ' 3211123 ',
+    ' 3112113 ',
+    ' 3211123 ',
+    '  32123  ',
+    '   333   ',
+    '         ',
+)
+
+_ENRICHMENTS = {'1': '1.6', '2': '2.4', '3': '3.1'}
+
+
+def assembly_enrichments():
+    """Return the enrichment of the fuel assembly at each core position.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping a (row, column) index into the core lattice to the
+        enrichment of the assembly there as a string, e.g. '3.1'
+
+    """
+    return {(i, j): _ENRICHMENTS[code]
+            for i, row in enumerate(CORE_LAYOUT)
+            for j, code in enumerate(row) if code in _ENRICHMENTS}
+
+
+def core_geometry(ring_radii, num_axial, depleted, fuel_regions=None,
+                  params=None, axial_lattice=False, lattice_stacks=False,
+                  reflector_partitions=1):
     """Generate full core SMR geometry.
 
     Parameters
@@ -22,6 +57,18 @@ def core_geometry(ring_radii, num_axial, depleted):
         Number of axial subdivisions in fuel
     depleted : bool
         Whether fuel should contain nuclides as though it were depleted
+    fuel_regions : smr.pins.FuelRegions, optional
+        If given, a row is appended to this table for every fuel cell created
+    params : smr.surfaces.GeometryParameters, optional
+        Geometric parameters of the model. Models built from different
+        parameters have separate surfaces and universes.
+    axial_lattice : bool
+        Whether axial segments of fuel are placed in a lattice stacked in z
+    lattice_stacks : bool
+        Whether axial stacks of pin cells are indexed by a z-lattice
+    reflector_partitions : int
+        Number of blocks in x and y that each heavy reflector block is divided
+        into so that each contains only the water holes near it
 
     Returns
     -------
@@ -29,12 +76,15 @@ def core_geometry(ring_radii, num_axial, depleted):
         SMR full core geometry
 
     """
-    assembly = assembly_universes(ring_radii, num_axial, depleted)
-    reflector = reflector_universes()
+    if params is None:
+        params = DEFAULT_PARAMETERS
+    assembly = assembly_universes(ring_radii, num_axial, depleted, fuel_regions,
+                                  params, axial_lattice, lattice_stacks)
+    reflector = reflector_universes(params, reflector_partitions)
 
     # Construct main core lattice
     core = openmc.RectLattice(name='Main core')
-    lattice_pitch = surfaces.lattice_pitch
+    lattice_pitch = params.lattice_pitch
     core.lower_left = (-9*lattice_pitch/2, -9*lattice_pitch/2)
     core.pitch = (lattice_pitch, lattice_pitch)
     universes = np.tile(reflector['solid'], (9, 9))
@@ -47,67 +97,30 @@ def core_geometry(ring_radii, num_axial, depleted):
 
     universes[1, 1] = reflector['1,1']
     universes[1, 2] = reflector['NW']
-    universes[1, 3] = assembly['Assembly (3.1%)']
-    universes[1, 4] = assembly['Assembly (3.1%)']
-    universes[1, 5] = assembly['Assembly (3.1%)']
     universes[1, 6] = reflector['NE']
     universes[1, 7] = reflector['1,7']
 
     universes[2, 0] = reflector['2,0']
     universes[2, 1] = reflector['NW']
-    universes[2, 2] = assembly['Assembly (3.1%)']
-    universes[2, 3] = assembly['Assembly (2.4%)']
-    universes[2, 4] = assembly['Assembly (1.6%)']
-    universes[2, 5] = assembly['Assembly (2.4%)']
-    universes[2, 6] = assembly['Assembly (3.1%)']
     universes[2, 7] = reflector['NE']
     universes[2, 8] = reflector['2,8']
 
     universes[3, 0] = reflector['3,0']
-    universes[3, 1] = assembly['Assembly (3.1%)']
-    universes[3, 2] = assembly['Assembly (2.4%)']
-    universes[3, 3] = assembly['Assembly (1.6%)']
-    universes[3, 4] = assembly['Assembly (1.6%)']
-    universes[3, 5] = assembly['Assembly (1.6%)']
-    universes[3, 6] = assembly['Assembly (2.4%)']
-    universes[3, 7] = assembly['Assembly (3.1%)']
     universes[3, 8] = reflector['3,8']
 
     universes[4, 0] = reflector['4,0']
-    universes[4, 1] = assembly['Assembly (3.1%)']
-    universes[4, 2] = assembly['Assembly (1.6%)']
-    universes[4, 3] = assembly['Assembly (1.6%)']
-    universes[4, 4] = assembly['Assembly (2.4%)']
-    universes[4, 5] = assembly['Assembly (1.6%)']
-    universes[4, 6] = assembly['Assembly (1.6%)']
-    universes[4, 7] = assembly['Assembly (3.1%)']
     universes[4, 8] = reflector['4,8']
 
     universes[5, 0] = reflector['5,0']
-    universes[5, 1] = assembly['Assembly (3.1%)']
-    universes[5, 2] = assembly['Assembly (2.4%)']
-    universes[5, 3] = assembly['Assembly (1.6%)']
-    universes[5, 4] = assembly['Assembly (1.6%)']
-    universes[5, 5] = assembly['Assembly (1.6%)']
-    universes[5, 6] = assembly['Assembly (2.4%)']
-    universes[5, 7] = assembly['Assembly (3.1%)']
     universes[5, 8] = reflector['5,8']
 
     universes[6, 0] = reflector['6,0']
     universes[6, 1] = reflector['SW']
-    universes[6, 2] = assembly['Assembly (3.1%)']
-    universes[6, 3] = assembly['Assembly (2.4%)']
-    universes[6, 4] = assembly['Assembly (1.6%)']
-    universes[6, 5] = assembly['Assembly (2.4%)']
-    universes[6, 6] = assembly['Assembly (3.1%)']
     universes[6, 7] = reflector['SE']
     universes[6, 8] = reflector['6,8']
 
     universes[7, 1] = reflector['7,1']
     universes[7, 2] = reflector['SW']
-    universes[7, 3] = assembly['Assembly (3.1%)']
-    universes[7, 4] = assembly['Assembly (3.1%)']
-    universes[7, 5] = assembly['Assembly (3.1%)']
     universes[7, 6] = reflector['SE']
     universes[7, 7] = reflector['7,7']
 
@@ -117,10 +130,13 @@ def core_geometry(ring_radii, num_axial, depleted):
     universes[8, 5] = reflector['8,5']
     universes[8, 6] = reflector['8,6']
 
+    for (i, j), enrichment in assembly_enrichments().items():
+        universes[i, j] = assembly['Assembly ({}%)'.format(enrichment)]
+
     core.universes = universes
 
     root_univ = openmc.Universe(universe_id=0, name='root universe')
-    surfs = surfaces.surfs
+    surfs = get_surfaces(params)
 
     # Cylinder filled with core lattice
     cell = openmc.Cell(name='Main core')
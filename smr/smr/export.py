@@ -0,0 +1,246 @@
+"""Export model input files without holding every object in memory.
+
+Besides the standard materials.xml format, materials can be written in a
+compact format in which each distinct composition appears only once::
+
+    <compact_materials>
+      <composition id="1" name="UO2 Fuel 3.1%" depletable="true">
+        <nuclide name="U235" ao="..." />
+        ...
+      </composition>
+      <material id="12" composition="1" volume="...">
+        <density value="..." units="g/cm3" />
+      </material>
+      <clones composition="1" first="100" count="5000" volume="...">
+        <density value="..." units="g/cm3" />
+      </clones>
+    </compact_materials>
+
+Materials refer to their composition and carry only their per-instance
+overrides (ID, volume, temperature, and density), and a block of clones is
+described by its first ID and the number of clones. OpenMC does not read this
+format, so a compact file has to be converted with :func:`expand_materials`
+before running.
+
+"""
+
+import xml.etree.ElementTree as ET
+
+from .materials import CloneRange
+
+
+_ID_PLACEHOLDER = '__clone_id__'
+
+# Attributes of a material element that may differ between materials sharing
+# a composition
+_OVERRIDE_ATTRIBUTES = ('volume', 'temperature')
+
+
+def _split_on_id(element):
+    """Serialize an element with the text around its ID attribute separated.
+
+    Parameters
+    ----------
+    element : xml.etree.ElementTree.Element
+        Element whose ``id`` attribute is to be substituted
+
+    Returns
+    -------
+    head, tail : str
+        Text preceding and following the ID
+
+    """
+    element.set('id', _ID_PLACEHOLDER)
+    element.tail = '\n'
+    head, tail = ET.tostring(element, encoding='unicode').split(_ID_PLACEHOLDER)
+    return '  ' + head, tail
+
+
+def _clone_template(clones):
+    """Split the XML element for a range of clones around the ID attribute.
+
+    Parameters
+    ----------
+    clones : smr.materials.CloneRange
+        Range of clones sharing a composition
+
+    Returns
+    -------
+    head, tail : str
+        Text preceding and following the ID of each clone
+
+    """
+    element = clones.material.to_xml_element()
+    if clones.volume is not None:
+        element.set('volume', str(clones.volume))
+    return _split_on_id(element)
+
+
+def _write_element(fh, element):
+    element.tail = '\n'
+    fh.write('  ' + ET.tostring(element, encoding='unicode'))
+
+
+def export_materials(materials, path='materials.xml', compact=False):
+    """Write a materials.xml file one material element at a time.
+
+    Ranges of cloned materials are expanded while the file is being written so
+    that only the ID differs from one clone to the next. Memory use is
+    therefore independent of the number of clones.
+
+    Parameters
+    ----------
+    materials : iterable of openmc.Material or smr.materials.CloneRange
+        Materials to write
+    path : str or pathlib.Path
+        Path of file to write
+    compact : bool
+        Whether to write each distinct composition once and refer to it from
+        each material rather than writing a standard materials.xml file. The
+        resulting file has to be converted with :func:`expand_materials`
+        before it can be used by OpenMC.
+
+    """
+    if compact:
+        _export_compact(materials, path)
+        return
+
+    with open(str(path), 'w') as fh:
+        fh.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        fh.write('<materials>\n')
+        for item in materials:
+            if isinstance(item, CloneRange):
+                head, tail = _clone_template(item)
+                for uid in item.ids:
+                    fh.write(head)
+                    fh.write(str(uid))
+                    fh.write(tail)
+            else:
+                _write_element(fh, item.to_xml_element())
+        fh.write('</materials>\n')
+
+
+def _split_composition(element):
+    """Separate a material element into its composition and overrides.
+
+    Parameters
+    ----------
+    element : xml.etree.ElementTree.Element
+        Material element as produced by :meth:`openmc.Material.to_xml_element`
+
+    Returns
+    -------
+    composition : xml.etree.ElementTree.Element
+        Composition element without an ID
+    overrides : xml.etree.ElementTree.Element
+        Element holding the ID, volume, temperature, and density
+
+    """
+    overrides = ET.Element('material')
+    overrides.set('id', element.get('id'))
+    composition = ET.Element('composition')
+    for key, value in element.items():
+        if key in _OVERRIDE_ATTRIBUTES:
+            overrides.set(key, value)
+        elif key != 'id':
+            composition.set(key, value)
+    for child in element:
+        if child.tag == 'density':
+            overrides.append(child)
+        else:
+            composition.append(child)
+    return composition, overrides
+
+
+def _export_compact(materials, path):
+    """Write materials in the compact format described in the module."""
+    compositions = {}
+
+    def composition_id(composition):
+        # Compositions are identified by their serialized form. Clones made
+        # with smr.materials.clone serialize identically, so they are written
+        # once no matter how many there are.
+        key = ET.tostring(composition, encoding='unicode')
+        if key not in compositions:
+            compositions[key] = len(compositions) + 1
+            composition.set('id', str(compositions[key]))
+            composition.tail = '\n'
+            fh.write('  ' + ET.tostring(composition, encoding='unicode'))
+        return compositions[key]
+
+    with open(str(path), 'w') as fh:
+        fh.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        fh.write('<compact_materials>\n')
+        for item in materials:
+            if isinstance(item, CloneRange):
+                composition, overrides = _split_composition(
+                    item.material.to_xml_element())
+                overrides.tag = 'clones'
+                del overrides.attrib['id']
+                overrides.set('first', str(item.first_id))
+                overrides.set('count', str(len(item)))
+                if item.volume is not None:
+                    overrides.set('volume', str(item.volume))
+            else:
+                composition, overrides = _split_composition(
+                    item.to_xml_element())
+            overrides.set('composition', str(composition_id(composition)))
+            _write_element(fh, overrides)
+        fh.write('</compact_materials>\n')
+
+
+def expand_materials(source, path='materials.xml'):
+    """Convert a compact materials file into a standard materials.xml file.
+
+    Parameters
+    ----------
+    source : str or pathlib.Path
+        Compact materials file written by :func:`export_materials`
+    path : str or pathlib.Path
+        Path of materials.xml file to write
+
+    """
+    compositions = {}
+    with open(str(path), 'w') as fh:
+        fh.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        fh.write('<materials>\n')
+
+        # Process elements as they are read; compositions always precede the
+        # materials that refer to them
+        context = ET.iterparse(str(source), events=('start', 'end'))
+        _, root = next(context)
+        if root.tag != 'compact_materials':
+            raise ValueError('{} is not a compact materials file'.format(source))
+        for event, elem in context:
+            if event != 'end' or elem.tag == 'compact_materials':
+                continue
+            if elem.tag == 'composition':
+                compositions[elem.get('id')] = elem
+            elif elem.tag in ('material', 'clones'):
+                composition = compositions[elem.get('composition')]
+                material = ET.Element('material')
+                material.set('id', elem.get('id', ''))
+                for key, value in composition.items():
+                    if key != 'id':
+                        material.set(key, value)
+                for key in _OVERRIDE_ATTRIBUTES:
+                    if key in elem.attrib:
+                        material.set(key, elem.get(key))
+                material.extend(list(elem))
+                material.extend(list(composition))
+
+                if elem.tag == 'material':
+                    _write_element(fh, material)
+                else:
+                    head, tail = _split_on_id(material)
+                    first = int(elem.get('first'))
+                    for uid in range(first, first + int(elem.get('count'))):
+                        fh.write(head)
+                        fh.write(str(uid))
+                        fh.write(tail)
+
+                # Discard the element and anything preceding it since it is no
+                # longer needed
+                root.clear()
+
+        fh.write('</materials>\n')
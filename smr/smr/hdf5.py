@@ -0,0 +1,448 @@
+"""Binary HDF5 representation of a model.
+
+The XML files for a full-core model are several GB in size and slow to write
+and read. This module stores the same information -- surfaces, cells,
+universes, lattices, and materials -- as columns of compressed, chunked HDF5
+datasets instead:
+
+- ``surfaces/``: ID, name, type, boundary condition, and a row of coefficients
+  for each surface
+- ``cells/``: ID, name, universe, fill, region expression, translation, and
+  rotation (three angles or a flattened matrix) for each cell. Cells filled
+  with a list of materials refer to a slice of ``fill_materials`` or, when
+  filled with a :class:`smr.materials.CloneRange`, to a row of
+  ``materials/clones``.
+- ``universes/``: ID and name of each universe
+- ``lattices/``: ID, name, pitch, lower left, outer universe, and shape of each
+  rectangular lattice along with a slice of the flattened universe IDs
+- ``materials/``: each distinct composition once, a row of per-material
+  properties (ID, density, volume, temperature) referring to a composition,
+  and a row for each range of clones
+
+:func:`load_model` reconstructs the geometry and materials from the file and
+:func:`export_xml` writes the usual XML files from it.
+
+"""
+
+from pathlib import Path
+
+import h5py
+import numpy as np
+import openmc
+
+from .export import export_materials
+from .materials import CloneRange
+
+
+# Codes used for the type of fill of each cell
+_VOID, _MATERIAL, _UNIVERSE, _LATTICE, _DISTRIBMAT, _CLONES = range(6)
+
+_COMPRESSION = {'compression': 'gzip', 'shuffle': True}
+
+
+def _write(group, name, data, dtype=None):
+    """Create a dataset, compressing it unless it is empty."""
+    data = np.asarray(data, dtype=dtype)
+    kwargs = _COMPRESSION if data.size > 0 else {}
+    return group.create_dataset(name, data=data, **kwargs)
+
+
+def _write_strings(group, name, values):
+    return _write(group, name, np.array(values, dtype=object),
+                  h5py.string_dtype())
+
+
+def _read_strings(group, name):
+    values = group[name][()]
+    return [v.decode() if isinstance(v, bytes) else v for v in values]
+
+
+def _surface_classes():
+    """Return a mapping of surface type to the class implementing it."""
+    classes = {}
+    stack = [openmc.Surface]
+    while stack:
+        cls = stack.pop()
+        stack.extend(cls.__subclasses__())
+        if '_type' in vars(cls):
+            classes[cls._type] = cls
+    return classes
+
+
+def _composition(material):
+    """Return the part of a material shared by clones as a hashable key."""
+    nuclides = tuple((n[0], n[1], n[2]) for n in material.nuclides)
+    sab = tuple((s[0], s[1]) for s in material._sab)
+    return (material.name or '', bool(material.depletable), nuclides, sab)
+
+
+def _write_surfaces(group, surfaces):
+    num_coeffs = max((len(s._coeff_keys) for s in surfaces), default=0)
+    coeffs = np.full((len(surfaces), num_coeffs), np.nan)
+    for i, surf in enumerate(surfaces):
+        values = [surf.coefficients[k] for k in surf._coeff_keys]
+        coeffs[i, :len(values)] = values
+
+    _write(group, 'id', [s.id for s in surfaces], int)
+    _write_strings(group, 'name', [s.name for s in surfaces])
+    _write_strings(group, 'type', [s.type for s in surfaces])
+    _write_strings(group, 'boundary', [s.boundary_type for s in surfaces])
+    _write(group, 'coefficients', coeffs)
+
+
+def _write_materials(group, materials):
+    compositions = {}
+    mat_rows = []
+    clone_rows = []
+    for item in materials:
+        mat = item.material if isinstance(item, CloneRange) else item
+        key = _composition(mat)
+        index = compositions.setdefault(key, len(compositions))
+        density = np.nan if mat.density is None else mat.density
+        temperature = np.nan if mat.temperature is None else mat.temperature
+        if isinstance(item, CloneRange):
+            volume = np.nan if item.volume is None else item.volume
+            clone_rows.append((item.first_id, len(item), index, density,
+                               mat.density_units, volume, temperature))
+        else:
+            volume = np.nan if mat.volume is None else mat.volume
+            mat_rows.append((mat.id, -1, index, density, mat.density_units,
+                             volume, temperature))
+
+    # Compositions, with their nuclides and S(a,b) tables flattened
+    comp = group.create_group('compositions')
+    keys = list(compositions)
+    _write_strings(comp, 'name', [k[0] for k in keys])
+    _write(comp, 'depletable', [k[1] for k in keys], bool)
+    for i, kind in ((2, 'nuclides'), (3, 'sab')):
+        counts = [len(k[i]) for k in keys]
+        _write(comp, kind + '_offset', np.cumsum([0] + counts[:-1]), int)
+        _write(comp, kind + '_count', counts, int)
+        rows = [row for k in keys for row in k[i]]
+        _write_strings(comp, kind + '_name', [r[0] for r in rows])
+        _write(comp, kind + '_fraction', [r[1] for r in rows], float)
+    _write_strings(comp, 'nuclides_type', [
+        r[2] for k in keys for r in k[2]])
+
+    # Per-material properties; a range of clones is stored as one row with
+    # its first ID and the number of clones
+    for name, rows in (('materials', mat_rows), ('clones', clone_rows)):
+        table = group.create_group(name)
+        columns = list(zip(*rows)) if rows else [()]*7
+        _write(table, 'id' if name == 'materials' else 'first', columns[0], int)
+        if name == 'clones':
+            _write(table, 'count', columns[1], int)
+        _write(table, 'composition', columns[2], int)
+        _write(table, 'density', columns[3], float)
+        _write_strings(table, 'density_units', columns[4])
+        _write(table, 'volume', columns[5], float)
+        _write(table, 'temperature', columns[6], float)
+
+    return {item.first_id: i for i, item in enumerate(
+        m for m in materials if isinstance(m, CloneRange))}
+
+
+def _write_cells(group, universes, clone_index):
+    ids = []
+    names = []
+    univ_ids = []
+    fill_types = []
+    fills = []
+    regions = []
+    offsets = []
+    counts = []
+    fill_materials = []
+    translations = []
+    rotations = []
+    for univ in universes:
+        for cell in univ.cells.values():
+            fill = cell.fill
+            offset = count = 0
+            if isinstance(fill, CloneRange):
+                fill_type, fill_id = _CLONES, clone_index[fill.first_id]
+            elif cell.fill_type == 'distribmat':
+                fill_type, fill_id = _DISTRIBMAT, -1
+                offset, count = len(fill_materials), len(fill)
+                fill_materials.extend(-1 if m is None else m.id for m in fill)
+            elif cell.fill_type == 'material':
+                fill_type, fill_id = _MATERIAL, fill.id
+            elif cell.fill_type == 'universe':
+                fill_type, fill_id = _UNIVERSE, fill.id
+            elif cell.fill_type == 'lattice':
+                fill_type, fill_id = _LATTICE, fill.id
+            else:
+                fill_type, fill_id = _VOID, -1
+
+            ids.append(cell.id)
+            names.append(cell.name)
+            univ_ids.append(univ.id)
+            fill_types.append(fill_type)
+            fills.append(fill_id)
+            offsets.append(offset)
+            counts.append(count)
+            regions.append('' if cell.region is None else str(cell.region))
+
+            # A rotation is given either by three angles or by a matrix; NaN
+            # marks a missing transformation or unused matrix elements
+            translation = np.full(3, np.nan)
+            if cell.translation is not None:
+                translation[:] = cell.translation
+            translations.append(translation)
+            rotation = np.full(9, np.nan)
+            if cell.rotation is not None:
+                values = np.ravel(cell.rotation)
+                rotation[:len(values)] = values
+            rotations.append(rotation)
+
+    _write(group, 'id', ids, int)
+    _write_strings(group, 'name', names)
+    _write(group, 'universe', univ_ids, int)
+    _write(group, 'fill_type', fill_types, np.int8)
+    _write(group, 'fill', fills, int)
+    _write(group, 'fill_offset', offsets, int)
+    _write(group, 'fill_count', counts, int)
+    _write(group, 'fill_materials', fill_materials, int)
+    _write_strings(group, 'region', regions)
+    _write(group, 'translation', np.reshape(translations, (-1, 3)), float)
+    _write(group, 'rotation', np.reshape(rotations, (-1, 9)), float)
+
+
+def _write_lattices(group, lattices):
+    for lat in lattices:
+        if not isinstance(lat, openmc.RectLattice):
+            raise ValueError('Lattice {} is not rectangular, which is not '
+                             'supported.'.format(lat.id))
+
+    shapes = []
+    pitches = np.full((len(lattices), 3), np.nan)
+    lower_lefts = np.full((len(lattices), 3), np.nan)
+    flat = []
+    for i, lat in enumerate(lattices):
+        univ_ids = np.vectorize(lambda u: u.id, otypes=[int])(lat.universes)
+        # 2D lattices are stored with a single axial level
+        shapes.append((1,)*(3 - univ_ids.ndim) + univ_ids.shape)
+        pitches[i, :len(lat.pitch)] = lat.pitch
+        lower_lefts[i, :len(lat.lower_left)] = lat.lower_left
+        flat.append(univ_ids.ravel())
+
+    sizes = [int(np.prod(s)) for s in shapes]
+    _write(group, 'id', [lat.id for lat in lattices], int)
+    _write_strings(group, 'name', [lat.name for lat in lattices])
+    _write(group, 'pitch', pitches)
+    _write(group, 'lower_left', lower_lefts)
+    _write(group, 'outer', [-1 if lat.outer is None else lat.outer.id
+                            for lat in lattices], int)
+    _write(group, 'ndim', [len(lat.pitch) for lat in lattices], np.int8)
+    _write(group, 'shape', np.array(shapes, dtype=int).reshape(-1, 3))
+    _write(group, 'offset', np.cumsum([0] + sizes[:-1]), int)
+    _write(group, 'universes', np.concatenate(flat) if flat else [], int)
+
+
+def export_model(path, geometry, materials):
+    """Write a model to an HDF5 file.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path of HDF5 file to write
+    geometry : openmc.Geometry
+        Geometry of the model
+    materials : iterable of openmc.Material or smr.materials.CloneRange
+        Materials used in the geometry. As with
+        :func:`smr.export.export_materials`, clones in a CloneRange are not
+        instantiated.
+
+    """
+    materials = list(materials)
+    universes = list(geometry.get_all_universes().values())
+    lattices = list(geometry.get_all_lattices().values())
+
+    # Collect surfaces from cell regions directly rather than through the
+    # geometry so that nothing needs to be done for each clone
+    surfaces = {}
+    for univ in universes:
+        for cell in univ.cells.values():
+            if cell.region is not None:
+                surfaces.update(cell.region.get_surfaces())
+
+    with h5py.File(str(path), 'w') as fh:
+        fh.attrs['filetype'] = 'smr model'
+        fh.attrs['root_universe'] = geometry.root_universe.id
+
+        _write_surfaces(fh.create_group('surfaces'), list(surfaces.values()))
+        clone_index = _write_materials(fh.create_group('materials'),
+                                       materials)
+
+        group = fh.create_group('universes')
+        _write(group, 'id', [u.id for u in universes], int)
+        _write_strings(group, 'name', [u.name for u in universes])
+
+        _write_cells(fh.create_group('cells'), universes, clone_index)
+        _write_lattices(fh.create_group('lattices'), lattices)
+
+
+def _load_materials(group):
+    comp = group['compositions']
+    names = _read_strings(comp, 'name')
+    depletable = comp['depletable'][()]
+    nuc_names = _read_strings(comp, 'nuclides_name')
+    nuc_fractions = comp['nuclides_fraction'][()]
+    nuc_types = _read_strings(comp, 'nuclides_type')
+    sab_names = _read_strings(comp, 'sab_name')
+    sab_fractions = comp['sab_fraction'][()]
+
+    def make_material(index, material_id, density, units, volume, temperature):
+        mat = openmc.Material(material_id, names[index] or None,
+                              None if np.isnan(temperature) else temperature)
+        mat.depletable = bool(depletable[index])
+        start = comp['nuclides_offset'][index]
+        for j in range(start, start + comp['nuclides_count'][index]):
+            mat.add_nuclide(nuc_names[j], nuc_fractions[j], nuc_types[j])
+        start = comp['sab_offset'][index]
+        for j in range(start, start + comp['sab_count'][index]):
+            mat.add_s_alpha_beta(sab_names[j], sab_fractions[j])
+        if units == 'sum':
+            mat.set_density('sum')
+        else:
+            mat.set_density(units, density)
+        if not np.isnan(volume):
+            mat.volume = volume
+        return mat
+
+    def rows(table, first):
+        return zip(table[first][()], table['composition'][()],
+                   table['density'][()], _read_strings(table, 'density_units'),
+                   table['volume'][()], table['temperature'][()])
+
+    materials = {}
+    for uid, index, density, units, volume, temp in rows(
+            group['materials'], 'id'):
+        materials[uid] = make_material(index, uid, density, units, volume,
+                                       temp)
+
+    # Make sure that the templates for each range of clones don't take IDs
+    # belonging to clones
+    table = group['clones']
+    counts = table['count'][()]
+    ends = table['first'][()] + counts
+    openmc.Material.next_id = max(openmc.Material.next_id,
+                                  max(ends, default=0))
+
+    clones = []
+    for (first, index, density, units, volume, temp), count in zip(
+            rows(table, 'first'), counts):
+        template = make_material(index, None, density, units, volume, temp)
+        clones.append(CloneRange(template, int(count), int(first)))
+
+    return materials, clones
+
+
+def load_model(path):
+    """Reconstruct a model from an HDF5 file written by :func:`export_model`.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        HDF5 file to read
+
+    Returns
+    -------
+    geometry : openmc.Geometry
+        Geometry of the model
+    materials : list of openmc.Material or smr.materials.CloneRange
+        Materials used in the geometry
+
+    """
+    with h5py.File(str(path), 'r') as fh:
+        # Surfaces
+        group = fh['surfaces']
+        classes = _surface_classes()
+        surfaces = {}
+        for uid, name, kind, boundary, coeffs in zip(
+                group['id'][()], _read_strings(group, 'name'),
+                _read_strings(group, 'type'), _read_strings(group, 'boundary'),
+                group['coefficients'][()]):
+            cls = classes[kind]
+            kwargs = dict(zip(cls._coeff_keys, coeffs))
+            surfaces[uid] = cls(surface_id=uid, boundary_type=boundary,
+                                name=name, **kwargs)
+
+        materials, clones = _load_materials(fh['materials'])
+
+        # Universes are created empty so that lattices can refer to them
+        group = fh['universes']
+        universes = {uid: openmc.Universe(uid, name) for uid, name in zip(
+            group['id'][()], _read_strings(group, 'name'))}
+
+        group = fh['lattices']
+        lattices = {}
+        flat = group['universes'][()]
+        for uid, name, pitch, lower_left, outer, ndim, shape, offset in zip(
+                group['id'][()], _read_strings(group, 'name'),
+                group['pitch'][()], group['lower_left'][()],
+                group['outer'][()], group['ndim'][()], group['shape'][()],
+                group['offset'][()]):
+            lat = openmc.RectLattice(uid, name)
+            lat.pitch = pitch[:ndim]
+            lat.lower_left = lower_left[:ndim]
+            if outer >= 0:
+                lat.outer = universes[outer]
+            ids = flat[offset:offset + np.prod(shape)]
+            shape = tuple(shape[3 - ndim:])
+            lat.universes = np.array([universes[i] for i in ids],
+                                     dtype=object).reshape(shape)
+            lattices[uid] = lat
+
+        # Cells
+        group = fh['cells']
+        fill_materials = group['fill_materials'][()]
+        for (uid, name, univ_id, fill_type, fill, offset, count, region,
+             translation, rotation) in zip(
+                group['id'][()], _read_strings(group, 'name'),
+                group['universe'][()], group['fill_type'][()],
+                group['fill'][()], group['fill_offset'][()],
+                group['fill_count'][()], _read_strings(group, 'region'),
+                group['translation'][()], group['rotation'][()]):
+            cell = openmc.Cell(uid, name)
+            if region:
+                cell.region = openmc.Region.from_expression(region, surfaces)
+            if fill_type == _MATERIAL:
+                cell.fill = materials[fill]
+            elif fill_type == _UNIVERSE:
+                cell.fill = universes[fill]
+            elif fill_type == _LATTICE:
+                cell.fill = lattices[fill]
+            elif fill_type == _DISTRIBMAT:
+                cell.fill = [None if i < 0 else materials[i] for i in
+                             fill_materials[offset:offset + count]]
+            elif fill_type == _CLONES:
+                cell.fill = clones[fill]
+            if not np.isnan(translation).all():
+                cell.translation = translation
+            rotation = rotation[~np.isnan(rotation)]
+            if len(rotation) == 9:
+                cell.rotation = rotation.reshape(3, 3)
+            elif len(rotation) > 0:
+                cell.rotation = rotation
+            universes[univ_id].add_cell(cell)
+
+        root = universes[fh.attrs['root_universe']]
+
+    return openmc.Geometry(root), list(materials.values()) + clones
+
+
+def export_xml(path, directory='.'):
+    """Write geometry.xml and materials.xml from an HDF5 model file.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        HDF5 file written by :func:`export_model`
+    directory : str or pathlib.Path
+        Directory in which to write the XML files
+
+    """
+    directory = Path(directory)
+    geometry, materials = load_model(path)
+    geometry.export_to_xml(str(directory / 'geometry.xml'))
+    export_materials(materials, directory / 'materials.xml')
@@ -0,0 +1,133 @@
+"""Count cell and universe instances from the lattice structure of a model.
+
+:meth:`openmc.Geometry.determine_paths` enumerates every path through the
+geometry in order to count instances, which is slow for a full core. Since the
+number of instances of a universe is simply the number of instances of each
+parent multiplied by the number of times the universe appears in that parent,
+the counts can instead be propagated down the universe hierarchy once.
+
+"""
+
+from collections import Counter
+
+import numpy as np
+import openmc
+
+
+def _lattice_universes(lattice):
+    """Return every universe position in a lattice as a flat list."""
+    if isinstance(lattice, openmc.RectLattice):
+        return list(np.asarray(lattice.universes).flat)
+
+    # Hexagonal lattices store universes as nested lists of rings
+    flat = []
+    stack = [lattice.universes]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, openmc.Universe):
+            flat.append(item)
+        else:
+            stack.extend(item)
+    return flat
+
+
+def _root(geometry):
+    if isinstance(geometry, openmc.Geometry):
+        return geometry.root_universe
+    return geometry
+
+
+def _count_universes(root):
+    """Return universe instance counts along with the universes themselves."""
+    # Determine the children of each universe, counting each child as many
+    # times as it appears within the parent
+    universes = {}
+    children = {}
+    lattice_counts = {}
+    postorder = []
+
+    def visit(univ):
+        universes[univ.id] = univ
+        counts = Counter()
+        child_univs = {}
+        for cell in univ.cells.values():
+            if cell.fill_type == 'universe':
+                counts[cell.fill.id] += 1
+                child_univs[cell.fill.id] = cell.fill
+            elif cell.fill_type == 'lattice':
+                lattice = cell.fill
+                if lattice.id not in lattice_counts:
+                    positions = _lattice_universes(lattice)
+                    lattice_counts[lattice.id] = (
+                        Counter(u.id for u in positions),
+                        {u.id: u for u in positions}
+                    )
+                lat_counts, lat_univs = lattice_counts[lattice.id]
+                counts.update(lat_counts)
+                child_univs.update(lat_univs)
+        children[univ.id] = counts
+
+        for uid, child in child_univs.items():
+            if uid not in children:
+                visit(child)
+        postorder.append(univ.id)
+
+    visit(root)
+
+    # Reverse post-order visits each parent before any of its children
+    instances = dict.fromkeys(children, 0)
+    instances[root.id] = 1
+    for uid in reversed(postorder):
+        n = instances[uid]
+        for child_id, multiplicity in children[uid].items():
+            instances[child_id] += n * multiplicity
+
+    return instances, universes
+
+
+def universe_instances(geometry):
+    """Determine the number of instances of each universe.
+
+    Universes used only as the outer universe of a lattice are not counted,
+    consistent with how OpenMC numbers distributed cell instances.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to count instances in
+
+    Returns
+    -------
+    dict
+        Dictionary mapping universe ID to the number of instances
+
+    """
+    instances, _ = _count_universes(_root(geometry))
+    return instances
+
+
+def cell_instances(geometry):
+    """Determine the number of instances of each cell.
+
+    This gives the same numbers as :attr:`openmc.Cell.num_instances` after
+    calling :meth:`openmc.Geometry.determine_paths` with
+    ``instances_only=True``, without enumerating paths.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to count instances in
+
+    Returns
+    -------
+    dict
+        Dictionary mapping cell ID to the number of instances
+
+    """
+    univ_instances, universes = _count_universes(_root(geometry))
+
+    instances = {}
+    for uid, n in univ_instances.items():
+        for cell in universes[uid].cells.values():
+            instances[cell.id] = n
+    return instances
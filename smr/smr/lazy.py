@@ -0,0 +1,54 @@
+"""Deferred construction of the module-level model objects."""
+
+from collections.abc import MutableMapping
+
+
+class LazyDict(MutableMapping):
+    """Dictionary whose contents are created on first access.
+
+    Modules can hand out a LazyDict in place of a dictionary of OpenMC objects
+    so that importing them (e.g., ``from smr.surfaces import surfs``) does not
+    create any objects. The factory is called the first time the contents are
+    needed.
+
+    Parameters
+    ----------
+    factory : callable
+        Function with no arguments returning a dict
+
+    """
+    def __init__(self, factory):
+        self._factory = factory
+        self._data = None
+
+    @property
+    def loaded(self):
+        """Whether the contents have been created"""
+        return self._data is not None
+
+    @property
+    def data(self):
+        """Underlying dictionary, created on first access"""
+        if self._data is None:
+            self._data = self._factory()
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        if self._data is None:
+            return '<{} (not yet created)>'.format(type(self).__name__)
+        return repr(self._data)
@@ -0,0 +1,621 @@
+"""Find the cells and materials containing points without running OpenMC.
+
+OpenMC finds the cell containing a point by testing the cells of each universe
+in turn, descending through lattices and universe fills. :class:`PointLocator`
+does the same for a whole array of points at once with NumPy, and exploits the
+structure of the SMR model along the way:
+
+- Lattices (the 9x9 core, the 17x17 assemblies, and z-lattices of axial
+  segments) are indexed directly, and points are then grouped by the universe
+  of their lattice element.
+- Universes whose cells are bounded only by z-planes and by z-cylinders about
+  a common axis -- axial stacks, pins, and subdivided fuel -- are turned into
+  a table of the cell in each combination of axial layer and annulus, so the
+  cell containing a point is found by two binary searches.
+- The cells of other universes are tested in order on all remaining points.
+
+Given a direction for each point, :meth:`PointLocator.distance` also finds the
+distance to the nearest surface bounding the cell at any level, or lattice
+element boundary, which is what a ray tracer needs to move from one cell to
+the next.
+
+:meth:`PointLocator.check` instead tests every cell of each universe a point
+reaches, to find where cells overlap or where a point is in no cell at all.
+
+Points on a surface are taken to be on its negative side. Distributed cell
+instances are numbered as in OpenMC so that cells filled with a list of
+materials (including a :class:`smr.materials.CloneRange`) give the material of
+each instance.
+
+"""
+
+import numpy as np
+import openmc
+
+from .materials import CloneRange
+from .optimize import _ordered_cells
+
+
+def _evaluate(surface, xyz):
+    """Evaluate the equation of a surface at each point."""
+    x, y, z = xyz.T
+    c = surface.coefficients
+    if surface.type == 'x-plane':
+        return x - c['x0']
+    elif surface.type == 'y-plane':
+        return y - c['y0']
+    elif surface.type == 'z-plane':
+        return z - c['z0']
+    elif surface.type == 'plane':
+        return c['a']*x + c['b']*y + c['c']*z - c['d']
+    elif surface.type == 'z-cylinder':
+        return (x - c['x0'])**2 + (y - c['y0'])**2 - c['r']**2
+    raise ValueError('Surfaces of type "{}" are not supported'.format(
+        surface.type))
+
+
+def _distance(surface, xyz, uvw):
+    """Return the distance along each direction to a surface.
+
+    Distances to surfaces that are not crossed are infinite.
+
+    """
+    f = _evaluate(surface, xyz)
+    u, v, w = uvw.T
+    c = surface.coefficients
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if surface.type == 'z-cylinder':
+            x = xyz[:, 0] - c['x0']
+            y = xyz[:, 1] - c['y0']
+            a = u**2 + v**2
+            k = x*u + y*v
+            disc = k**2 - a*f
+            root = np.sqrt(np.maximum(disc, 0.))
+            # Leave through the far side from inside; from outside, only
+            # reach the cylinder when moving toward it
+            distance = np.where(f <= 0., (root - k)/a, -(k + root)/a)
+            distance[(f > 0.) & ((k >= 0.) | (disc < 0.))] = np.inf
+        else:
+            if surface.type == 'x-plane':
+                rate = u
+            elif surface.type == 'y-plane':
+                rate = v
+            elif surface.type == 'z-plane':
+                rate = w
+            else:
+                rate = c['a']*u + c['b']*v + c['c']*w
+            distance = -f/rate
+    distance[~(distance > 0.)] = np.inf
+    return distance
+
+
+def _contains(region, xyz):
+    """Return whether each point is within a region."""
+    if region is None:
+        return np.ones(len(xyz), dtype=bool)
+    if isinstance(region, openmc.Halfspace):
+        positive = _evaluate(region.surface, xyz) > 0.
+        return positive if region.side == '+' else ~positive
+    if isinstance(region, openmc.Complement):
+        return ~_contains(region.node, xyz)
+    if isinstance(region, openmc.Intersection):
+        mask = np.ones(len(xyz), dtype=bool)
+        for node in region:
+            mask[mask] = _contains(node, xyz[mask])
+        return mask
+    if isinstance(region, openmc.Union):
+        mask = np.zeros(len(xyz), dtype=bool)
+        for node in region:
+            mask[~mask] = _contains(node, xyz[~mask])
+        return mask
+    raise ValueError('Unknown region type {}'.format(type(region).__name__))
+
+
+def _halfspaces(region):
+    """Return the half-spaces of a region if it is a plain intersection."""
+    if region is None:
+        return []
+    if isinstance(region, openmc.Halfspace):
+        return [region]
+    if isinstance(region, openmc.Intersection):
+        halfspaces = []
+        for node in region:
+            nodes = _halfspaces(node)
+            if nodes is None:
+                return None
+            halfspaces.extend(nodes)
+        return halfspaces
+    return None
+
+
+def _axial_radial_table(univ):
+    """Return a table of the cells of a universe by axial layer and annulus.
+
+    Returns None unless every cell is bounded only by z-planes and by
+    z-cylinders about a common axis. Otherwise, returns the z positions of the
+    planes, the squared radii of the cylinders, the (x, y) position of the
+    axis, the index of the first cell containing each layer and annulus (-1
+    if none does), and the number of cells containing each, with layer k
+    between the (k-1)-th and k-th position.
+
+    """
+    intervals = []
+    axis = None
+    for cell in _ordered_cells(univ):
+        halfspaces = _halfspaces(cell.region)
+        if halfspaces is None:
+            return None
+        z = [-np.inf, np.inf]
+        r2 = [-np.inf, np.inf]
+        for halfspace in halfspaces:
+            surface = halfspace.surface
+            if surface.type == 'z-plane':
+                bounds, value = z, surface.z0
+            elif surface.type == 'z-cylinder':
+                if axis is None:
+                    axis = (surface.x0, surface.y0)
+                elif axis != (surface.x0, surface.y0):
+                    return None
+                bounds, value = r2, surface.r**2
+            else:
+                return None
+            if halfspace.side == '+':
+                bounds[0] = max(bounds[0], value)
+            else:
+                bounds[1] = min(bounds[1], value)
+        intervals.append((z, r2))
+
+    z_bounds = np.unique([v for z, _ in intervals for v in z
+                          if np.isfinite(v)])
+    r2_bounds = np.unique([v for _, r2 in intervals for v in r2
+                           if np.isfinite(v)])
+    z_edges = np.concatenate(([-np.inf], z_bounds, [np.inf]))
+    r2_edges = np.concatenate(([-np.inf], r2_bounds, [np.inf]))
+
+    # Fill the table from the last cell to the first so that earlier cells
+    # take precedence, as they do when cells are tested in order
+    table = np.full((len(z_edges) - 1, len(r2_edges) - 1), -1, dtype=int)
+    counts = np.zeros_like(table)
+    for i, (z, r2) in reversed(list(enumerate(intervals))):
+        layers = (z_edges[:-1] >= z[0]) & (z_edges[1:] <= z[1])
+        annuli = (r2_edges[:-1] >= r2[0]) & (r2_edges[1:] <= r2[1])
+        table[np.ix_(layers, annuli)] = i
+        counts[np.ix_(layers, annuli)] += 1
+    return z_bounds, r2_bounds, axis or (0., 0.), table, counts
+
+
+def _transform(cell, xyz, uvw=None):
+    """Return the coordinates of points in the universe filling a cell.
+
+    If directions are given, they are rotated along with the points.
+
+    """
+    if cell.translation is not None:
+        xyz = xyz - np.asarray(cell.translation)
+    if cell.rotation is not None:
+        matrix = np.asarray(cell.rotation_matrix)
+        xyz = xyz @ matrix.T
+        if uvw is not None:
+            uvw = uvw @ matrix.T
+    return xyz, uvw
+
+
+class _Lattice:
+    """Rectangular lattice prepared for indexing points.
+
+    Elements are numbered as in OpenMC, with x varying fastest and rows
+    counted upward from the bottom.
+
+    """
+    def __init__(self, lattice):
+        if not isinstance(lattice, openmc.RectLattice):
+            raise ValueError('Lattice {} is not rectangular, which is not '
+                             'supported'.format(lattice.id))
+        array = np.asarray(lattice.universes)
+        if array.ndim == 2:
+            array = array[np.newaxis]
+        # Rows are given from the top down
+        array = array[:, ::-1, :]
+        self.lattice = lattice
+        self.ndim = len(lattice.pitch)
+        self.shape = array.shape[::-1]
+        self.lower_left = np.asarray(lattice.lower_left, dtype=float)
+        self.pitch = np.asarray(lattice.pitch, dtype=float)
+        self.universes = list(array.flat)
+        ids = {}
+        self.distinct = []
+        for univ in self.universes:
+            if univ.id not in ids:
+                ids[univ.id] = len(self.distinct)
+                self.distinct.append(univ)
+        self.codes = np.array([ids[u.id] for u in self.universes])
+        self.outer = lattice.outer
+
+    def index(self, xyz):
+        """Return the element containing each point and the local coordinates.
+
+        Points outside the lattice have element -1. As in OpenMC, their
+        local coordinates are relative to the center of the element they
+        would be in if the lattice were extended.
+
+        """
+        n = self.ndim
+        ijk = np.floor((xyz[:, :n] - self.lower_left)/self.pitch).astype(int)
+        local = xyz.copy()
+        local[:, :n] -= self.lower_left + (ijk + 0.5)*self.pitch
+        shape = np.array(self.shape[:n])
+        valid = np.all((ijk >= 0) & (ijk < shape), axis=1)
+        element = np.full(len(xyz), -1)
+        ijk = ijk[valid]
+        flat = ijk[:, 0] + self.shape[0]*ijk[:, 1]
+        if n == 3:
+            flat += self.shape[0]*self.shape[1]*ijk[:, 2]
+        element[valid] = flat
+        return element, local
+
+    def distance(self, local, uvw):
+        """Return the distance along each direction to the element boundary.
+
+        Parameters
+        ----------
+        local : numpy.ndarray
+            Local coordinates of points within elements
+        uvw : numpy.ndarray
+            Direction of each point
+
+        """
+        n = self.ndim
+        with np.errstate(divide='ignore', invalid='ignore'):
+            edge = np.where(uvw[:, :n] > 0., 0.5, -0.5)*self.pitch
+            distance = (edge - local[:, :n])/uvw[:, :n]
+        distance[~(distance >= 0.)] = np.inf
+        return distance.min(axis=1)
+
+
+class PointLocator:
+    """Find the cells and materials containing arrays of points.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe, e.g. from :func:`smr.core.core_geometry`
+
+    """
+    def __init__(self, geometry):
+        if isinstance(geometry, openmc.Geometry):
+            geometry = geometry.root_universe
+        self.root = geometry
+        self._tables = {}
+        self._lattices = {}
+        self._counts = {}
+        self._offsets = {}
+        self._materials = {}
+        self._universes = {}
+        self._cell_surfaces = {}
+        self._problems = None
+
+    def locate(self, xyz, instances=False):
+        """Find the cell and material containing each point.
+
+        Parameters
+        ----------
+        xyz : numpy.ndarray
+            Array of shape (N, 3) of points in [cm]
+        instances : bool
+            Whether to also return the distributed cell instance of each cell
+
+        Returns
+        -------
+        cells : numpy.ndarray of int
+            ID of the cell containing each point, or -1 if no cell does
+        materials : numpy.ndarray of int
+            ID of the material at each point, or -1 for void and points not
+            in any cell
+        instances : numpy.ndarray of int
+            Instance of the cell containing each point, or -1 if no cell
+            does. Only returned if `instances` is True.
+
+        """
+        result = self._search(xyz, None, instances)
+        return result[:2] + result[3:]
+
+    def distance(self, xyz, uvw):
+        """Find the cell containing each point and the distance to leave it.
+
+        The distance is to the nearest surface bounding the cell containing
+        the point at any level of the geometry or, within a lattice, to the
+        boundary of the lattice element, as OpenMC computes it when tracking
+        a particle.
+
+        Parameters
+        ----------
+        xyz : numpy.ndarray
+            Array of shape (N, 3) of points in [cm]
+        uvw : numpy.ndarray
+            Array of shape (N, 3) of unit direction vectors
+
+        Returns
+        -------
+        cells : numpy.ndarray of int
+            ID of the cell containing each point, or -1 if no cell does
+        materials : numpy.ndarray of int
+            ID of the material at each point, or -1 for void and points not
+            in any cell
+        distances : numpy.ndarray of float
+            Distance in [cm] along each direction to the boundary of the
+            cell, which is infinite if no boundary is crossed
+
+        """
+        uvw = np.asarray(uvw, dtype=float).reshape(-1, 3)
+        return self._search(xyz, uvw, False)
+
+    def check(self, xyz):
+        """Find points in more than one cell or in no cell of a universe.
+
+        Every cell of each universe reached by a point is tested, and the
+        point then descends into the first cell containing it as usual.
+        Points outside the root universe are outside the model and are not
+        reported.
+
+        Parameters
+        ----------
+        xyz : numpy.ndarray
+            Array of shape (N, 3) of points in [cm]
+
+        Returns
+        -------
+        dict
+            Indices of the points with each problem, keyed by a tuple of the
+            kind of problem ('overlap' or 'undefined'), a description of the
+            universe or lattice, and the IDs of the overlapping cells
+
+        """
+        self._problems = {}
+        try:
+            self._search(xyz, None, False)
+            problems = {key: np.concatenate(indices)
+                        for key, indices in self._problems.items()}
+        finally:
+            self._problems = None
+        return problems
+
+    def _record(self, kind, container, cells, idx):
+        if isinstance(container, openmc.Universe):
+            description = 'universe {}'.format(container.id)
+        else:
+            description = 'lattice {}'.format(container.id)
+        if container.name:
+            description += ' ({})'.format(container.name)
+        key = (kind, description, cells)
+        self._problems.setdefault(key, []).append(idx)
+
+    def _check(self, univ, cells, xyz, idx, counts, masks=None):
+        """Record points in no cell or in several cells of a universe."""
+        if univ is not self.root:
+            missing = counts == 0
+            if missing.any():
+                self._record('undefined', univ, (), idx[missing])
+
+        over = np.flatnonzero(counts > 1)
+        if over.size == 0:
+            return
+        if masks is None:
+            masks = np.array([_contains(c.region, xyz[over]) for c in cells])
+        else:
+            masks = masks[:, over]
+
+        # Group points by the set of cells containing them
+        patterns, inverse = np.unique(masks.T, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        for k, pattern in enumerate(patterns):
+            ids = tuple(cells[i].id for i in np.flatnonzero(pattern))
+            self._record('overlap', univ, ids, idx[over[inverse == k]])
+
+    def _search(self, xyz, uvw, instances):
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        n = len(xyz)
+        self._cells = np.full(n, -1)
+        self._mats = np.full(n, -1)
+        self._instances = np.full(n, -1) if instances else None
+        self._distances = None if uvw is None else np.full(n, np.inf)
+        self._find(self.root, xyz, uvw, np.arange(n), [])
+        result = (self._cells, self._mats, self._distances)
+        if instances:
+            result += (self._instances,)
+        del self._cells, self._mats, self._instances, self._distances
+        return result
+
+    def _surfaces(self, cell):
+        if cell.id not in self._cell_surfaces:
+            if cell.region is None:
+                surfaces = []
+            else:
+                surfaces = list(cell.region.get_surfaces().values())
+            self._cell_surfaces[cell.id] = surfaces
+        return self._cell_surfaces[cell.id]
+
+    def _table(self, univ):
+        if univ.id not in self._tables:
+            self._tables[univ.id] = _axial_radial_table(univ)
+        return self._tables[univ.id]
+
+    def _lattice(self, lattice):
+        if lattice.id not in self._lattices:
+            self._lattices[lattice.id] = _Lattice(lattice)
+        return self._lattices[lattice.id]
+
+    def _find(self, univ, xyz, uvw, idx, path):
+        """Find the cells containing points within a universe.
+
+        `uvw` gives the direction of each point if distances are needed and
+        is None otherwise. `idx` gives the position of each point in the
+        arrays being filled, and each entry of `path` identifies a universe or
+        lattice containing the points along with the cell or element each
+        point is in there.
+
+        """
+        if len(idx) == 0:
+            return
+        self._universes[univ.id] = univ
+        cells = _ordered_cells(univ)
+        table = self._table(univ)
+        if table is not None:
+            z_bounds, r2_bounds, (x0, y0), table, counts = table
+            r2 = (xyz[:, 0] - x0)**2 + (xyz[:, 1] - y0)**2
+            bins = (np.searchsorted(z_bounds, xyz[:, 2]),
+                    np.searchsorted(r2_bounds, r2))
+            which = table[bins]
+            if self._problems is not None:
+                self._check(univ, cells, xyz, idx, counts[bins])
+        elif self._problems is not None:
+            masks = np.array([_contains(c.region, xyz) for c in cells])
+            masks = masks.reshape(len(cells), len(xyz))
+            self._check(univ, cells, xyz, idx, masks.sum(axis=0), masks)
+            which = np.where(masks.any(axis=0), masks.argmax(axis=0), -1)
+        else:
+            which = None
+
+        if which is not None:
+            order = np.argsort(which, kind='stable')
+            groups = np.split(order, np.flatnonzero(np.diff(which[order])) + 1)
+            for group in groups:
+                i = which[group[0]]
+                if i >= 0:
+                    self._fill(univ, i, cells[i], xyz[group],
+                               None if uvw is None else uvw[group], idx[group],
+                               [(key, pos[group]) for key, pos in path])
+            return
+
+        remaining = np.arange(len(xyz))
+        for i, cell in enumerate(cells):
+            if remaining.size == 0:
+                break
+            mask = _contains(cell.region, xyz[remaining])
+            found = remaining[mask]
+            remaining = remaining[~mask]
+            if found.size > 0:
+                self._fill(univ, i, cell, xyz[found],
+                           None if uvw is None else uvw[found], idx[found],
+                           [(key, pos[found]) for key, pos in path])
+
+    def _fill(self, univ, i, cell, xyz, uvw, idx, path):
+        """Descend into the fill of a cell containing points."""
+        if uvw is not None:
+            distances = self._distances[idx]
+            for surface in self._surfaces(cell):
+                np.minimum(distances, _distance(surface, xyz, uvw),
+                           out=distances)
+            self._distances[idx] = distances
+
+        path = path + [(('universe', univ.id), np.full(len(idx), i))]
+        fill_type = cell.fill_type
+        if fill_type == 'universe':
+            xyz, uvw = _transform(cell, xyz, uvw)
+            self._find(cell.fill, xyz, uvw, idx, path)
+        elif fill_type == 'lattice':
+            lattice = self._lattice(cell.fill)
+            xyz, uvw = _transform(cell, xyz, uvw)
+            element, local = lattice.index(xyz)
+            outer = element < 0
+            if outer.any():
+                # OpenMC does not count instances within a lattice's outer
+                # universe from the cell containing the lattice
+                path[-1][1][outer] = -1
+            if uvw is not None:
+                inside = ~outer
+                self._distances[idx[inside]] = np.minimum(
+                    self._distances[idx[inside]],
+                    lattice.distance(local[inside], uvw[inside]))
+            key = ('lattice', lattice.lattice.id)
+            codes = np.where(outer, len(lattice.distinct),
+                             lattice.codes[element])
+            order = np.argsort(codes, kind='stable')
+            groups = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+            for group in groups:
+                code = codes[group[0]]
+                if code < len(lattice.distinct):
+                    child = lattice.distinct[code]
+                elif lattice.outer is not None:
+                    child = lattice.outer
+                else:
+                    if self._problems is not None:
+                        self._record('undefined', lattice.lattice, (),
+                                     idx[group])
+                    continue
+                self._find(child, local[group],
+                           None if uvw is None else uvw[group], idx[group],
+                           [(k, pos[group]) for k, pos in path] +
+                           [(key, element[group])])
+        else:
+            self._cells[idx] = cell.id
+            instances = None
+            if fill_type == 'distribmat' or self._instances is not None:
+                instances = self._instance(univ, path)
+            if self._instances is not None:
+                self._instances[idx] = instances
+            if fill_type == 'material':
+                self._mats[idx] = cell.fill.id
+            elif fill_type == 'distribmat':
+                self._mats[idx] = self._material_ids(cell)[instances]
+
+    def _material_ids(self, cell):
+        """Return the ID of the material of each instance of a cell."""
+        if cell.id not in self._materials:
+            fill = cell.fill
+            if isinstance(fill, CloneRange):
+                ids = np.arange(fill.first_id, fill.first_id + len(fill))
+            else:
+                ids = np.array([-1 if m is None else m.id for m in fill])
+            self._materials[cell.id] = ids
+        return self._materials[cell.id]
+
+    def _count(self, obj, target):
+        """Return the number of instances of a universe within another."""
+        key = (obj.id, target.id)
+        if key not in self._counts:
+            if obj is target:
+                count = 1
+            else:
+                count = sum(self._cell_count(c, target)
+                            for c in obj.cells.values())
+            self._counts[key] = count
+        return self._counts[key]
+
+    def _cell_count(self, cell, target):
+        """Return the number of instances of a universe within a cell."""
+        if cell.fill_type == 'universe':
+            return self._count(cell.fill, target)
+        elif cell.fill_type == 'lattice':
+            lattice = self._lattice(cell.fill)
+            counts = [self._count(u, target) for u in lattice.distinct]
+            return int(np.sum(np.take(counts, lattice.codes)))
+        return 0
+
+    def _offsets_of(self, key, target):
+        """Return the distributed cell offsets of a universe or lattice.
+
+        The offset of a cell or lattice element is the number of instances of
+        the target universe in the cells or elements preceding it. A final
+        zero is appended for points without an offset.
+
+        """
+        if (key, target.id) not in self._offsets:
+            kind, uid = key
+            if kind == 'universe':
+                univ = self._universes[uid]
+                counts = [self._cell_count(c, target)
+                          for c in _ordered_cells(univ)]
+            else:
+                lattice = self._lattices[uid]
+                counts = np.take([self._count(u, target)
+                                  for u in lattice.distinct], lattice.codes)
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1], [0]))
+            self._offsets[key, target.id] = offsets
+        return self._offsets[key, target.id]
+
+    def _instance(self, univ, path):
+        """Return the instance of a universe along the path to each point."""
+        instance = 0
+        for key, pos in path:
+            instance = instance + self._offsets_of(key, univ)[pos]
+        return instance
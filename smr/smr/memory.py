@@ -0,0 +1,298 @@
+"""Estimate the memory an OpenMC run of a model needs without building it.
+
+Every MPI rank of an OpenMC run holds a full copy of the geometry, materials,
+cross sections, and tallies, so a model that does not fit on one rank fails
+during initialization no matter how many ranks are used. For the fuel
+subdivisions used by the build scripts, nearly all of that memory scales with
+the number of fuel regions, which is known from the build options alone: each
+of the 264 fuel pins of an assembly has ``rings*axial`` regions, and the core
+layout gives the number of assemblies of each enrichment. :func:`estimate_memory`
+combines these counts with the nuclides of each material to estimate the
+memory of each part of a run.
+
+The per-object costs below are rough figures for OpenMC's data structures and
+are meant to tell whether a model is within a factor of two of the budget, not
+to predict the exact peak.
+
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .assemblies import _NONFUEL_Y
+from .core import assembly_enrichments
+from .materials import mats
+from .pins import _fuel_stack_surfaces, _lattice_elements, _stack_surfaces, \
+    _within_fuel_surfaces
+from .surfaces import DEFAULT_PARAMETERS, get_surfaces
+
+# Fuel pins in an assembly
+FUEL_PINS = 17*17 - len(_NONFUEL_Y)
+
+# Executable, MPI buffers, and small global arrays
+BASE_MEMORY = 250e6
+
+# Continuous-energy cross sections of a nuclide at a single temperature
+XS_MEMORY_PER_NUCLIDE = 25e6
+
+# Material object, and the index and atom density of each of its nuclides
+MATERIAL_MEMORY = 400
+MATERIAL_NUCLIDE_MEMORY = 12
+
+# Each material has an index from every nuclide in the problem to its position
+# in the material
+NUCLIDE_INDEX_MEMORY = 4
+
+# Cell object, including its region, and cells other than fuel in a model
+CELL_MEMORY = 500
+OTHER_CELLS = {'core': 3000, 'assembly': 1500}
+
+# Material index of each instance of a cell filled with a list of materials
+INSTANCE_MEMORY = 4
+
+# Distributed cell offset stored in each cell filled with a universe and each
+# lattice element, for each universe containing distributed cells, along with
+# the number of such cells and elements in a model other than fuel
+OFFSET_MEMORY = 4
+OTHER_OFFSETS = {'core': 3000, 'assembly': 1000}
+
+# Full-length stacks of pin cells other than fuel (the empty guide tube with
+# and without an instrument) in a model
+NONFUEL_STACKS = 2
+
+# Heavy reflector blocks other than rotated copies, and the water holes in them
+REFLECTOR_BLOCKS = 6
+REFLECTOR_HOLES = 48
+
+# Value, sum, and sum of squares of a tally bin
+TALLY_BIN_MEMORY = 24
+
+# Scores of the depletion tallies created by the build scripts
+DEPLETION_SCORES = 7
+
+# Source and fission bank sites; the fission bank holds up to three sites for
+# each source particle
+SITE_MEMORY = 80
+SITES_PER_PARTICLE = 4
+
+
+@dataclass
+class MemoryEstimate:
+    """Estimated memory of an OpenMC run on one rank.
+
+    Attributes
+    ----------
+    parts : dict
+        Memory in bytes of each part of the run, keyed by a description
+    counts : dict
+        Numbers of objects the estimate is based on, keyed by a description
+
+    """
+    parts: dict = field(default_factory=dict)
+    counts: dict = field(default_factory=dict)
+
+    @property
+    def total(self):
+        """Total memory in bytes"""
+        return sum(self.parts.values())
+
+    def fits(self, budget):
+        """Return whether the run fits within a memory budget.
+
+        Parameters
+        ----------
+        budget : float
+            Memory available to each rank in bytes
+
+        Returns
+        -------
+        bool
+            Whether the estimated memory is within the budget
+
+        """
+        return self.total <= budget
+
+    def report(self):
+        """Return a human-readable breakdown of the estimate.
+
+        Returns
+        -------
+        str
+            Multi-line report
+
+        """
+        lines = []
+        for name, value in self.counts.items():
+            lines.append('{:<30} {:>14,}'.format(name, value))
+        lines.append('')
+        for name, value in sorted(self.parts.items(), key=lambda x: -x[1]):
+            lines.append('{:<30} {:>10.3f} GB'.format(name, value/1e9))
+        lines.append('{:<30} {:>10.3f} GB'.format('Total', self.total/1e9))
+        return '\n'.join(lines)
+
+
+def _num_nuclides(material):
+    return len(material.get_nuclides())
+
+
+def _lattice_stacks(num_fuel):
+    """Return the cells and lattice elements added by indexing the stacks of
+    pin cells by z-lattices.
+
+    Each stack is a lattice with an element per pitch, and each element
+    straddling a layer boundary holds a small stack of its own.
+
+    """
+    params = DEFAULT_PARAMETERS
+    surfs = get_surfaces(params)
+    stacks = [(_stack_surfaces(surfs), {})]*NONFUEL_STACKS
+    stacks += [(_within_fuel_surfaces(surfs), {})]*num_fuel
+    stacks += [(_fuel_stack_surfaces(surfs),
+                {'pitch': params.active_fuel_length,
+                 'origin': params.bottom_fuel_stack})]*num_fuel
+
+    cells = elements = 0
+    for surfaces, kwargs in stacks:
+        z = [s.z0 for s in surfaces]
+        elements += _lattice_elements(z, **kwargs)[2]
+        cells += 2*len(surfaces)
+    return cells, elements
+
+
+def _reflector_partitions(partitions):
+    """Return the cells and lattice elements added by dividing heavy reflector
+    blocks into lattices.
+
+    Besides its elements, each block has an outer universe with every hole,
+    and holes cut by element boundaries appear in several elements.
+
+    """
+    elements = REFLECTOR_BLOCKS*partitions**2
+    cells = elements + REFLECTOR_BLOCKS + 2*REFLECTOR_HOLES
+    return cells, elements
+
+
+def estimate_memory(rings, axial, depleted=False, clone=False, model='core',
+                    tallies=None, particles=10000, ranks=1,
+                    axial_lattice=False, lattice_stacks=False,
+                    reflector_partitions=1):
+    """Estimate the memory an OpenMC run of a model needs on each rank.
+
+    Parameters
+    ----------
+    rings : int
+        Number of annular regions in fuel
+    axial : int
+        Number of axial subdivisions in fuel
+    depleted : bool
+        Whether fuel contains the nuclides of depleted fuel
+    clone : bool
+        Whether fuel materials are cloned for each cell instance
+    model : {'core', 'assembly'}
+        Model to run
+    tallies : {None, 'mat', 'cell'}
+        Depletion tallies over fuel materials or fuel cell instances, as
+        created by the assembly build scripts
+    particles : int
+        Number of particles per generation
+    ranks : int
+        Number of MPI ranks sharing the particles
+    axial_lattice : bool
+        Whether axial segments of fuel are placed in a lattice stacked in z
+    lattice_stacks : bool
+        Whether axial stacks of pin cells are indexed by a z-lattice
+    reflector_partitions : int
+        Number of blocks in x and y that each heavy reflector block is divided
+        into (core model only)
+
+    Returns
+    -------
+    MemoryEstimate
+        Estimated memory on each rank
+
+    """
+    if model == 'core':
+        assemblies = Counter(assembly_enrichments().values())
+    elif model == 'assembly':
+        assemblies = Counter({'3.1': 1})
+    else:
+        raise ValueError('Unknown model "{}"'.format(model))
+
+    regions = max(rings, 1)*axial
+    state = 'depleted' if depleted else 'fresh'
+    fuel = {e: mats['UO2 {} {}'.format(e, state)] for e in assemblies}
+    others = [m for key, m in mats.items() if not key.startswith('UO2')]
+
+    # Fuel cells in each fuel universe and their instances
+    fuel_cells = len(fuel)*regions
+    instances = {e: n*FUEL_PINS*regions for e, n in assemblies.items()}
+    fuel_instances = sum(instances.values())
+
+    # Fuel materials: one per instance if cloned, otherwise one per ring of
+    # each enrichment
+    if clone:
+        fuel_materials = instances
+    else:
+        fuel_materials = {e: max(rings, 1) for e in assemblies}
+    fuel_nuclides = {e: _num_nuclides(m) for e, m in fuel.items()}
+    num_materials = sum(fuel_materials.values()) + len(others)
+
+    nuclides = set()
+    for mat in list(fuel.values()) + others:
+        nuclides.update(mat.get_nuclides())
+
+    parts = {}
+    parts['Base'] = BASE_MEMORY
+    parts['Cross sections'] = len(nuclides)*XS_MEMORY_PER_NUCLIDE
+    parts['Materials'] = num_materials*MATERIAL_MEMORY + MATERIAL_NUCLIDE_MEMORY*(
+        sum(fuel_materials[e]*fuel_nuclides[e] for e in fuel) +
+        sum(_num_nuclides(m) for m in others))
+    parts['Material nuclide indices'] = \
+        num_materials*len(nuclides)*NUCLIDE_INDEX_MEMORY
+
+    # Cells and lattice elements added by z-lattice stacks and partitioned
+    # reflector blocks, each of which also holds distributed cell offsets
+    extra_cells = extra_elements = 0
+    if lattice_stacks:
+        cells, elements = _lattice_stacks(len(fuel))
+        extra_cells += cells
+        extra_elements += elements
+    if model == 'core' and reflector_partitions > 1:
+        cells, elements = _reflector_partitions(reflector_partitions)
+        extra_cells += cells
+        extra_elements += elements
+
+    parts['Cells'] = (OTHER_CELLS[model] + fuel_cells + extra_cells)*CELL_MEMORY
+
+    # Distributed cells are needed to fill cells with a list of materials and
+    # to tally on cell instances
+    if clone or tallies == 'cell':
+        maps = len(fuel)*(axial if axial_lattice else 1)
+        slots = OTHER_OFFSETS[model] + len(fuel)*17*17 + extra_cells + \
+            extra_elements
+        if axial_lattice:
+            slots += len(fuel)*axial
+        parts['Distributed cell offsets'] = maps*slots*OFFSET_MEMORY
+    if clone:
+        parts['Cell instance materials'] = fuel_instances*INSTANCE_MEMORY
+
+    if tallies is not None:
+        if tallies == 'mat':
+            bins = sum(fuel_materials[e]*fuel_nuclides[e] for e in fuel)
+        elif tallies == 'cell':
+            bins = sum(instances[e]*fuel_nuclides[e] for e in fuel)
+        else:
+            raise ValueError('Unknown tallies "{}"'.format(tallies))
+        parts['Tallies'] = bins*DEPLETION_SCORES*TALLY_BIN_MEMORY
+
+    parts['Particle banks'] = \
+        particles/ranks*SITES_PER_PARTICLE*SITE_MEMORY
+
+    counts = {
+        'Fuel assemblies': sum(assemblies.values()),
+        'Fuel cells': fuel_cells,
+        'Fuel cell instances': fuel_instances,
+        'Materials': num_materials,
+        'Nuclides': len(nuclides),
+    }
+    return MemoryEstimate(parts, counts)
@@ -0,0 +1,891 @@
+"""Passes that simplify a built geometry before it is exported.
+
+The universe builders create objects independently of one another, so a model
+contains universes that are structurally identical -- e.g., control rod stacks
+that differ only in name, or pin cells bounded by the same surfaces and filled
+with the same materials. Regions are also written for readability rather than
+speed, using complements and unions that make a cell much more expensive to
+test than one bounded by an intersection of half-spaces. The passes here
+operate on an :class:`openmc.Geometry` in place and leave the geometry it
+describes unchanged.
+
+"""
+
+import warnings
+
+import numpy as np
+import openmc
+from openmc.mixin import IDWarning
+
+
+def _root(geometry):
+    if isinstance(geometry, openmc.Geometry):
+        return geometry.root_universe
+    return geometry
+
+
+def _ordered_cells(universe):
+    """Return the cells of a universe in the order OpenMC tests them.
+
+    Cells are written to geometry.xml in order of ID, which is the order in
+    which OpenMC reads them, regardless of the order they were added in.
+
+    """
+    return sorted(universe.cells.values(), key=lambda c: c.id)
+
+
+def _surface_key(surface):
+    """Return a key identifying a surface by its type and coefficients."""
+    return (surface.type, tuple(sorted(surface.coefficients.items())),
+            surface.boundary_type)
+
+
+def region_key(region):
+    """Return a hashable description of the structure of a region.
+
+    Half-spaces are described by the type and coefficients of their surface,
+    so regions bounded by distinct but coincident surfaces have the same key.
+
+    Parameters
+    ----------
+    region : openmc.Region or None
+        Region to describe
+
+    Returns
+    -------
+    tuple or None
+        Nested tuple describing the region
+
+    """
+    if region is None:
+        return None
+    if isinstance(region, openmc.Halfspace):
+        return ('halfspace', region.side, _surface_key(region.surface))
+    if isinstance(region, openmc.Complement):
+        return ('complement', region_key(region.node))
+    if isinstance(region, openmc.Intersection):
+        return ('intersection',) + tuple(region_key(r) for r in region)
+    if isinstance(region, openmc.Union):
+        return ('union',) + tuple(region_key(r) for r in region)
+    raise TypeError('Unknown region type: {}'.format(type(region)))
+
+
+def _lattice_array(lattice):
+    """Return the universes of a rectangular lattice as an array."""
+    return np.asarray(lattice.universes)
+
+
+def _postorder(root):
+    """Return universes and lattices with every child before its parents.
+
+    Hexagonal lattices and the universes only they contain are not included.
+
+    """
+    order = []
+    visited = set()
+
+    def visit(obj):
+        key = (type(obj).__name__, obj.id)
+        if key in visited:
+            return
+        visited.add(key)
+        if isinstance(obj, openmc.Universe):
+            for cell in obj.cells.values():
+                if cell.fill_type in ('universe', 'lattice'):
+                    visit(cell.fill)
+        elif isinstance(obj, openmc.RectLattice):
+            for univ in _lattice_array(obj).flat:
+                visit(univ)
+            if obj.outer is not None:
+                visit(obj.outer)
+        else:
+            return
+        order.append(obj)
+
+    visit(root)
+    return order
+
+
+def merge_universes(geometry):
+    """Merge universes and lattices that are structurally identical.
+
+    Two cells are identical when their regions have the same structure (see
+    :func:`region_key`), they have the same fill, temperature, rotation and
+    translation, and any universe or lattice filling them has already been
+    found identical. Two universes are identical when they contain identical
+    cells. Every reference to a duplicate is replaced by a reference to the
+    first universe or lattice of its kind, so the duplicates drop out of the
+    geometry. Cells filled with a list of materials are never merged since
+    each of their instances has its own material.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to modify in place
+
+    Returns
+    -------
+    dict
+        Dictionary mapping the ID of each universe that was merged away to the
+        universe that replaced it
+
+    """
+    root = _root(geometry)
+
+    # Small integers standing in for each distinct cell and universe
+    # structure, so that the key of a parent does not grow with its subtree
+    cell_codes = {}
+    univ_codes = {}
+    lattice_codes = {}
+
+    kept_universes = {}
+    kept_lattices = {}
+    replaced = {}
+    universe_code = {}
+    lattice_code = {}
+
+    def fill_key(cell):
+        if cell.fill_type == 'universe':
+            return ('universe', universe_code[cell.fill.id])
+        if cell.fill_type == 'lattice':
+            return ('lattice', lattice_code.get(cell.fill.id, ('id', cell.fill.id)))
+        if cell.fill_type == 'material':
+            return ('material', cell.fill.id)
+        if cell.fill is None:
+            return ('void',)
+        # Distributed materials make each cell unique
+        return ('cell', cell.id)
+
+    def cell_key(cell):
+        rotation = None if cell.rotation is None else \
+            tuple(np.ravel(cell.rotation))
+        translation = None if cell.translation is None else \
+            tuple(np.ravel(cell.translation))
+        temperature = cell.temperature
+        if isinstance(temperature, (list, np.ndarray)):
+            temperature = tuple(np.ravel(temperature))
+        key = (fill_key(cell), region_key(cell.region), temperature, rotation,
+               translation)
+        return cell_codes.setdefault(key, len(cell_codes))
+
+    for obj in _postorder(root):
+        if isinstance(obj, openmc.Universe):
+            if obj is root:
+                break
+            key = tuple(sorted(cell_key(c) for c in obj.cells.values()))
+            code = univ_codes.setdefault(key, len(univ_codes))
+            universe_code[obj.id] = code
+            kept = kept_universes.setdefault(code, obj)
+            if kept is not obj:
+                replaced[obj.id] = kept
+        else:
+            # Lattices are identical if they are laid out the same way with
+            # identical universes
+            array = _lattice_array(obj)
+            outer = None if obj.outer is None else universe_code[obj.outer.id]
+            key = (tuple(obj.lower_left), tuple(obj.pitch), array.shape, outer,
+                   tuple(universe_code[u.id] for u in array.flat))
+            code = lattice_codes.setdefault(key, len(lattice_codes))
+            lattice_code[obj.id] = code
+            kept_lattices.setdefault(code, obj)
+
+    # Point every reference at the universe or lattice that is kept
+    def kept_universe(univ):
+        return replaced.get(univ.id, univ)
+
+    for obj in _postorder(root):
+        if isinstance(obj, openmc.Universe):
+            if obj.id in replaced:
+                continue
+            for cell in obj.cells.values():
+                if cell.fill_type == 'universe':
+                    cell.fill = kept_universe(cell.fill)
+                elif cell.fill_type == 'lattice' and cell.fill.id in lattice_code:
+                    cell.fill = kept_lattices[lattice_code[cell.fill.id]]
+        elif kept_lattices[lattice_code[obj.id]] is obj:
+            array = _lattice_array(obj)
+            merged = np.empty(array.shape, dtype=openmc.Universe)
+            merged.flat[:] = [kept_universe(u) for u in array.flat]
+            obj.universes = merged
+            if obj.outer is not None:
+                obj.outer = kept_universe(obj.outer)
+
+    return replaced
+
+
+class _TooComplex(Exception):
+    pass
+
+
+def _conjoin(terms_a, terms_b, limit):
+    """Return the pairwise intersections of two lists of disjoint terms.
+
+    Each term is a tuple of half-spaces. Terms containing both sides of a
+    surface are empty and are left out.
+
+    """
+    result = []
+    for a in terms_a:
+        for b in terms_b:
+            sides = {}
+            for halfspace in a + b:
+                sides.setdefault(halfspace.surface.id, {})[halfspace.side] = \
+                    halfspace
+            if any(len(s) > 1 for s in sides.values()):
+                continue
+            result.append(tuple(h for s in sides.values() for h in s.values()))
+            if len(result) > limit:
+                raise _TooComplex
+    return result
+
+
+def _disjoint_terms(region, negate=False, limit=16):
+    """Write a region as a union of disjoint intersections of half-spaces.
+
+    Parameters
+    ----------
+    region : openmc.Region
+        Region to rewrite
+    negate : bool
+        Whether to rewrite the complement of the region instead
+    limit : int
+        Largest number of terms to create
+
+    Returns
+    -------
+    list of tuple of openmc.Halfspace
+        Intersections whose union is the region. No two of them overlap.
+
+    """
+    if isinstance(region, openmc.Halfspace):
+        return [(~region if negate else region,)]
+    if isinstance(region, openmc.Complement):
+        return _disjoint_terms(region.node, not negate, limit)
+
+    if isinstance(region, openmc.Intersection) != negate:
+        # Intersection, or complement of a union
+        terms = [()]
+        for node in region:
+            terms = _conjoin(terms, _disjoint_terms(node, negate, limit), limit)
+        return terms
+
+    # Union, or complement of an intersection. Each node only contributes the
+    # part of it not covered by the nodes before it, so that terms are disjoint.
+    terms = []
+    uncovered = [()]
+    for node in region:
+        terms += _conjoin(uncovered, _disjoint_terms(node, negate, limit), limit)
+        if len(terms) > limit:
+            raise _TooComplex
+        uncovered = _conjoin(uncovered, _disjoint_terms(node, not negate, limit),
+                             limit)
+    return terms
+
+
+def _is_simple(region):
+    if region is None or isinstance(region, openmc.Halfspace):
+        return True
+    return isinstance(region, openmc.Intersection) and \
+        all(isinstance(node, openmc.Halfspace) for node in region)
+
+
+_AXES = {'x-plane': (0, 'x0'), 'y-plane': (1, 'y0'), 'z-plane': (2, 'z0')}
+
+
+def _unbounded():
+    return np.array([[-np.inf]*3, [np.inf]*3])
+
+
+def _halfspace_box(halfspace):
+    """Return a box containing a half-space."""
+    box = _unbounded()
+    surface = halfspace.surface
+    if surface.type in _AXES:
+        axis, name = _AXES[surface.type]
+        position = getattr(surface, name)
+        if halfspace.side == '+':
+            box[0, axis] = position
+        else:
+            box[1, axis] = position
+    elif surface.type == 'z-cylinder' and halfspace.side == '-':
+        box[:, :2] = [[surface.x0 - surface.r, surface.y0 - surface.r],
+                      [surface.x0 + surface.r, surface.y0 + surface.r]]
+    return box
+
+
+def _region_box(region):
+    """Return a box containing a region."""
+    if region is None or isinstance(region, openmc.Complement):
+        return _unbounded()
+    if isinstance(region, openmc.Halfspace):
+        return _halfspace_box(region)
+    boxes = [_region_box(node) for node in region]
+    if isinstance(region, openmc.Intersection):
+        return np.array([np.max([b[0] for b in boxes], axis=0),
+                         np.min([b[1] for b in boxes], axis=0)])
+    return np.array([np.min([b[0] for b in boxes], axis=0),
+                     np.max([b[1] for b in boxes], axis=0)])
+
+
+def _enclose(box, other):
+    """Return the smallest box containing two boxes."""
+    if box is None:
+        return other
+    return np.array([np.minimum(box[0], other[0]),
+                     np.maximum(box[1], other[1])])
+
+
+def _universe_boxes(root):
+    """Return boxes containing every point at which each universe is used.
+
+    Boxes are in the coordinates of the universe, and are known from the
+    regions of the cells a universe fills and the elements of the lattices
+    it is placed in.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping the ID of a universe to a 2x3 array of the lower
+        left and upper right corners of its box
+
+    """
+    boxes = {root.id: _unbounded()}
+    lattice_boxes = {}
+
+    # Every universe and lattice comes before the universes inside it
+    for obj in reversed(_postorder(root)):
+        if isinstance(obj, openmc.Universe):
+            box = boxes[obj.id]
+            for cell in obj.cells.values():
+                if cell.fill_type not in ('universe', 'lattice'):
+                    continue
+                region_box = _region_box(cell.region)
+                fill_box = np.array([np.maximum(box[0], region_box[0]),
+                                     np.minimum(box[1], region_box[1])])
+                if cell.rotation is not None:
+                    fill_box = _unbounded()
+                elif cell.translation is not None:
+                    fill_box = fill_box - np.asarray(cell.translation)
+                if cell.fill_type == 'universe':
+                    boxes[cell.fill.id] = _enclose(boxes.get(cell.fill.id),
+                                                   fill_box)
+                else:
+                    lattice_boxes[cell.fill.id] = _enclose(
+                        lattice_boxes.get(cell.fill.id), fill_box)
+        else:
+            box = lattice_boxes[obj.id]
+            # Universes in a lattice, including the outer universe, see
+            # coordinates relative to the center of their element
+            element_box = box.copy()
+            pitch = np.asarray(obj.pitch, dtype=float)
+            element_box[0, :len(pitch)] = -pitch/2
+            element_box[1, :len(pitch)] = pitch/2
+            for univ in _lattice_array(obj).flat:
+                boxes[univ.id] = _enclose(boxes.get(univ.id), element_box)
+            if obj.outer is not None:
+                boxes[obj.outer.id] = _enclose(boxes.get(obj.outer.id),
+                                               element_box)
+
+    return boxes
+
+
+def _implied(halfspace, box, tol=1e-10):
+    """Return whether every point of a box lies in a half-space.
+
+    Returns True if the box lies in the half-space, False if it lies in the
+    opposite half-space and None otherwise.
+
+    """
+    surface = halfspace.surface
+    positive = halfspace.side == '+'
+    if surface.type in _AXES:
+        axis, name = _AXES[surface.type]
+        lower, upper = box[:, axis] - getattr(surface, name)
+        if lower >= -tol:
+            return positive
+        if upper <= tol:
+            return not positive
+    elif surface.type == 'z-cylinder':
+        if not np.all(np.isfinite(box[:, :2])):
+            return None
+        dx = box[:, 0] - surface.x0
+        dy = box[:, 1] - surface.y0
+        farthest = np.hypot(np.abs(dx).max(), np.abs(dy).max())
+        nearest = np.hypot(max(dx[0], -dx[1], 0.), max(dy[0], -dy[1], 0.))
+        if farthest <= surface.r + tol:
+            return not positive
+        if nearest >= surface.r - tol:
+            return positive
+    return None
+
+
+def _region(term):
+    if not term:
+        return None
+    if len(term) == 1:
+        return term[0]
+    return openmc.Intersection(term)
+
+
+def simplify_regions(geometry, max_cells=16):
+    """Rewrite cell regions as intersections of half-spaces.
+
+    A cell whose region contains a complement or a union is split into cells
+    whose regions are disjoint intersections of half-spaces and that share
+    its fill, temperature, rotation and translation. The first of them keeps
+    the ID and name of the original cell. Half-spaces containing every point
+    at which the universe of a cell is used, as far as can be told from the
+    bounds of the lattice elements and cells enclosing it, are dropped from
+    the region, as are the parts of a region lying outside of those points.
+
+    Cells filled with a list of materials are left unchanged since the new
+    cells would not have instances of their own in the list.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to modify in place
+    max_cells : int
+        Largest number of cells a cell may be split into. Cells that would
+        be split into more are left unchanged.
+
+    Returns
+    -------
+    dict
+        Number of cells that were split or otherwise rewritten
+        ('converted'), of cells that were added ('added') and of half-spaces
+        that were dropped ('removed half-spaces')
+
+    """
+    root = _root(geometry)
+    boxes = _universe_boxes(root)
+    stats = {'converted': 0, 'added': 0, 'removed half-spaces': 0}
+
+    for univ in _postorder(root):
+        if not isinstance(univ, openmc.Universe):
+            continue
+        box = boxes[univ.id]
+        for cell in list(univ.cells.values()):
+            if cell.fill_type not in ('material', 'universe', 'lattice', 'void'):
+                continue
+            if cell.region is None:
+                continue
+            try:
+                terms = _disjoint_terms(cell.region, limit=max_cells)
+            except _TooComplex:
+                continue
+
+            # Drop half-spaces implied by the bounds of the universe, and
+            # terms that lie outside of them
+            reduced = []
+            removed = 0
+            for term in terms:
+                implied = [_implied(h, box) for h in term]
+                if False in implied:
+                    continue
+                reduced.append(tuple(h for h, i in zip(term, implied) if not i))
+                removed += implied.count(True)
+            if not reduced:
+                # The cell is never reached; leave it for the user to notice
+                continue
+            if len(reduced) == 1 and _is_simple(cell.region) and not removed:
+                continue
+
+            stats['converted'] += 1
+            stats['added'] += len(reduced) - 1
+            stats['removed half-spaces'] += removed
+            cell.region = _region(reduced[0])
+            for i, term in enumerate(reduced[1:], 1):
+                new_cell = openmc.Cell(name='{} [{}]'.format(cell.name, i),
+                                       fill=cell.fill, region=_region(term))
+                if cell.temperature is not None:
+                    new_cell.temperature = cell.temperature
+                if cell.rotation is not None:
+                    new_cell.rotation = cell.rotation
+                if cell.translation is not None:
+                    new_cell.translation = cell.translation
+                univ.add_cell(new_cell)
+
+    return stats
+
+
+def _reference_box(univ, box):
+    """Return a finite box over which to compare the volumes of cells.
+
+    Infinite bounds of the box of a universe are replaced by the range of
+    positions of the planes and cylinders bounding its cells.
+
+    """
+    cell_boxes = [_region_box(c.region) for c in univ.cells.values()]
+    box = box.copy()
+    for axis in range(3):
+        if np.all(np.isfinite(box[:, axis])):
+            continue
+        values = np.array([b[:, axis] for b in cell_boxes]).ravel()
+        values = values[np.isfinite(values)]
+        lower, upper = box[:, axis]
+        if values.size > 0:
+            if not np.isfinite(lower):
+                lower = min(values.min(), upper)
+            if not np.isfinite(upper):
+                upper = max(values.max(), lower)
+        if not np.isfinite(lower) and not np.isfinite(upper):
+            # No cell depends on this coordinate
+            lower, upper = 0., 1.
+        elif not np.isfinite(lower):
+            lower = upper - 1.
+        elif not np.isfinite(upper):
+            upper = lower + 1.
+        if upper <= lower:
+            lower, upper = lower - 1., upper + 1.
+        box[:, axis] = lower, upper
+    return box
+
+
+def _term_volume(term, box, samples=64):
+    """Estimate the volume of an intersection of half-spaces within a box.
+
+    Planes perpendicular to an axis clip the box exactly. The area of the
+    cross section allowed by z-cylinders is integrated along x with the
+    midpoint rule, treating the cylinders a region lies outside of as not
+    overlapping one another. Other surfaces are ignored.
+
+    """
+    box = box.copy()
+    inside = []
+    outside = []
+    for halfspace in term:
+        surface = halfspace.surface
+        if surface.type in _AXES:
+            axis, name = _AXES[surface.type]
+            position = getattr(surface, name)
+            if halfspace.side == '+':
+                box[0, axis] = max(box[0, axis], position)
+            else:
+                box[1, axis] = min(box[1, axis], position)
+        elif surface.type == 'z-cylinder':
+            (inside if halfspace.side == '-' else outside).append(surface)
+    width = box[1] - box[0]
+    if np.any(width <= 0.):
+        return 0.
+    if not inside and not outside:
+        return np.prod(width)
+
+    dx = width[0]/samples
+    x = box[0, 0] + dx*(np.arange(samples) + 0.5)
+    lower = np.full(samples, box[0, 1])
+    upper = np.full(samples, box[1, 1])
+    for cyl in inside:
+        half = np.sqrt(np.maximum(cyl.r**2 - (x - cyl.x0)**2, 0.))
+        lower = np.maximum(lower, cyl.y0 - half)
+        upper = np.minimum(upper, cyl.y0 + half)
+    length = np.maximum(upper - lower, 0.)
+    for cyl in outside:
+        half = np.sqrt(np.maximum(cyl.r**2 - (x - cyl.x0)**2, 0.))
+        overlap = np.minimum(upper, cyl.y0 + half) - \
+            np.maximum(lower, cyl.y0 - half)
+        length -= np.maximum(overlap, 0.)
+    return np.maximum(length, 0.).sum()*dx*width[2]
+
+
+def _cell_volume(cell, box):
+    """Estimate the volume of the part of a cell within a box."""
+    if cell.region is None:
+        return np.prod(box[1] - box[0])
+    try:
+        terms = _disjoint_terms(cell.region)
+    except _TooComplex:
+        region_box = _region_box(cell.region)
+        width = np.minimum(box[1], region_box[1]) - \
+            np.maximum(box[0], region_box[0])
+        return np.prod(np.maximum(width, 0.))
+    return sum(_term_volume(term, box) for term in terms)
+
+
+def order_cells(geometry):
+    """Order the cells of each universe by decreasing volume.
+
+    OpenMC finds the cell containing a point by testing the cells of a
+    universe in order, so testing the cells most likely to contain the point
+    first reduces the average number of tests. The fraction of the volume of
+    a universe within a cell is used as the probability of finding a point
+    in it, with the volume taken over the box containing every point at
+    which the universe is used (see :func:`simplify_regions`).
+
+    OpenMC tests cells in order of ID (see :func:`_ordered_cells`), so the
+    IDs of the cells of a universe are exchanged among them to follow the new
+    order. The IDs of reordered cells therefore change: any ID recorded
+    before the pass (e.g., of a cell to tally) may afterwards belong to
+    another cell of the same universe.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to modify in place
+
+    Returns
+    -------
+    int
+        Number of universes whose cells were reordered and renumbered
+
+    """
+    root = _root(geometry)
+    boxes = _universe_boxes(root)
+
+    reordered = 0
+    for univ in _postorder(root):
+        if not isinstance(univ, openmc.Universe) or len(univ.cells) < 2:
+            continue
+        box = _reference_box(univ, boxes[univ.id])
+        cells = _ordered_cells(univ)
+        volumes = [_cell_volume(cell, box) for cell in cells]
+
+        # Stable sort so that cells of equal volume keep their order
+        order = sorted(range(len(cells)), key=lambda i: -volumes[i])
+        if order == list(range(len(cells))):
+            continue
+        ids = [cell.id for cell in cells]
+        univ.clear_cells()
+        with warnings.catch_warnings():
+            # Each ID is already in use by another cell of the universe
+            warnings.simplefilter('ignore', IDWarning)
+            for i, uid in zip(order, ids):
+                cells[i].id = uid
+        univ.add_cells([cells[i] for i in order])
+        reordered += 1
+
+    return reordered
+
+
+def nesting_depth(geometry):
+    """Return the largest number of universes a point is nested in.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe
+
+    Returns
+    -------
+    int
+        Number of universes, including the root universe, on the deepest
+        path from the root universe to a cell that is not filled with a
+        universe or lattice
+
+    """
+    depths = {}
+    for obj in _postorder(_root(geometry)):
+        if isinstance(obj, openmc.Universe):
+            depth = 0
+            for cell in obj.cells.values():
+                if cell.fill_type in ('universe', 'lattice'):
+                    depth = max(depth, depths.get(cell.fill.id, 0))
+            depths[obj.id] = depth + 1
+        else:
+            universes = list(_lattice_array(obj).flat)
+            if obj.outer is not None:
+                universes.append(obj.outer)
+            depths[obj.id] = max(depths[u.id] for u in universes)
+    return depths[_root(geometry).id]
+
+
+def _intersect(a, b):
+    """Return the intersection of two regions, either of which may be None."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    nodes = []
+    seen = set()
+    for region in (a, b):
+        for node in (region if isinstance(region, openmc.Intersection)
+                     else [region]):
+            if isinstance(node, openmc.Halfspace):
+                key = (node.surface.id, node.side)
+                if key in seen:
+                    continue
+                seen.add(key)
+            nodes.append(node)
+    if len(nodes) == 1:
+        return nodes[0]
+    return openmc.Intersection(nodes)
+
+
+def _covers(cell, box):
+    """Return whether the region of a cell contains a box."""
+    if cell.region is None:
+        return True
+    try:
+        terms = _disjoint_terms(cell.region)
+    except _TooComplex:
+        return False
+    return len(terms) == 1 and all(_implied(h, box) is True for h in terms[0])
+
+
+def _compose(outer, inner):
+    """Return the translation of the fill of a cell after absorbing another.
+
+    Returns False if the cells cannot be combined because either rotates its
+    fill.
+
+    """
+    if outer.rotation is not None or inner.rotation is not None:
+        return False
+    translations = [np.asarray(c.translation, dtype=float)
+                    for c in (outer, inner) if c.translation is not None]
+    if not translations:
+        return None
+    return sum(translations)
+
+
+def flatten_universes(geometry, max_inline=4, max_cells=16, preserve=()):
+    """Remove levels of universe nesting that do not change the geometry.
+
+    Two transformations are applied, working up from the innermost
+    universes:
+
+    - A cell or lattice element filled with a universe consisting of a single
+      cell that covers every point at which the universe is used is filled
+      directly with the fill of that cell.
+    - A cell filled with a universe of at most `max_inline` cells is replaced
+      by one cell for each of them, bounded by the intersection of both
+      regions, as long as the universe containing it ends up with no more
+      than `max_cells` cells.
+
+    Cells of a universe used in only one place are moved rather than copied
+    and so keep their IDs. Cells in `preserve` are never removed or copied.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to modify in place
+    max_inline : int
+        Largest number of cells of a universe to inline
+    max_cells : int
+        Largest number of cells a universe may have after inlining
+    preserve : iterable of openmc.Cell
+        Cells that must remain in the geometry, e.g., fuel cells whose
+        volumes are tabulated
+
+    Returns
+    -------
+    dict
+        Nesting depth of the geometry (see :func:`nesting_depth`) before
+        ('depth before') and after ('depth after') the pass, the number of
+        times a single-cell universe was bypassed ('collapsed') and the
+        number of universes inlined ('inlined')
+
+    """
+    root = _root(geometry)
+    preserve = {cell.id for cell in preserve}
+    boxes = _universe_boxes(root)
+    stats = {'depth before': nesting_depth(root), 'collapsed': 0,
+             'inlined': 0}
+
+    # Number of cells and lattice elements filled with each universe
+    references = {}
+    for obj in _postorder(root):
+        if isinstance(obj, openmc.Universe):
+            fills = [c.fill for c in obj.cells.values()
+                     if c.fill_type == 'universe']
+        else:
+            fills = list(_lattice_array(obj).flat)
+            if obj.outer is not None:
+                fills.append(obj.outer)
+        for univ in fills:
+            references[univ.id] = references.get(univ.id, 0) + 1
+
+    def single_cell(univ):
+        """Return the only cell of a universe if it covers the universe."""
+        if univ is root or len(univ.cells) != 1:
+            return None
+        cell = next(iter(univ.cells.values()))
+        if cell.id in preserve or cell.fill_type == 'distribmat':
+            return None
+        if not _covers(cell, boxes[univ.id]):
+            return None
+        return cell
+
+    def bypass(univ):
+        """Return the innermost universe reached through untransformed cells."""
+        references[univ.id] -= 1
+        while True:
+            cell = single_cell(univ)
+            if cell is None or cell.fill_type != 'universe' or \
+                    cell.rotation is not None or cell.translation is not None:
+                references[univ.id] += 1
+                return univ
+            univ = cell.fill
+            stats['collapsed'] += 1
+
+    for obj in _postorder(root):
+        if not isinstance(obj, openmc.Universe):
+            array = _lattice_array(obj)
+            flat = np.empty(array.shape, dtype=openmc.Universe)
+            flat.flat[:] = [bypass(u) for u in array.flat]
+            obj.universes = flat
+            if obj.outer is not None:
+                obj.outer = bypass(obj.outer)
+            continue
+
+        for cell in list(obj.cells.values()):
+            # Fill the cell with whatever fills a single-cell universe
+            while cell.fill_type == 'universe':
+                inner = single_cell(cell.fill)
+                if inner is None:
+                    break
+                translation = _compose(cell, inner)
+                if translation is False:
+                    break
+                if inner.fill_type == 'material' and \
+                        inner.temperature is not None:
+                    if cell.temperature is not None and \
+                            cell.temperature != inner.temperature:
+                        break
+                    cell.temperature = inner.temperature
+                references[cell.fill.id] -= 1
+                cell.fill = inner.fill
+                cell.translation = translation
+                if inner.fill_type == 'universe':
+                    references[inner.fill.id] = \
+                        references.get(inner.fill.id, 0) + 1
+                stats['collapsed'] += 1
+
+            # Replace the cell by the cells of a small universe filling it
+            if cell.fill_type != 'universe' or cell.id in preserve:
+                continue
+            univ = cell.fill
+            if len(univ.cells) > max_inline or \
+                    len(obj.cells) + len(univ.cells) - 1 > max_cells:
+                continue
+            if cell.rotation is not None or cell.translation is not None or \
+                    cell.temperature is not None:
+                continue
+            inner_cells = list(univ.cells.values())
+            if any(c.fill_type == 'distribmat' for c in inner_cells):
+                continue
+            move = references[univ.id] == 1
+            if not move and any(c.id in preserve for c in inner_cells):
+                continue
+
+            obj.remove_cell(cell)
+            references[univ.id] -= 1
+            for inner in inner_cells:
+                region = _intersect(cell.region, inner.region)
+                if move:
+                    inner.region = region
+                    new_cell = inner
+                else:
+                    new_cell = openmc.Cell(name=inner.name, fill=inner.fill,
+                                           region=region)
+                    for attr in ('temperature', 'rotation', 'translation'):
+                        value = getattr(inner, attr)
+                        if value is not None:
+                            setattr(new_cell, attr, value)
+                    if inner.fill_type == 'universe':
+                        references[inner.fill.id] += 1
+                obj.add_cell(new_cell)
+            stats['inlined'] += 1
+
+    stats['depth after'] = nesting_depth(root)
+    return stats
@@ -0,0 +1,172 @@
+"""Find overlapping cells and undefined regions on a dense grid of points.
+
+OpenMC only notices that cells overlap when run with overlap checking, and a
+point in no cell of a universe is only found when a particle is lost there,
+possibly late into a long run. :func:`find_overlaps` instead tests the points
+of a regular grid against every cell of each universe they reach with
+:meth:`smr.locate.PointLocator.check`, splitting the grid into chunks that are
+checked in parallel processes.
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import os
+
+import numpy as np
+
+from .locate import PointLocator
+
+
+@dataclass
+class GeometryProblem:
+    """Points at which cells of a universe overlap or none is defined.
+
+    Attributes
+    ----------
+    kind : {'overlap', 'undefined'}
+        Whether the points are in several cells or in none
+    container : str
+        Universe or lattice in which the problem occurs
+    cells : tuple of int
+        IDs of the overlapping cells
+    count : int
+        Number of grid points with the problem
+    points : numpy.ndarray
+        Coordinates in [cm] of some of the points
+
+    """
+    kind: str
+    container: str
+    cells: tuple
+    count: int = 0
+    points: np.ndarray = field(default_factory=lambda: np.empty((0, 3)))
+
+
+def grid_points(lower_left, upper_right, shape, start, stop):
+    """Return a range of the points of a regular grid.
+
+    Points are at the centers of the grid elements and are numbered with x
+    varying fastest.
+
+    Parameters
+    ----------
+    lower_left, upper_right : iterable of float
+        Corners of the grid in [cm]
+    shape : iterable of int
+        Number of points along x, y, and z
+    start, stop : int
+        Range of point indices
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (stop - start, 3) of points
+
+    """
+    lower_left = np.asarray(lower_left, dtype=float)
+    width = (np.asarray(upper_right, dtype=float) - lower_left)/shape
+    index = np.arange(start, stop)
+    ijk = np.column_stack((index % shape[0], index // shape[0] % shape[1],
+                           index // (shape[0]*shape[1])))
+    return lower_left + (ijk + 0.5)*width
+
+
+# Locator used by each worker process
+_locator = None
+
+
+def _init_worker(geometry):
+    global _locator
+    _locator = PointLocator(geometry)
+
+
+def _check_chunk(lower_left, upper_right, shape, start, stop, max_points):
+    xyz = grid_points(lower_left, upper_right, shape, start, stop)
+    return {key: (len(idx), xyz[idx[:max_points]])
+            for key, idx in _locator.check(xyz).items()}
+
+
+def find_overlaps(geometry, lower_left, upper_right, shape, jobs=None,
+                  chunk_size=1000000, max_points=10):
+    """Check a regular grid of points for overlapping and undefined cells.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to check
+    lower_left, upper_right : iterable of float
+        Corners of the grid in [cm]
+    shape : iterable of int
+        Number of points along x, y, and z
+    jobs : int, optional
+        Number of processes checking chunks in parallel. Defaults to the
+        number of CPUs.
+    chunk_size : int
+        Number of points in each chunk
+    max_points : int
+        Number of points of each problem for which coordinates are kept per
+        chunk
+
+    Returns
+    -------
+    list of GeometryProblem
+        Problems found, the most frequent first
+
+    """
+    shape = tuple(int(n) for n in shape)
+    num_points = int(np.prod(shape))
+    chunks = [(start, min(start + chunk_size, num_points))
+              for start in range(0, num_points, chunk_size)]
+    if jobs is None:
+        jobs = os.cpu_count()
+
+    problems = {}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(chunks)) or 1,
+                             initializer=_init_worker,
+                             initargs=(geometry,)) as executor:
+        futures = [executor.submit(_check_chunk, lower_left, upper_right,
+                                   shape, start, stop, max_points)
+                   for start, stop in chunks]
+        for future in futures:
+            for key, (count, points) in future.result().items():
+                if key not in problems:
+                    problems[key] = GeometryProblem(*key)
+                problem = problems[key]
+                problem.count += count
+                if len(problem.points) < max_points:
+                    problem.points = np.concatenate(
+                        (problem.points, points))[:max_points]
+
+    return sorted(problems.values(), key=lambda p: -p.count)
+
+
+def format_problems(problems, points=3):
+    """Return a human-readable list of geometry problems.
+
+    Parameters
+    ----------
+    problems : list of GeometryProblem
+        Problems as returned by :func:`find_overlaps`
+    points : int
+        Number of points to show for each problem
+
+    Returns
+    -------
+    str
+        Multi-line report
+
+    """
+    if not problems:
+        return 'No overlapping or undefined cells found'
+    lines = []
+    for p in problems:
+        if p.kind == 'overlap':
+            what = 'Cells {} overlap'.format(', '.join(map(str, p.cells)))
+        else:
+            what = 'No cell defined'
+        lines.append('{} in {} at {} points, e.g.'.format(
+            what, p.container, p.count))
+        for x, y, z in p.points[:points]:
+            lines.append('    ({:.5f}, {:.5f}, {:.5f})'.format(x, y, z))
+    return '\n'.join(lines)
@@ -1,16 +1,133 @@
 """Instantiate pin cell Cells and Universes for core model."""
 
-from math import sqrt
+from functools import partial
+from math import sqrt, pi
+import re
 
 import numpy as np
 import openmc
 from openmc.model import subdivide
 
 from .materials import mats
-from .surfaces import surfs, pellet_OR, bottom_fuel_stack, top_active_core
+from .surfaces import surfs, get_surfaces, get_registry, DEFAULT_PARAMETERS
 
 
-def make_pin(name, surfaces, materials, grid=None):
+class FuelRegions:
+    """Table of the fuel cells created by :func:`pin_universes`.
+
+    Each row records the cell along with the ring and axial index of the fuel
+    region it represents and the dimensions of that region, so that volumes
+    can be computed without inspecting the region of each cell.
+
+    Attributes
+    ----------
+    cells : list of openmc.Cell
+        Cell for each fuel region
+    ring : numpy.ndarray of int
+        Radial ring index, counted outward from the pellet center
+    axial : numpy.ndarray of int
+        Axial segment index, counted upward from the bottom of the fuel
+    r_inner : numpy.ndarray of float
+        Inner radius of each region in [cm]
+    r_outer : numpy.ndarray of float
+        Outer radius of each region in [cm]
+    height : numpy.ndarray of float
+        Height of each region in [cm]
+    volumes : numpy.ndarray of float
+        Volume of a single instance of each region in [cm^3]
+
+    """
+    def __init__(self):
+        self.cells = []
+        self._rows = []
+
+    def __len__(self):
+        return len(self.cells)
+
+    def append(self, cell, ring, axial, r_inner, r_outer, height):
+        """Add a row to the table.
+
+        Parameters
+        ----------
+        cell : openmc.Cell
+            Cell filled with fuel
+        ring : int
+            Radial ring index
+        axial : int
+            Axial segment index
+        r_inner, r_outer : float
+            Inner and outer radius of the region in [cm]
+        height : float
+            Height of the region in [cm]
+
+        """
+        self.cells.append(cell)
+        self._rows.append((ring, axial, r_inner, r_outer, height))
+
+    def extend(self, other):
+        """Add all rows of another table to this one.
+
+        Parameters
+        ----------
+        other : FuelRegions
+            Table whose rows should be added
+
+        """
+        self.cells.extend(other.cells)
+        self._rows.extend(other._rows)
+
+    def select(self, cells):
+        """Return the rows whose cell is present in a collection of cells.
+
+        Parameters
+        ----------
+        cells : dict
+            Dictionary keyed by cell ID, e.g. as returned by
+            :meth:`openmc.Geometry.get_all_cells`
+
+        Returns
+        -------
+        FuelRegions
+            Table containing only the selected rows
+
+        """
+        subset = FuelRegions()
+        for cell, row in zip(self.cells, self._rows):
+            if cell.id in cells:
+                subset.append(cell, *row)
+        return subset
+
+    def _column(self, index, dtype):
+        return np.array([row[index] for row in self._rows], dtype=dtype)
+
+    @property
+    def ring(self):
+        return self._column(0, int)
+
+    @property
+    def axial(self):
+        return self._column(1, int)
+
+    @property
+    def r_inner(self):
+        return self._column(2, float)
+
+    @property
+    def r_outer(self):
+        return self._column(3, float)
+
+    @property
+    def height(self):
+        return self._column(4, float)
+
+    @property
+    def volumes(self):
+        rows = np.array(self._rows, dtype=float).reshape(-1, 5)
+        r_inner, r_outer, height = rows[:, 2], rows[:, 3], rows[:, 4]
+        return pi * (r_outer**2 - r_inner**2) * height
+
+
+def make_pin(name, surfaces, materials, grid=None, grid_box=None):
     """Construct a pin cell Universes with radially layered Cells.
 
     Parameters
@@ -26,6 +143,9 @@ def make_pin(name, surfaces, materials, grid=None):
     grid: str, optional
         The type of grid spacer to wrap around the pin cell universe.
         Accepted types include 'bottom' and 'intermediate'.
+    grid_box: openmc.Region, optional
+        Region inside the grid spacer. Defaults to the 'rod grid box' of the
+        default surfaces.
 
     Returns
     -------
@@ -55,10 +175,12 @@ def make_pin(name, surfaces, materials, grid=None):
 
     # Add spacer grid cells if specified
     if grid:
-        cell.region &= surfs['rod grid box']
+        if grid_box is None:
+            grid_box = surfs['rod grid box']
+        cell.region &= grid_box
 
         cell_name = name + ' (grid)'
-        cell = openmc.Cell(name=cell_name, region=~surfs['rod grid box'])
+        cell = openmc.Cell(name=cell_name, region=~grid_box)
 
         if grid == 'bottom':
             cell.fill = mats['In']
@@ -142,73 +264,261 @@ def make_pin_stack(name, zsurfaces, universes, boundary, fuel_fill):
     return universe
 
 
-def pin_universes(ring_radii=None, num_axial=196, depleted=False):
-    """Generate universes for SMR fuel pins.
+# Surface types whose half-spaces do not depend on z
+_Z_INVARIANT = ('x-plane', 'y-plane', 'z-cylinder')
+
+
+def _depends_on_z(universe):
+    """Return whether the cell containing a point in a universe can depend on
+    the z coordinate of the point."""
+    for cell in universe.get_all_cells().values():
+        if cell.rotation is not None:
+            return True
+        if cell.fill_type == 'lattice' and len(cell.fill.pitch) == 3:
+            return True
+        if cell.region is not None and any(
+                s.type not in _Z_INVARIANT
+                for s in cell.region.get_surfaces().values()):
+            return True
+    return False
+
+
+def _lattice_elements(z, pitch=None, origin=None):
+    """Return the z-lattice elements covering the layers of a stack.
 
     Parameters
     ----------
-    ring_radii : iterable of float
-        Radii of rings in fuel (note that this doesn't need to include the
-        full fuel pin radius)
-    num_axial : int
-        Number of axial subdivisions in fuel
-    depleted : bool
-        Whether fuel should contain nuclides as though it were depleted
+    z : numpy.ndarray
+        Positions in [cm] of the surfaces between layers
+    pitch, origin : float, optional
+        Pitch of the lattice and position of a boundary between elements, as
+        passed to :func:`make_lattice_stack`
 
     Returns
     -------
-    dict
-        Dictionary mapping a universe name to a openmc.Universe object
+    bottom : float
+        Position in [cm] of the bottom of the lowest element
+    pitch : float
+        Pitch of the lattice in [cm]
+    num_elements : int
+        Number of elements
+
+    """
+    if pitch is None:
+        pitch = np.diff(z).min()
+    if origin is None:
+        origin = z[0]
+    bottom = origin - np.ceil((origin - z[0])/pitch - 1e-9)*pitch
+    num_elements = int(np.ceil((z[-1] - bottom)/pitch - 1e-9))
+    return bottom, pitch, num_elements
+
+
+def _stack_lattice(name, surfaces, universes, width, pitch=None, origin=None,
+                   registry=None):
+    """Return a z-lattice indexing axially stacked universes.
+
+    The lattice spans the layers between the lowest and highest surface; see
+    :func:`make_lattice_stack` for the parameters. Returns None if there are
+    fewer than two surfaces.
+
+    """
+    z = np.array([s.z0 for s in surfaces])
+    if len(z) < 2:
+        return None
+    if np.any(np.diff(z) <= 0.0):
+        raise ValueError('Surfaces of stack "{}" are not in increasing '
+                         'order'.format(name))
+    if registry is None:
+        registry = get_registry()
+
+    bottom, pitch, num_elements = _lattice_elements(z, pitch, origin)
+
+    # Universes whose cells depend on z are placed in the coordinates of the
+    # model rather than those of the element
+    depends = {}
+    for univ in universes:
+        if univ.id not in depends:
+            depends[univ.id] = _depends_on_z(univ)
+
+    # Fill each element with the layers it overlaps by more than round-off.
+    # Layer i lies between z[i-1] and z[i].
+    tol = 1e-9*pitch
+    elements = np.empty((num_elements, 1, 1), dtype=openmc.Universe)
+    for k in range(num_elements):
+        lo = max(bottom + k*pitch, z[0])
+        hi = min(bottom + (k + 1)*pitch, z[-1])
+        first = np.searchsorted(z, lo + tol, side='right')
+        last = max(first, np.searchsorted(z, hi - tol, side='left'))
+        if first == last and not depends[universes[first].id]:
+            elements[k, 0, 0] = universes[first]
+            continue
+
+        # Otherwise, stack the layers within the element between planes
+        # positioned relative to its center
+        center = bottom + (k + 0.5)*pitch
+        planes = [registry.intern(openmc.ZPlane(z0=s.z0 - center))
+                  for s in surfaces[first:last]]
+        regions = subdivide(planes) if planes else [None]
+        element_name = '{} [{}]'.format(name, k)
+        element = openmc.Universe(name=element_name)
+        for i, (univ, region) in enumerate(zip(universes[first:last + 1],
+                                               regions)):
+            cell = openmc.Cell(name='{} ({})'.format(element_name, i),
+                               fill=univ, region=region)
+            if depends[univ.id]:
+                cell.translation = (0., 0., -center)
+            element.add_cell(cell)
+        elements[k, 0, 0] = element
+
+    lattice = openmc.RectLattice(name=name)
+    lattice.lower_left = (-width/2, -width/2, bottom)
+    lattice.pitch = (width, width, pitch)
+    lattice.universes = elements
+    return lattice
+
+
+def _add_lattice_stack_cells(universe, name, lattice, surfaces, universes,
+                             region=None):
+    """Add the cells of a stack indexed by a z-lattice to a universe, each
+    intersected with a region if one is given."""
+    regions = [+surfaces[0] & -surfaces[-1], -surfaces[0], +surfaces[-1]]
+    if region is not None:
+        regions = [region & r for r in regions]
+    cells = [
+        openmc.Cell(name='{} (lattice)'.format(name), fill=lattice,
+                    region=regions[0]),
+        openmc.Cell(name='{} (0)'.format(name), fill=universes[0],
+                    region=regions[1]),
+        openmc.Cell(name='{} (last)'.format(name), fill=universes[-1],
+                    region=regions[2])
+    ]
+    universe.add_cells(cells)
+
+
+def make_lattice_stack(name, surfaces, universes, width, pitch=None,
+                       origin=None, registry=None):
+    """Construct a Universe of axially stacked Universes indexed by a z-lattice.
+
+    This is an alternative to :func:`make_stack` that locates the axial layer
+    containing a point by indexing a lattice with uniform pitch in z rather
+    than by testing the cell of each layer in turn. OpenMC lattices cannot
+    have a non-uniform pitch, so each lattice element is filled directly with
+    the universe of the layer containing it or, if the element straddles a
+    layer boundary, with a small stack of only the layers within the element.
+    Layers below the lowest and above the highest surface are cells of the
+    returned universe, as with :func:`make_stack`.
+
+    Universes in a lattice see coordinates relative to the center of their
+    element, so the planes of a small stack are positioned relative to the
+    center of its element. Pin cells do not depend on z and fill elements
+    directly, but a universe that does (e.g., a stack within the stack) is
+    filled into its element by a cell translating coordinates back to those
+    of the model.
+
+    A layer spanning several elements is a separate instance of its universe
+    in each of them, which matters for distributed cell tallies and cloned
+    materials. The pitch and origin can be chosen so that such a layer lines
+    up with a single element.
+
+    Parameters
+    ----------
+    name: str
+        The string name to assign to the Universe and each of its Cells
+    surfaces: Iterable of openmc.ZPlane
+        A collection of axial surfaces between which pin cells are
+        filled to comprise an axially stacked pin cell. Their positions must
+        be strictly increasing.
+    universes: Iterable of openmc.Universe
+        The Universes used within each axial layer. This collection
+        must be one unit longer than the collection of surfaces.
+    width: float
+        Width in x and y of the lattice element in [cm], which must cover
+        every point the universe is used for
+    pitch: float, optional
+        Pitch of the lattice in z in [cm]. Defaults to the thickness of the
+        thinnest layer, so that an element straddles at most two layers.
+    origin: float, optional
+        z position in [cm] of a boundary between lattice elements. Defaults
+        to the position of the lowest surface.
+    registry: smr.surfaces.SurfaceRegistry, optional
+        Registry through which the planes within elements are created.
+        Defaults to the registry for the default parameters.
+
+    Returns
+    -------
+    universe: openmc.Universe
+        The pin cell Universe
+    """
+    surfaces = list(surfaces)
+    universes = list(universes)
+    lattice = _stack_lattice(name, surfaces, universes, width, pitch, origin,
+                             registry)
+    if lattice is None:
+        return make_stack(name, surfaces, universes)
+
+    universe = openmc.Universe(name=name)
+    _add_lattice_stack_cells(universe, name, lattice, surfaces, universes)
+    return universe
+
+
+def make_lattice_pin_stack(name, zsurfaces, universes, boundary, fuel_fill,
+                           width, pitch=None, registry=None):
+    """Construct a pin stack like :func:`make_pin_stack` using a z-lattice.
+
+    The axially stacked universes outside of the fuel are indexed by a
+    lattice as in :func:`make_lattice_stack`, whose cells are placed directly
+    in the returned universe.
+
+    Parameters
+    ----------
+    name: str
+        The string name to assign to the Universe and each of its Cells
+    zsurfaces: Iterable of openmc.ZPlane
+        A collection of axial surfaces between which pin cells are
+        filled to comprise an axially stacked pin cell
+    universes: Iterable of openmc.Universe
+        The Universes used within each axial layer. This collection
+        must be one unit longer than the collection of surfaces.
+    boundary : openmc.Surface
+        Boundary between the fuel pin itself and everything outside (gap, clad,
+        moderator)
+    fuel_fill : openmc.Universe or openmc.Material
+        Universe or material for (possibly subdivided) fuel
+    width: float
+        Width in x and y of the lattice element in [cm]
+    pitch: float, optional
+        Pitch of the lattice in z in [cm]
+    registry: smr.surfaces.SurfaceRegistry, optional
+        Registry through which the planes within elements are created
+
+    Returns
+    -------
+    universe: openmc.Universe
+        The pin cell Universe
 
     """
-    fuel = 'depleted' if depleted else 'fresh'
-
-    # Create dictionary to store pin universes
-    univs = {}
-
-    # Dummy water cell
-    cell = openmc.Cell(name='water pin', fill=mats['H2O'])
-    univs['water pin'] = openmc.Universe(name='Empty water pin cell universe')
-    univs['water pin'].add_cell(cell)
-
-    # Guide tube pin cells
-    univs['GT empty'] = make_pin(
-        'GT empty',
-        [surfs['GT IR'], surfs['GT OR']],
-        [mats['H2O'], mats['Zr'], mats['H2O']])
-    univs['GT empty grid (bottom)'] = make_pin(
-        'GT empty grid (bottom)',
-        [surfs['GT IR'], surfs['GT OR']],
-        [mats['H2O'], mats['Zr'], mats['H2O']], grid='bottom')
-    univs['GT empty grid (intermediate)'] = make_pin(
-        'GT empty grid (intermediate)',
-        [surfs['GT IR'], surfs['GT OR']],
-        [mats['H2O'], mats['Zr'], mats['H2O']], grid='intermediate')
-    univs['GT empty nozzle'] = make_pin(
-        'GT empty nozzle',
-        [surfs['GT IR'], surfs['GT OR']],
-        [mats['H2O'], mats['Zr'], mats['H2O']])
-
-    univs['GTd empty'] = make_pin(
-        'GT empty at dashpot',
-        [surfs['GT dashpot IR'], surfs['GT dashpot OR']],
-        [mats['H2O'], mats['Zr'], mats['H2O']])
-    univs['GTd empty grid (bottom)'] = make_pin(
-        'GT empty at dashpot grid (bottom)',
-        [surfs['GT dashpot IR'], surfs['GT dashpot OR']],
-        [mats['H2O'], mats['Zr'], mats['H2O']], grid='bottom')
-    univs['GTd empty grid (intermediate)'] = make_pin(
-        'GT empty at dashpot grid (intermediate)',
-        [surfs['GT dashpot IR'], surfs['GT dashpot OR']],
-        [mats['H2O'], mats['Zr'], mats['H2O']], grid='intermediate')
-    univs['GTd empty nozzle'] = make_pin(
-        'GT empty nozzle',
-        [surfs['GT dashpot IR'], surfs['GT dashpot OR']],
-        [mats['H2O'], mats['Zr'], mats['H2O']])
-
-    # Stack all axial pieces of guide tube together
-
-    stack_surfs = [
+    zsurfaces = list(zsurfaces)
+    universes = list(universes)
+    outside_name = '{} (o)'.format(name)
+    lattice = _stack_lattice(outside_name, zsurfaces, universes, width, pitch,
+                             registry=registry)
+    if lattice is None:
+        return make_pin_stack(name, zsurfaces, universes, boundary, fuel_fill)
+
+    universe = openmc.Universe(name=name)
+    _add_lattice_stack_cells(universe, outside_name, lattice, zsurfaces,
+                             universes, +boundary)
+
+    cell_name = '{} (i)'.format(name)
+    cell = openmc.Cell(name=cell_name, fill=fuel_fill, region=-boundary)
+    universe.add_cell(cell)
+
+    return universe
+
+
+def _stack_surfaces(surfs):
+    """Return the axial surfaces between segments of a full-length stack."""
+    return [
         surfs['bot support plate'],
         surfs['top support plate'],
         surfs['top lower nozzle'],
@@ -231,159 +541,391 @@ def pin_universes(ring_radii=None, num_axial=196, depleted=False):
         surfs['top upper nozzle']
     ]
 
-    univs['GT empty stack'] = make_stack(
-        'GT empty stack', surfaces=stack_surfs,
-        universes=[univs['water pin'],
-                   univs['water pin'],
-                   univs['water pin'],
-                   univs['GTd empty'],
-                   univs['GTd empty'],
-                   univs['GTd empty grid (bottom)'],
-                   univs['GTd empty'],
-                   univs['GT empty'],
-                   univs['GT empty grid (intermediate)'],
-                   univs['GT empty'],
-                   univs['GT empty grid (intermediate)'],
-                   univs['GT empty'],
-                   univs['GT empty grid (intermediate)'],
-                   univs['GT empty'],
-                   univs['GT empty'],
-                   univs['GT empty grid (intermediate)'],
-                   univs['GT empty'],
-                   univs['GT empty'],
-                   univs['GT empty'],
-                   univs['water pin'],
-                   univs['water pin']])
-
-    univs['GT empty instr'] = make_stack(
-        'GT empty instr', surfaces=stack_surfs,
-        universes=[univs['water pin'],
-                   univs['water pin'],
-                   univs['water pin'],
-                   univs['GT empty'],
-                   univs['GT empty'],
-                   univs['GT empty grid (bottom)'],
-                   univs['GT empty'],
-                   univs['GT empty'],
-                   univs['GT empty grid (intermediate)'],
-                   univs['GT empty'],
-                   univs['GT empty grid (intermediate)'],
-                   univs['GT empty'],
-                   univs['GT empty grid (intermediate)'],
-                   univs['GT empty'],
-                   univs['GT empty'],
-                   univs['GT empty grid (intermediate)'],
-                   univs['GT empty'],
-                   univs['GT empty'],
-                   univs['GT empty'],
-                   univs['water pin'],
-                   univs['water pin']])
-
-
-    # Instrument tube pin cell
-    univs['IT'] = make_pin(
-        'IT',
-        [surfs['IT IR'], surfs['IT OR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['Air'], mats['Zr'], mats['H2O'], mats['Zr'], mats['H2O']])
-    univs['IT grid (bottom)'] = make_pin(
-        'IT grid (bottom)',
-        [surfs['IT IR'], surfs['IT OR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['Air'], mats['Zr'], mats['H2O'], mats['Zr'], mats['H2O']],
-        grid='bottom')
-    univs['IT grid (intermediate)'] = make_pin(
-        'IT grid (intermediate)',
-        [surfs['IT IR'], surfs['IT OR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['Air'], mats['Zr'], mats['H2O'], mats['Zr'], mats['H2O']],
-        grid='intermediate')
-
-    univs['IT nozzle'] = make_pin(
-        'IT nozzle',
-        [surfs['IT IR'], surfs['IT OR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['Air'], mats['Zr'], mats['H2O'], mats['Zr'], mats['SS']])
-    univs['IT dashpot'] = make_pin(
-        'IT dashpot',
-        [surfs['IT IR'], surfs['IT OR']],
-        [mats['Air'], mats['Zr'], mats['H2O']])
-
-    # Stack all axial pieces of instrument tube together
-
-    univs['IT stack'] = make_stack(
-        'GT instr',
-        surfaces=stack_surfs,
-        universes=[univs['IT dashpot'],
-                   univs['IT dashpot'],
-                   univs['IT dashpot'],
-                   univs['IT'],
-                   univs['IT'],
-                   univs['IT grid (bottom)'],
-                   univs['IT'],
-                   univs['IT'],
-                   univs['IT grid (intermediate)'],
-                   univs['IT'],
-                   univs['IT grid (intermediate)'],
-                   univs['IT'],
-                   univs['IT grid (intermediate)'],
-                   univs['IT'],
-                   univs['IT'],
-                   univs['IT grid (intermediate)'],
-                   univs['IT'],
-                   univs['IT'],
-                   univs['IT'],
-                   univs['IT dashpot'],
-                   univs['water pin']])
-
-    # Control rod pin cells
-    univs['CR'] = make_pin(
-        'CR',
-        [surfs['CP OR'], surfs['CR IR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['AIC'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']])
-    univs['CR grid (bottom)'] = make_pin(
-        'CR grid (bottom)',
-        [surfs['CP OR'], surfs['CR IR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['AIC'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']],
-        grid='bottom')
-    univs['CR grid (intermediate)'] = make_pin(
-        'CR grid (intermediate)',
-        [surfs['CP OR'], surfs['CR IR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['AIC'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']],
-        grid='intermediate')
-    univs['CR nozzle'] = make_pin(
-        'CR nozzle',
-        [surfs['CP OR'], surfs['CR IR'], surfs['CR OR']],
-        [mats['AIC'], mats['Air'], mats['SS'], mats['H2O']])
-
-    univs['CR blank'] = make_pin(
-        'CR blank',
-        [surfs['CP OR'], surfs['CR IR'], surfs['CR OR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['SS'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']])
-    univs['CR blank grid (bottom)'] = make_pin(
-        'CR blank grid (bottom)',
-        [surfs['CP OR'], surfs['CR IR'], surfs['CR OR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['SS'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']],
-        grid='bottom')
-    univs['CR blank grid (intermediate)'] = make_pin(
-        'CR blank grid (intermediate)',
-        [surfs['CP OR'], surfs['CR IR'], surfs['CR OR'], surfs['GT IR'], surfs['GT OR']],
-        [mats['SS'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']],
-        grid='intermediate')
-    univs['CR blank nozzle'] = make_pin(
-        'CR blank nozzle',
-        [surfs['CP OR'], surfs['CR IR'], surfs['CR OR']],
-        [mats['SS'], mats['Air'], mats['SS'], mats['H2O']])
-    univs['CR blank bare'] = make_pin(
-        'CR blank bare',
-        [surfs['CP OR'], surfs['CR IR'], surfs['CR OR']],
-        [mats['SS'], mats['Air'], mats['SS'], mats['H2O']])
-    univs['CR bare'] = make_pin(
-        'CR bare',
-        [surfs['CP OR'], surfs['CR IR'], surfs['CR OR']],
-        [mats['AIC'], mats['Air'], mats['SS'], mats['H2O']])
-
-    # Stack all axial pieces of control rod tubes together for each bank
-
-    for b in ['A', 'B', 'C', 'D', 'SA', 'SB', 'SC', 'SD', 'SE']:
+
+def _within_fuel_surfaces(surfs):
+    """Return the axial surfaces between grid spacers within the fuel."""
+    return [
+        surfs['grid1bot'],
+        surfs['grid1top'],
+        surfs['dashpot top'],
+        surfs['grid2bot'],
+        surfs['grid2top'],
+        surfs['grid3bot'],
+        surfs['grid3top'],
+        surfs['grid4bot'],
+        surfs['grid4top']
+    ]
+
+
+def _fuel_stack_surfaces(surfs):
+    """Return the axial surfaces between segments of a fuel rod stack."""
+    return [
+        surfs['bot support plate'],
+        surfs['top support plate'],
+        surfs['top lower nozzle'],
+        surfs['top lower thimble'],
+        surfs['top active core'],
+        surfs['grid5bot'],
+        surfs['grid5top'],
+        surfs['top pin plenum'],
+        surfs['top FR'],
+        surfs['bot upper nozzle'],
+        surfs['top upper nozzle']
+    ]
+
+
+# Control rod banks for which guide tube stacks can be created
+_BANKS = ('A', 'B', 'C', 'D', 'SA', 'SB', 'SC', 'SD', 'SE')
+
+
+class PinUniverses(dict):
+    """Dictionary of pin universes that are created when first looked up.
+
+    Universes are built in groups -- e.g., looking up any guide tube universe
+    creates all guide tube universes, and looking up a fuel universe for one
+    enrichment creates the universes for that enrichment only -- so that a
+    model using only some of the pins does not pay for the rest. Iterating
+    over the dictionary only yields universes that have been created.
+
+    Parameters
+    ----------
+    ring_radii : iterable of float
+        Radii of rings in fuel (note that this doesn't need to include the
+        full fuel pin radius)
+    num_axial : int
+        Number of axial subdivisions in fuel
+    depleted : bool
+        Whether fuel should contain nuclides as though it were depleted
+    params : smr.surfaces.GeometryParameters, optional
+        Geometric parameters of the model
+    axial_lattice : bool
+        Whether axial segments of fuel are placed in a lattice stacked in z
+        rather than bounded by planes within one universe
+    lattice_stacks : bool
+        Whether axial stacks of pin cells are indexed by a z-lattice (see
+        :func:`make_lattice_stack`) rather than bounded by planes
+
+    Attributes
+    ----------
+    fuel_regions : FuelRegions
+        Table of every fuel cell created so far
+    surfs : dict
+        Surfaces bounding the universes, as returned by
+        :func:`smr.surfaces.get_surfaces`
+    registry : smr.surfaces.SurfaceRegistry
+        Registry through which surfaces subdividing fuel and stacks are
+        created, as returned by :func:`smr.surfaces.get_registry`
+
+    """
+    def __init__(self, ring_radii=None, num_axial=196, depleted=False,
+                 params=None, axial_lattice=False, lattice_stacks=False):
+        super().__init__()
+        if params is None:
+            params = DEFAULT_PARAMETERS
+        self.ring_radii = ring_radii
+        self.num_axial = num_axial
+        self.depleted = depleted
+        self.params = params
+        self.axial_lattice = axial_lattice
+        self.lattice_stacks = lattice_stacks
+        self.surfs = get_surfaces(params)
+        self.registry = get_registry(params)
+        self.fuel_regions = FuelRegions()
+        self._tables = []
+        self._subdivision = None
+
+        # Radial and axial extent of each fuel region
+        if ring_radii is not None:
+            self._ring_bounds = [0.0] + list(ring_radii) + [params.pellet_OR]
+        else:
+            self._ring_bounds = [0.0, params.pellet_OR]
+        self._height = params.active_fuel_length / num_axial
+
+    def __missing__(self, key):
+        build = self._builder(key)
+        if build is not None:
+            build()
+        if key not in self:
+            raise KeyError(key)
+        return dict.__getitem__(self, key)
+
+    def _builder(self, key):
+        """Return the method that creates the universe with a given name."""
+        match = re.match(r'Fuel (?:pin )?\((\d\.\d)%\)', key)
+        if match:
+            return partial(self._build_fuel, match.group(1))
+        match = re.match(r'GT CR bank (\w+)', key)
+        if match:
+            if match.group(1) in _BANKS:
+                return partial(self._build_bank, match.group(1))
+            return None
+        if key == 'water pin':
+            return self._build_water
+        if key.startswith(('GT empty', 'GTd empty')):
+            return self._build_guide_tubes
+        if key.startswith('IT'):
+            return self._build_instrument_tube
+        if key.startswith('CR'):
+            return self._build_control_rods
+        if key.startswith(('SS pin', 'end plug', 'pin plenum', 'Outside pin')):
+            return self._build_fuel_parts
+        return None
+
+    def _make_pin(self, *args, **kwargs):
+        """Create a pin universe with spacer grids bounded by these surfaces."""
+        return make_pin(*args, grid_box=self.surfs['rod grid box'], **kwargs)
+
+    def _make_stack(self, name, surfaces, universes, **kwargs):
+        """Create an axial stack bounded by planes or indexed by a z-lattice."""
+        if self.lattice_stacks:
+            return make_lattice_stack(name, surfaces, universes,
+                                      2*self.params.pin_pitch,
+                                      registry=self.registry, **kwargs)
+        return make_stack(name, surfaces, universes)
+
+    def _make_pin_stack(self, name, zsurfaces, universes, boundary, fuel_fill):
+        """Create a fuel pin stack bounded by planes or indexed by a z-lattice."""
+        if self.lattice_stacks:
+            return make_lattice_pin_stack(name, zsurfaces, universes, boundary,
+                                          fuel_fill, 2*self.params.pin_pitch,
+                                          registry=self.registry)
+        return make_pin_stack(name, zsurfaces, universes, boundary, fuel_fill)
+
+    def _fuel_stack_lattice(self):
+        """Return the z-lattice options for the stack of a fuel rod."""
+        if not self.lattice_stacks:
+            return {}
+        # The active fuel is exactly one lattice element so that each fuel
+        # region still has a single instance per rod
+        return {'pitch': self.params.active_fuel_length,
+                'origin': self.params.bottom_fuel_stack}
+
+    def add_fuel_regions(self, fuel_regions):
+        """Record fuel cells in another table, now and as they are created.
+
+        Parameters
+        ----------
+        fuel_regions : FuelRegions
+            Table to which a row is appended for every fuel cell
+
+        """
+        fuel_regions.extend(self.fuel_regions)
+        self._tables.append(fuel_regions)
+
+    def _build_water(self):
+        univs = self
+
+        # Dummy water cell
+        cell = openmc.Cell(name='water pin', fill=mats['H2O'])
+        univs['water pin'] = openmc.Universe(name='Empty water pin cell universe')
+        univs['water pin'].add_cell(cell)
+
+    def _build_guide_tubes(self):
+        univs = self
+        surfs = self.surfs
+
+        # Guide tube pin cells
+        univs['GT empty'] = self._make_pin(
+            'GT empty',
+            [surfs['GT IR'], surfs['GT OR']],
+            [mats['H2O'], mats['Zr'], mats['H2O']])
+        univs['GT empty grid (bottom)'] = self._make_pin(
+            'GT empty grid (bottom)',
+            [surfs['GT IR'], surfs['GT OR']],
+            [mats['H2O'], mats['Zr'], mats['H2O']], grid='bottom')
+        univs['GT empty grid (intermediate)'] = self._make_pin(
+            'GT empty grid (intermediate)',
+            [surfs['GT IR'], surfs['GT OR']],
+            [mats['H2O'], mats['Zr'], mats['H2O']], grid='intermediate')
+        univs['GT empty nozzle'] = self._make_pin(
+            'GT empty nozzle',
+            [surfs['GT IR'], surfs['GT OR']],
+            [mats['H2O'], mats['Zr'], mats['H2O']])
+
+        univs['GTd empty'] = self._make_pin(
+            'GT empty at dashpot',
+            [surfs['GT dashpot IR'], surfs['GT dashpot OR']],
+            [mats['H2O'], mats['Zr'], mats['H2O']])
+        univs['GTd empty grid (bottom)'] = self._make_pin(
+            'GT empty at dashpot grid (bottom)',
+            [surfs['GT dashpot IR'], surfs['GT dashpot OR']],
+            [mats['H2O'], mats['Zr'], mats['H2O']], grid='bottom')
+        univs['GTd empty grid (intermediate)'] = self._make_pin(
+            'GT empty at dashpot grid (intermediate)',
+            [surfs['GT dashpot IR'], surfs['GT dashpot OR']],
+            [mats['H2O'], mats['Zr'], mats['H2O']], grid='intermediate')
+        univs['GTd empty nozzle'] = self._make_pin(
+            'GT empty nozzle',
+            [surfs['GT dashpot IR'], surfs['GT dashpot OR']],
+            [mats['H2O'], mats['Zr'], mats['H2O']])
+
+        # Stack all axial pieces of guide tube together
+        stack_surfs = _stack_surfaces(surfs)
+
+        univs['GT empty stack'] = self._make_stack(
+            'GT empty stack', surfaces=stack_surfs,
+            universes=[univs['water pin'],
+                       univs['water pin'],
+                       univs['water pin'],
+                       univs['GTd empty'],
+                       univs['GTd empty'],
+                       univs['GTd empty grid (bottom)'],
+                       univs['GTd empty'],
+                       univs['GT empty'],
+                       univs['GT empty grid (intermediate)'],
+                       univs['GT empty'],
+                       univs['GT empty grid (intermediate)'],
+                       univs['GT empty'],
+                       univs['GT empty grid (intermediate)'],
+                       univs['GT empty'],
+                       univs['GT empty'],
+                       univs['GT empty grid (intermediate)'],
+                       univs['GT empty'],
+                       univs['GT empty'],
+                       univs['GT empty'],
+                       univs['water pin'],
+                       univs['water pin']])
+
+        univs['GT empty instr'] = self._make_stack(
+            'GT empty instr', surfaces=stack_surfs,
+            universes=[univs['water pin'],
+                       univs['water pin'],
+                       univs['water pin'],
+                       univs['GT empty'],
+                       univs['GT empty'],
+                       univs['GT empty grid (bottom)'],
+                       univs['GT empty'],
+                       univs['GT empty'],
+                       univs['GT empty grid (intermediate)'],
+                       univs['GT empty'],
+                       univs['GT empty grid (intermediate)'],
+                       univs['GT empty'],
+                       univs['GT empty grid (intermediate)'],
+                       univs['GT empty'],
+                       univs['GT empty'],
+                       univs['GT empty grid (intermediate)'],
+                       univs['GT empty'],
+                       univs['GT empty'],
+                       univs['GT empty'],
+                       univs['water pin'],
+                       univs['water pin']])
+
+    def _build_instrument_tube(self):
+        univs = self
+        surfs = self.surfs
+
+        # Instrument tube pin cell
+        univs['IT'] = self._make_pin(
+            'IT',
+            [surfs['IT IR'], surfs['IT OR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['Air'], mats['Zr'], mats['H2O'], mats['Zr'], mats['H2O']])
+        univs['IT grid (bottom)'] = self._make_pin(
+            'IT grid (bottom)',
+            [surfs['IT IR'], surfs['IT OR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['Air'], mats['Zr'], mats['H2O'], mats['Zr'], mats['H2O']],
+            grid='bottom')
+        univs['IT grid (intermediate)'] = self._make_pin(
+            'IT grid (intermediate)',
+            [surfs['IT IR'], surfs['IT OR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['Air'], mats['Zr'], mats['H2O'], mats['Zr'], mats['H2O']],
+            grid='intermediate')
+
+        univs['IT nozzle'] = self._make_pin(
+            'IT nozzle',
+            [surfs['IT IR'], surfs['IT OR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['Air'], mats['Zr'], mats['H2O'], mats['Zr'], mats['SS']])
+        univs['IT dashpot'] = self._make_pin(
+            'IT dashpot',
+            [surfs['IT IR'], surfs['IT OR']],
+            [mats['Air'], mats['Zr'], mats['H2O']])
+
+        # Stack all axial pieces of instrument tube together
+        stack_surfs = _stack_surfaces(surfs)
+
+        univs['IT stack'] = self._make_stack(
+            'GT instr',
+            surfaces=stack_surfs,
+            universes=[univs['IT dashpot'],
+                       univs['IT dashpot'],
+                       univs['IT dashpot'],
+                       univs['IT'],
+                       univs['IT'],
+                       univs['IT grid (bottom)'],
+                       univs['IT'],
+                       univs['IT'],
+                       univs['IT grid (intermediate)'],
+                       univs['IT'],
+                       univs['IT grid (intermediate)'],
+                       univs['IT'],
+                       univs['IT grid (intermediate)'],
+                       univs['IT'],
+                       univs['IT'],
+                       univs['IT grid (intermediate)'],
+                       univs['IT'],
+                       univs['IT'],
+                       univs['IT'],
+                       univs['IT dashpot'],
+                       univs['water pin']])
+
+    def _build_control_rods(self):
+        univs = self
+        surfs = self.surfs
+
+        # Control rod pin cells
+        univs['CR'] = self._make_pin(
+            'CR',
+            [surfs['CP OR'], surfs['CR IR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['AIC'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']])
+        univs['CR grid (bottom)'] = self._make_pin(
+            'CR grid (bottom)',
+            [surfs['CP OR'], surfs['CR IR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['AIC'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']],
+            grid='bottom')
+        univs['CR grid (intermediate)'] = self._make_pin(
+            'CR grid (intermediate)',
+            [surfs['CP OR'], surfs['CR IR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['AIC'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']],
+            grid='intermediate')
+        univs['CR nozzle'] = self._make_pin(
+            'CR nozzle',
+            [surfs['CP OR'], surfs['CR IR'], surfs['CR OR']],
+            [mats['AIC'], mats['Air'], mats['SS'], mats['H2O']])
+
+        univs['CR blank'] = self._make_pin(
+            'CR blank',
+            [surfs['CP OR'], surfs['CR IR'], surfs['CR OR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['SS'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']])
+        univs['CR blank grid (bottom)'] = self._make_pin(
+            'CR blank grid (bottom)',
+            [surfs['CP OR'], surfs['CR IR'], surfs['CR OR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['SS'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']],
+            grid='bottom')
+        univs['CR blank grid (intermediate)'] = self._make_pin(
+            'CR blank grid (intermediate)',
+            [surfs['CP OR'], surfs['CR IR'], surfs['CR OR'], surfs['GT IR'], surfs['GT OR']],
+            [mats['SS'], mats['Air'], mats['SS'], mats['H2O'], mats['Zr'], mats['H2O']],
+            grid='intermediate')
+        univs['CR blank nozzle'] = self._make_pin(
+            'CR blank nozzle',
+            [surfs['CP OR'], surfs['CR IR'], surfs['CR OR']],
+            [mats['SS'], mats['Air'], mats['SS'], mats['H2O']])
+        univs['CR blank bare'] = self._make_pin(
+            'CR blank bare',
+            [surfs['CP OR'], surfs['CR IR'], surfs['CR OR']],
+            [mats['SS'], mats['Air'], mats['SS'], mats['H2O']])
+        univs['CR bare'] = self._make_pin(
+            'CR bare',
+            [surfs['CP OR'], surfs['CR IR'], surfs['CR OR']],
+            [mats['AIC'], mats['Air'], mats['SS'], mats['H2O']])
+
+    def _build_bank(self, b):
+        # Stack all axial pieces of control rod tubes together for bank "b"
+        univs = self
+        surfs = self.surfs
+        stack_surfs = _stack_surfaces(surfs)
+
         # no grid, no nozzle
-        univs['GT CR bank {} dummy'.format(b)] = make_stack(
+        univs['GT CR bank {} dummy'.format(b)] = self._make_stack(
             'GT CR bank {} dummy'.format(b),
             surfaces=[surfs['bottom FR'],
                       surfs['dashpot top'],
@@ -396,7 +938,7 @@ def pin_universes(ring_radii=None, num_axial=196, depleted=False):
                        univs['CR blank']])
 
         # bottom grid
-        univs['GT CR bank {} dummy grid (bottom)'.format(b)] = make_stack(
+        univs['GT CR bank {} dummy grid (bottom)'.format(b)] = self._make_stack(
             'GT CR bank {} dummy grid (bottom)'.format(b),
             surfaces=[surfs['bottom FR'],
                       surfs['dashpot top'],
@@ -409,7 +951,7 @@ def pin_universes(ring_radii=None, num_axial=196, depleted=False):
                        univs['CR blank grid (bottom)']])
 
         # intermediate grid
-        univs['GT CR bank {} dummy grid (intermediate)'.format(b)] = make_stack(
+        univs['GT CR bank {} dummy grid (intermediate)'.format(b)] = self._make_stack(
             'GT CR bank {} dummy grid (intermediate)'.format(b),
             surfaces=[surfs['bottom FR'],
                       surfs['dashpot top'],
@@ -422,7 +964,7 @@ def pin_universes(ring_radii=None, num_axial=196, depleted=False):
                        univs['CR blank grid (intermediate)']])
 
         # nozzle
-        univs['GT CR bank {} dummy nozzle'.format(b)] = make_stack(
+        univs['GT CR bank {} dummy nozzle'.format(b)] = self._make_stack(
             'GT CR bank {} dummy nozzle'.format(b),
             surfaces=[surfs['bottom FR'],
                       surfs['dashpot top'],
@@ -435,7 +977,7 @@ def pin_universes(ring_radii=None, num_axial=196, depleted=False):
                        univs['CR blank nozzle']])
 
         # bare
-        univs['GT CR bank {} dummy bare'.format(b)] = make_stack(
+        univs['GT CR bank {} dummy bare'.format(b)] = self._make_stack(
             'GT CR bank {} dummy bare'.format(b),
             surfaces=[surfs['bottom FR'],
                       surfs['dashpot top'],
@@ -448,7 +990,7 @@ def pin_universes(ring_radii=None, num_axial=196, depleted=False):
                        univs['CR blank bare']])
 
         # final combination of all axial pieces for control rod bank "b"
-        univs['GT CR bank {}'.format(b)] = make_stack(
+        univs['GT CR bank {}'.format(b)] = self._make_stack(
             'GT CR bank {}'.format(b), stack_surfs,
             universes=[univs['water pin'],
                        univs['GT CR bank {} dummy nozzle'.format(b)],
@@ -472,282 +1014,319 @@ def pin_universes(ring_radii=None, num_axial=196, depleted=False):
                        univs['GT CR bank {} dummy bare'.format(b)],
                        univs['GT CR bank {} dummy bare'.format(b)]])
 
-
-    # Fuel pin cells
-    univs['SS pin'] = make_pin(
-        'SS pin',
-        [surfs['clad OR']],
-        [mats['SS'], mats['H2O']])
-
-    univs['end plug'] = make_pin(
-        'end plug',
-        [surfs['clad OR']],
-        [mats['M5'], mats['H2O']])
-
-    univs['pin plenum'] = make_pin(
-        'pin plenum',
-        surfaces=[surfs['plenum spring OR'],
-                  surfs['clad IR'],
-                  surfs['clad OR']],
-        materials=[mats['SS302'],
-                   mats['He'],
-                   mats['M5'],
-                   mats['H2O']])
-
-    univs['pin plenum grid (intermediate)'] = make_pin(
-        'pin plenum grid (intermediate)',
-        surfaces=[surfs['plenum spring OR'],
-                  surfs['clad IR'],
-                  surfs['clad OR']],
-        materials=[mats['In'],
-                   mats['He'],
-                   mats['Zr'],
-                   mats['H2O']],
-        grid='intermediate')
-
-
-    #### 1.6% ENRICHED FUEL PIN CELL
-
-    if num_axial > 1:
-        # Determine z position between each fuel pellet, omitting the surfaces
-        # corresponding to the very bottom and top of the active fuel length
-        axial_splits = np.linspace(bottom_fuel_stack, top_active_core, num_axial + 1)[1:-1]
-        axial_surfs = [openmc.ZPlane(z0=z) for z in axial_splits]
-
-    if ring_radii is not None:
-        # Get z-cylinder surfaces for each ring
-        rings = []
-        for i, r in enumerate(ring_radii):
-            cyl = openmc.ZCylinder(r=r, name='fuel ring {}'.format(i))
-            rings.append(cyl)
-
-    def subdivided_fuel(fill):
+    def _build_fuel_parts(self):
+        univs = self
+        surfs = self.surfs
+
+        # Fuel pin cells
+        univs['SS pin'] = self._make_pin(
+            'SS pin',
+            [surfs['clad OR']],
+            [mats['SS'], mats['H2O']])
+
+        univs['end plug'] = self._make_pin(
+            'end plug',
+            [surfs['clad OR']],
+            [mats['M5'], mats['H2O']])
+
+        univs['pin plenum'] = self._make_pin(
+            'pin plenum',
+            surfaces=[surfs['plenum spring OR'],
+                      surfs['clad IR'],
+                      surfs['clad OR']],
+            materials=[mats['SS302'],
+                       mats['He'],
+                       mats['M5'],
+                       mats['H2O']])
+
+        univs['pin plenum grid (intermediate)'] = self._make_pin(
+            'pin plenum grid (intermediate)',
+            surfaces=[surfs['plenum spring OR'],
+                      surfs['clad IR'],
+                      surfs['clad OR']],
+            materials=[mats['In'],
+                       mats['He'],
+                       mats['Zr'],
+                       mats['H2O']],
+            grid='intermediate')
+
+        outside_pin_surfaces = [surfs['clad IR'], surfs['clad OR']]
+        outside_pin_mats = [mats['He'], mats['M5'], mats['H2O']]
+
+        univs['Outside pin'] = self._make_pin(
+            'Outside pin',
+            surfaces=outside_pin_surfaces,
+            materials=outside_pin_mats)
+
+        univs['Outside pin grid (bottom)'] = self._make_pin(
+            'Outside pin grid (bottom)',
+            surfaces=outside_pin_surfaces,
+            materials=outside_pin_mats,
+            grid='bottom')
+
+        univs['Outside pin grid (intermediate)'] = self._make_pin(
+            'Outside pin grid (intermediate)',
+            surfaces=outside_pin_surfaces,
+            materials=outside_pin_mats,
+            grid='intermediate')
+
+    def _fuel_subdivision(self):
+        """Return the surfaces used to subdivide fuel, creating them once."""
+        if self._subdivision is None:
+            axial_surfs = rings = None
+            if self.num_axial > 1 and not self.axial_lattice:
+                # Determine z position between each fuel pellet, omitting the
+                # surfaces corresponding to the very bottom and top of the
+                # active fuel length
+                axial_splits = np.linspace(self.params.bottom_fuel_stack,
+                                           self.params.top_active_core,
+                                           self.num_axial + 1)[1:-1]
+                axial_surfs = [self.registry.intern(openmc.ZPlane(z0=z))
+                               for z in axial_splits]
+
+            if self.ring_radii is not None:
+                # Get z-cylinder surfaces for each ring
+                rings = []
+                for i, r in enumerate(self.ring_radii):
+                    cyl = openmc.ZCylinder(r=r, name='fuel ring {}'.format(i))
+                    rings.append(self.registry.intern(cyl))
+
+            self._subdivision = (axial_surfs, rings)
+        return self._subdivision
+
+    def _record_fuel(self, cell, ring, axial):
+        bounds = self._ring_bounds
+        row = (cell, ring, axial, bounds[ring], bounds[ring + 1], self._height)
+        self.fuel_regions.append(*row)
+        for table in self._tables:
+            table.append(*row)
+
+    def _axial_lattice(self, universes):
+        """Return a universe with one of the given universes per axial segment.
+
+        The segments between the bottom and top ones are the elements of a
+        lattice stacked in z, so that the segment containing a point is found
+        by indexing rather than by testing the cell of each segment in turn.
+        The bottom and top segments are bounded by a single plane each and,
+        as when every segment is bounded by planes, extend below and above
+        the active fuel, so that no point falls outside of every segment.
+
+        """
+        params = self.params
+        splits = np.linspace(params.bottom_fuel_stack, params.top_active_core,
+                             self.num_axial + 1)
+        bottom = self.registry.intern(openmc.ZPlane(z0=splits[1]))
+        top = self.registry.intern(openmc.ZPlane(z0=splits[-2]))
+        cells = [openmc.Cell(fill=universes[0], region=-bottom)]
+        if self.num_axial > 2:
+            # The universe only fills cells within a pin cell, so that no point
+            # between the planes falls outside the lattice in x or y
+            lattice = openmc.RectLattice()
+            lattice.lower_left = (-params.pin_pitch, -params.pin_pitch,
+                                  splits[1])
+            lattice.pitch = (2*params.pin_pitch, 2*params.pin_pitch,
+                             self._height)
+            stack = np.empty((self.num_axial - 2, 1, 1), dtype=openmc.Universe)
+            stack[:, 0, 0] = universes[1:-1]
+            lattice.universes = stack
+            cells.append(openmc.Cell(fill=lattice, region=+bottom & -top))
+        cells.append(openmc.Cell(fill=universes[-1], region=+top))
+        return openmc.Universe(cells=cells)
+
+    def _subdivided_fuel(self, fill):
         # Create universe for UO2 alone with axial/radial subdivision
+        axial_surfs, rings = self._fuel_subdivision()
         uo2_cells = []
-        if num_axial > 1:
-            for axial_region in subdivide(axial_surfs):
-                if ring_radii is not None:
-                    for ring_region in subdivide(rings):
+        if self.num_axial > 1 and self.axial_lattice:
+            # Ring cells of each axial segment in their own universe
+            segments = []
+            for j in range(self.num_axial):
+                if rings is not None:
+                    ring_cells = []
+                    for i, ring_region in enumerate(subdivide(rings)):
+                        cell = openmc.Cell(fill=fill, region=ring_region)
+                        ring_cells.append(cell)
+                        self._record_fuel(cell, i, j)
+                else:
+                    cell = openmc.Cell(fill=fill)
+                    ring_cells = [cell]
+                    self._record_fuel(cell, 0, j)
+                segments.append(openmc.Universe(cells=ring_cells))
+            return self._axial_lattice(segments)
+        elif self.num_axial > 1:
+            for j, axial_region in enumerate(subdivide(axial_surfs)):
+                if rings is not None:
+                    for i, ring_region in enumerate(subdivide(rings)):
                         cell = openmc.Cell(fill=fill, region=axial_region & ring_region)
                         uo2_cells.append(cell)
+                        self._record_fuel(cell, i, j)
                 else:
-                    uo2_cells.append(openmc.Cell(fill=fill, region=axial_region))
+                    cell = openmc.Cell(fill=fill, region=axial_region)
+                    uo2_cells.append(cell)
+                    self._record_fuel(cell, 0, j)
         else:
-            if ring_radii is not None:
-                for ring_region in subdivide(rings):
+            if rings is not None:
+                for i, ring_region in enumerate(subdivide(rings)):
                     cell = openmc.Cell(fill=fill, region=ring_region)
                     uo2_cells.append(cell)
+                    self._record_fuel(cell, i, 0)
             else:
                 raise RuntimeError("Shouldn't call with 1 ring and 1 axial segment")
 
         return openmc.Universe(cells=uo2_cells)
 
-    # If rings/axial segments are present, create a universe for the subdivided
-    # fuel. Otherwise just use a plain material.
-    if ring_radii is not None or num_axial > 1:
-        fuel_fill = subdivided_fuel(mats['UO2 1.6 {}'.format(fuel)])
-    else:
-        fuel_fill = mats['UO2 1.6 {}'.format(fuel)]
-
-    outside_pin_surfaces = [surfs['clad IR'], surfs['clad OR']]
-    outside_pin_mats = [mats['He'], mats['M5'], mats['H2O']]
-
-    univs['Outside pin'] = make_pin(
-        'Outside pin',
-        surfaces=outside_pin_surfaces,
-        materials=outside_pin_mats)
-
-    univs['Outside pin grid (bottom)'] = make_pin(
-        'Outside pin grid (bottom)',
-        surfaces=outside_pin_surfaces,
-        materials=outside_pin_mats,
-        grid='bottom')
-
-    univs['Outside pin grid (intermediate)'] = make_pin(
-        'Outside pin grid (intermediate)',
-        surfaces=outside_pin_surfaces,
-        materials=outside_pin_mats,
-        grid='intermediate')
-
-    univs['Fuel pin (1.6%) no grid'] = make_pin(
-        'Pin no grid',
-        surfaces=[surfs['pellet OR']] + outside_pin_surfaces,
-        materials=[fuel_fill] + outside_pin_mats
-    )
-
-    # Stack all axial pieces of 1.6% enriched fuel pin cell
-
-    within_fuel_surfs = [
-        surfs['grid1bot'],
-        surfs['grid1top'],
-        surfs['dashpot top'],
-        surfs['grid2bot'],
-        surfs['grid2top'],
-        surfs['grid3bot'],
-        surfs['grid3top'],
-        surfs['grid4bot'],
-        surfs['grid4top']
-    ]
+    def _record_unsubdivided_fuel(self, fill, *universes):
+        # When fuel isn't subdivided, the fuel cells are those within the pin
+        # universes that are filled directly with the fuel material
+        if isinstance(fill, openmc.Material):
+            for univ in universes:
+                for cell in univ.cells.values():
+                    if cell.fill is fill:
+                        self._record_fuel(cell, 0, 0)
+
+    def _build_fuel(self, enrichment):
+        univs = self
+        surfs = self.surfs
+        fuel = 'depleted' if self.depleted else 'fresh'
+        material = mats['UO2 {} {}'.format(enrichment, fuel)]
+
+        # If rings/axial segments are present, create a universe for the subdivided
+        # fuel. Otherwise just use a plain material.
+        if self.ring_radii is not None or self.num_axial > 1:
+            fuel_fill = self._subdivided_fuel(material)
+        else:
+            fuel_fill = material
+
+        if enrichment == '3.1' and self.num_axial > 1 and self.axial_lattice:
+            # Subdivide the water around 3.1% fuel pins axially as well
+            segments = []
+            for i in range(self.num_axial):
+                cell = openmc.Cell(fill=mats['H2O'], name=f'Water ({i})')
+                segments.append(openmc.Universe(cells=[cell]))
+            water_fill = self._axial_lattice(segments)
+        elif enrichment == '3.1' and self.num_axial > 1:
+            # Subdivide the water around 3.1% fuel pins axially as well
+            axial_surfs, _ = self._fuel_subdivision()
+            water_cells = []
+            for i, r in enumerate(subdivide(axial_surfs)):
+                cell = openmc.Cell(fill=mats['H2O'], region=r, name=f'Water ({i})')
+                water_cells.append(cell)
+            water_fill = openmc.Universe(cells=water_cells)
+        else:
+            water_fill = mats['H2O']
+
+        outside_pin_surfaces = [surfs['clad IR'], surfs['clad OR']]
+
+        univs['Fuel pin ({}%) no grid'.format(enrichment)] = self._make_pin(
+            'Pin no grid',
+            surfaces=[surfs['pellet OR']] + outside_pin_surfaces,
+            materials=[fuel_fill, mats['He'], mats['M5'], water_fill]
+        )
+
+        # Stack all axial pieces of fuel pin cell
+
+        univs['Fuel pin ({}%) stack'.format(enrichment)] = self._make_pin_stack(
+            'Fuel pin ({}%) stack'.format(enrichment),
+            zsurfaces=_within_fuel_surfaces(surfs),
+            universes=[
+                univs['Outside pin'],
+                univs['Outside pin grid (bottom)'],
+                univs['Outside pin'],
+                univs['Outside pin'],
+                univs['Outside pin grid (intermediate)'],
+                univs['Outside pin'],
+                univs['Outside pin grid (intermediate)'],
+                univs['Outside pin'],
+                univs['Outside pin grid (intermediate)'],
+                univs['Outside pin']
+            ],
+            boundary=surfs['pellet OR'],
+            fuel_fill=fuel_fill)
+
+        self._record_unsubdivided_fuel(
+            fuel_fill, univs['Fuel pin ({}%) no grid'.format(enrichment)],
+            univs['Fuel pin ({}%) stack'.format(enrichment)])
+
+        univs['Fuel ({}%) stack'.format(enrichment)] = self._make_stack(
+            'Fuel ({}%) stack'.format(enrichment),
+            surfaces=_fuel_stack_surfaces(surfs),
+            universes=[univs['water pin'],
+                       univs['SS pin'],
+                       univs['SS pin'],
+                       univs['end plug'],
+                       univs['Fuel pin ({}%) stack'.format(enrichment)],
+                       univs['pin plenum'],
+                       univs['pin plenum grid (intermediate)'],
+                       univs['pin plenum'],
+                       univs['end plug'],
+                       univs['water pin'],
+                       univs['SS pin'],
+                       univs['water pin']],
+            **self._fuel_stack_lattice())
+
+
+# Pin universes already created, keyed by the parameters passed to
+# pin_universes()
+_pin_cache = {}
+
+
+def pin_universes(ring_radii=None, num_axial=196, depleted=False,
+                  fuel_regions=None, params=None, axial_lattice=False,
+                  lattice_stacks=False):
+    """Generate universes for SMR fuel pins.
 
-    univs['Fuel pin (1.6%) stack'] = make_pin_stack(
-        'Fuel pin (1.6%) stack',
-        zsurfaces=within_fuel_surfs,
-        universes=[
-            univs['Outside pin'],
-            univs['Outside pin grid (bottom)'],
-            univs['Outside pin'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin']
-        ],
-        boundary=surfs['pellet OR'],
-        fuel_fill=fuel_fill)
-
-    fuel_stack_surfs = [
-        surfs['bot support plate'],
-        surfs['top support plate'],
-        surfs['top lower nozzle'],
-        surfs['top lower thimble'],
-        surfs['top active core'],
-        surfs['grid5bot'],
-        surfs['grid5top'],
-        surfs['top pin plenum'],
-        surfs['top FR'],
-        surfs['bot upper nozzle'],
-        surfs['top upper nozzle']
-    ]
+    Universes are created only when they are first looked up in the returned
+    dictionary, and calls with the same parameters return the same dictionary
+    so that repeated or partial builds within a process reuse universes that
+    already exist. Call :func:`clear_cache` to start over, e.g. after
+    modifying the returned universes.
+
+    Parameters
+    ----------
+    ring_radii : iterable of float
+        Radii of rings in fuel (note that this doesn't need to include the
+        full fuel pin radius)
+    num_axial : int
+        Number of axial subdivisions in fuel
+    depleted : bool
+        Whether fuel should contain nuclides as though it were depleted
+    fuel_regions : FuelRegions, optional
+        If given, a row is appended to this table for every fuel cell created,
+        including fuel cells created by earlier calls with the same parameters
+    params : smr.surfaces.GeometryParameters, optional
+        Geometric parameters of the model. Defaults to
+        :data:`smr.surfaces.DEFAULT_PARAMETERS`.
+    axial_lattice : bool
+        Whether axial segments of fuel are placed in a lattice stacked in z,
+        which makes finding the segment containing a point independent of the
+        number of segments. The fuel regions are the same either way.
+    lattice_stacks : bool
+        Whether axial stacks of pin cells are indexed by a z-lattice rather
+        than bounded by planes. Universes of non-fuel layers then have an
+        instance for every lattice element they fill.
 
-    univs['Fuel (1.6%) stack'] = make_stack(
-        'Fuel (1.6%) stack',
-        surfaces=fuel_stack_surfs,
-        universes=[univs['water pin'],
-                   univs['SS pin'],
-                   univs['SS pin'],
-                   univs['end plug'],
-                   univs['Fuel pin (1.6%) stack'],
-                   univs['pin plenum'],
-                   univs['pin plenum grid (intermediate)'],
-                   univs['pin plenum'],
-                   univs['end plug'],
-                   univs['water pin'],
-                   univs['SS pin'],
-                   univs['water pin']])
-
-
-    #### 2.4% ENRICHED FUEL PIN CELL
-
-    # If rings/axial segments are present, create a universe for the subdivided
-    # fuel. Otherwise just use a plain material.
-    if ring_radii is not None or num_axial > 1:
-        fuel_fill = subdivided_fuel(mats['UO2 2.4 {}'.format(fuel)])
-    else:
-        fuel_fill = mats['UO2 2.4 {}'.format(fuel)]
-
-    univs['Fuel pin (2.4%) no grid'] = make_pin(
-        'Pin no grid',
-        surfaces=[surfs['pellet OR']] + outside_pin_surfaces,
-        materials=[fuel_fill] + outside_pin_mats
-    )
-
-    # Stack all axial pieces of 2.4% enriched fuel pin cell
-
-    univs['Fuel pin (2.4%) stack'] = make_pin_stack(
-        'Fuel pin (2.4%) stack',
-        zsurfaces=within_fuel_surfs,
-        universes=[
-            univs['Outside pin'],
-            univs['Outside pin grid (bottom)'],
-            univs['Outside pin'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin']
-        ],
-        boundary=surfs['pellet OR'],
-        fuel_fill=fuel_fill)
-
-    univs['Fuel (2.4%) stack'] = make_stack(
-        'Fuel (2.4%) stack',
-        surfaces=fuel_stack_surfs,
-        universes=[univs['water pin'],
-                   univs['SS pin'],
-                   univs['SS pin'],
-                   univs['end plug'],
-                   univs['Fuel pin (2.4%) stack'],
-                   univs['pin plenum'],
-                   univs['pin plenum grid (intermediate)'],
-                   univs['pin plenum'],
-                   univs['end plug'],
-                   univs['water pin'],
-                   univs['SS pin'],
-                   univs['water pin']])
-
-
-    #### 3.1% ENRICHED FUEL PIN CELL
-
-    # If rings/axial segments are present, create a universe for the subdivided
-    # fuel. Otherwise just use a plain material.
-    if ring_radii is not None or num_axial > 1:
-        fuel_fill = subdivided_fuel(mats['UO2 3.1 {}'.format(fuel)])
-    else:
-        fuel_fill = mats['UO2 3.1 {}'.format(fuel)]
-
-    if num_axial > 1:
-        water_cells = []
-        for i, r in enumerate(subdivide(axial_surfs)):
-            cell = openmc.Cell(fill=mats['H2O'], region=r, name=f'Water ({i})')
-            water_cells.append(cell)
-        water_fill = openmc.Universe(cells=water_cells)
-    else:
-        water_fill = mats['H2O']
-
-    univs['Fuel pin (3.1%) no grid'] = make_pin(
-        'Pin no grid',
-        surfaces=[surfs['pellet OR']] + outside_pin_surfaces,
-        materials=[fuel_fill, mats['He'], mats['M5'], water_fill]
-    )
-
-    # Stack all axial pieces of 3.1% enriched fuel pin cell
-
-    univs['Fuel pin (3.1%) stack'] = make_pin_stack(
-        'Fuel pin (3.1%) stack',
-        zsurfaces=within_fuel_surfs,
-        universes=[
-            univs['Outside pin'],
-            univs['Outside pin grid (bottom)'],
-            univs['Outside pin'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin'],
-            univs['Outside pin grid (intermediate)'],
-            univs['Outside pin']
-        ],
-        boundary=surfs['pellet OR'],
-        fuel_fill=fuel_fill)
-
-    univs['Fuel (3.1%) stack'] = make_stack(
-        'Fuel (3.1%) stack',
-        surfaces=fuel_stack_surfs,
-        universes=[univs['water pin'],
-                   univs['SS pin'],
-                   univs['SS pin'],
-                   univs['end plug'],
-                   univs['Fuel pin (3.1%) stack'],
-                   univs['pin plenum'],
-                   univs['pin plenum grid (intermediate)'],
-                   univs['pin plenum'],
-                   univs['end plug'],
-                   univs['water pin'],
-                   univs['SS pin'],
-                   univs['water pin']])
+    Returns
+    -------
+    PinUniverses
+        Dictionary mapping a universe name to a openmc.Universe object
 
+    """
+    if ring_radii is not None:
+        ring_radii = [float(r) for r in ring_radii]
+    if params is None:
+        params = DEFAULT_PARAMETERS
+    key = (None if ring_radii is None else tuple(ring_radii), num_axial,
+           bool(depleted), params, bool(axial_lattice), bool(lattice_stacks))
+    if key not in _pin_cache:
+        _pin_cache[key] = PinUniverses(ring_radii, num_axial, depleted, params,
+                                       axial_lattice, lattice_stacks)
+    univs = _pin_cache[key]
+
+    if fuel_regions is not None:
+        univs.add_fuel_regions(fuel_regions)
     return univs
+
+
+def clear_cache():
+    """Discard pin universes created by previous calls to pin_universes()."""
+    _pin_cache.clear()
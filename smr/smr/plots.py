@@ -1,7 +1,14 @@
-"""Instantiate OpenMC Plots to visualize the core model."""
+"""Instantiate OpenMC Plots to visualize the core model.
+
+Slice plots can also be rendered directly from a geometry in memory with
+:func:`render_plot`, which finds the material or cell at each pixel with a
+:class:`smr.locate.PointLocator` instead of running OpenMC in plot mode.
+
+"""
 
 from random import randint, seed
 
+import numpy as np
 import openmc
 
 from .surfaces import lowest_extent, highest_extent, lattice_pitch, rpv_OR, \
@@ -9,24 +16,37 @@ from .surfaces import lowest_extent, highest_extent, lattice_pitch, rpv_OR, \
 from .materials import mats
 
 
-# color specifications
-colors = {
-    mats['H2O']: (198, 226, 255),  # light blue
-    mats['In']: (101, 101, 101),  # dgray
-    mats['CS']: (  0,   0,   0),  # carbons black
-    mats['Zr']: (201, 201, 201),  # gray
-    mats['SS']: (  0,   0,   0),  # black
-    mats['Air']: (255, 255, 255),  # white
-    mats['He']: (255, 218, 185),  # light orange
-    mats['BSG']: (  0, 255,   0),  # green
-    mats['AIC']: (255,   0,   0),  # bright red
-    mats['UO2 1.6 fresh']: (142,  35,  35),  # light red
-    mats['UO2 2.4 fresh']: (255, 215,   0),  # gold
-    mats['UO2 3.1 fresh']: (  0,   0, 128)   # dark blue
-}
+def _core_colors():
+    """Return color specifications for the materials in the core model."""
+    return {
+        mats['H2O']: (198, 226, 255),  # light blue
+        mats['In']: (101, 101, 101),  # dgray
+        mats['CS']: (  0,   0,   0),  # carbons black
+        mats['Zr']: (201, 201, 201),  # gray
+        mats['SS']: (  0,   0,   0),  # black
+        mats['Air']: (255, 255, 255),  # white
+        mats['He']: (255, 218, 185),  # light orange
+        mats['BSG']: (  0, 255,   0),  # green
+        mats['AIC']: (255,   0,   0),  # bright red
+        mats['UO2 1.6 fresh']: (142,  35,  35),  # light red
+        mats['UO2 2.4 fresh']: (255, 215,   0),  # gold
+        mats['UO2 3.1 fresh']: (  0,   0, 128)   # dark blue
+    }
+
+
+def __getattr__(name):
+    # Materials are only created when the colors are first needed
+    if name == 'colors':
+        global colors
+        colors = _core_colors()
+        return colors
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
 
 
 def core_plots():
+    colors = _core_colors()
+
     # Create a collection of plots
     plots = openmc.Plots()
 
@@ -132,3 +152,94 @@ def assembly_plots(univ):
     assm.pixels = (2000, 2000)
 
     return openmc.Plots([pin, assm])
+
+
+# Axes spanned by the horizontal and vertical direction of each plot basis
+_BASIS_AXES = {'xy': (0, 1), 'xz': (0, 2), 'yz': (1, 2)}
+
+
+def plot_points(plot):
+    """Return the point at the center of each pixel of a slice plot.
+
+    Parameters
+    ----------
+    plot : openmc.Plot
+        Slice plot
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of shape (rows, columns, 3) with rows ordered from the top of
+        the image down, as in OpenMC
+
+    """
+    h, v = _BASIS_AXES[plot.basis]
+    columns, rows = plot.pixels[:2]
+    width = np.asarray(plot.width[:2], dtype=float)
+    origin = np.asarray(plot.origin, dtype=float)
+    xyz = np.empty((rows, columns, 3))
+    xyz[...] = origin
+    xyz[:, :, h] += width[0]*((np.arange(columns) + 0.5)/columns - 0.5)
+    xyz[:, :, v] += width[1]*(0.5 - (np.arange(rows) + 0.5)/rows)[:, None]
+    return xyz
+
+
+def _random_colors(ids):
+    """Return a color for each ID that is the same from run to run."""
+    colors = np.empty((len(ids), 3), dtype=np.uint8)
+    for i, uid in enumerate(ids):
+        colors[i] = np.random.default_rng(max(uid, 0)).integers(0, 256, 3)
+    return colors
+
+
+def render_plot(plot, locator):
+    """Render a slice plot without running OpenMC.
+
+    Pixels are colored by the material or cell at their center using the
+    colors of the plot. Materials and cells without a color are given a
+    random one, and void and points outside the geometry have the background
+    color.
+
+    Parameters
+    ----------
+    plot : openmc.Plot
+        Slice plot
+    locator : smr.locate.PointLocator
+        Locator for the geometry to plot
+
+    Returns
+    -------
+    numpy.ndarray
+        RGB image of shape (rows, columns, 3)
+
+    """
+    xyz = plot_points(plot)
+    cells, materials = locator.locate(xyz.reshape(-1, 3))
+    ids = materials if plot.color_by == 'material' else cells
+
+    unique, inverse = np.unique(ids, return_inverse=True)
+    palette = _random_colors(unique)
+    for key, color in (plot.colors or {}).items():
+        uid = key if isinstance(key, int) else key.id
+        palette[unique == uid] = color[:3]
+    background = plot.background if plot.background is not None \
+        else (255, 255, 255)
+    palette[unique < 0] = background
+    return palette[inverse.ravel()].reshape(xyz.shape)
+
+
+def write_ppm(image, path):
+    """Write an RGB image as a binary portable pixmap.
+
+    Parameters
+    ----------
+    image : numpy.ndarray
+        RGB image of shape (rows, columns, 3)
+    path : str or pathlib.Path
+        Path of the file to write
+
+    """
+    rows, columns, _ = image.shape
+    with open(path, 'wb') as fh:
+        fh.write('P6\n{} {}\n255\n'.format(columns, rows).encode())
+        fh.write(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
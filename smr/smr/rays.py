@@ -0,0 +1,277 @@
+"""Trace batches of straight rays through a geometry without running OpenMC.
+
+The time OpenMC spends on a particle history is dominated by finding the
+distance to the next surface and relocating the particle after crossing it,
+so the number of surface crossings per unit of path length is a good measure
+of the tracking cost of a discretization. :func:`trace_rays` follows rays
+through a geometry with a :class:`smr.locate.PointLocator`, stopping at every
+cell boundary and lattice element boundary as OpenMC does, and records the
+path length, number of segments, and number of chords in each material.
+
+Rays from :func:`random_rays` cross a box with a uniform isotropic flux, so
+the path length in a material is proportional to its volume and the mean
+chord length of a material is 4V/S for its volume V and surface area S
+(Cauchy's formula).
+
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .locate import _distance
+
+
+def _sample_rays(rng, center, half_width, num_rays):
+    """Sample lines with a uniform isotropic flux and clip them to a box."""
+    radius = np.linalg.norm(half_width)
+
+    mu = rng.uniform(-1., 1., num_rays)
+    phi = rng.uniform(0., 2*np.pi, num_rays)
+    sin_theta = np.sqrt(1. - mu**2)
+    directions = np.column_stack(
+        (sin_theta*np.cos(phi), sin_theta*np.sin(phi), mu))
+
+    # Orthonormal basis of the plane perpendicular to each direction
+    e1 = np.column_stack((-np.sin(phi), np.cos(phi), np.zeros(num_rays)))
+    e2 = np.cross(directions, e1)
+    rho = radius*np.sqrt(rng.uniform(size=num_rays))
+    alpha = rng.uniform(0., 2*np.pi, num_rays)
+    points = (center + (rho*np.cos(alpha))[:, None]*e1 +
+              (rho*np.sin(alpha))[:, None]*e2)
+
+    # Intersect each line with the box
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t1 = (center - half_width - points)/directions
+        t2 = (center + half_width - points)/directions
+    t_in = np.nanmax(np.minimum(t1, t2), axis=1)
+    t_out = np.nanmin(np.maximum(t1, t2), axis=1)
+    hit = t_out > t_in
+    origins = points[hit] + t_in[hit, None]*directions[hit]
+    return origins, directions[hit], (t_out - t_in)[hit]
+
+
+def random_rays(lower_left, upper_right, num_rays, seed=1):
+    """Sample rays crossing a box with a uniform isotropic flux.
+
+    Each ray has an isotropic direction and passes through a uniformly
+    sampled point of the disk perpendicular to it that covers the box. Rays
+    that miss the box are discarded and sampled again.
+
+    Parameters
+    ----------
+    lower_left, upper_right : iterable of float
+        Corners of the box in [cm]
+    num_rays : int
+        Number of rays
+    seed : int
+        Seed of the random number generator
+
+    Returns
+    -------
+    origins : numpy.ndarray
+        Point where each ray enters the box
+    directions : numpy.ndarray
+        Unit direction of each ray
+    lengths : numpy.ndarray
+        Length of each ray within the box in [cm]
+
+    """
+    rng = np.random.default_rng(seed)
+    lower_left = np.asarray(lower_left, dtype=float)
+    upper_right = np.asarray(upper_right, dtype=float)
+    center = (lower_left + upper_right)/2
+    half_width = (upper_right - lower_left)/2
+
+    batches = []
+    found = 0
+    while found < num_rays:
+        batch = _sample_rays(rng, center, half_width, 2*(num_rays - found))
+        batches.append(batch)
+        found += len(batch[0])
+    origins, directions, lengths = (np.concatenate(x) for x in zip(*batches))
+    return origins[:num_rays], directions[:num_rays], lengths[:num_rays]
+
+
+@dataclass
+class RayStatistics:
+    """Path length, segments, and chords of rays in each material.
+
+    A segment is the part of a ray between two consecutive surface or lattice
+    boundary crossings. A chord is the part of a ray between entering and
+    leaving a material, which may consist of several segments when
+    neighboring cells have the same material.
+
+    Attributes
+    ----------
+    rays : int
+        Number of rays traced
+    length : dict
+        Path length in [cm] in each material, keyed by material ID (-1 for
+        void)
+    segments : dict
+        Number of segments in each material
+    entries : dict
+        Number of times a ray entered each material from another one or
+        from outside the box it was traced over
+
+    """
+    rays: int = 0
+    length: dict = field(default_factory=dict)
+    segments: dict = field(default_factory=dict)
+    entries: dict = field(default_factory=dict)
+
+    @property
+    def total_length(self):
+        """Total path length in [cm]"""
+        return sum(self.length.values())
+
+    @property
+    def crossings(self):
+        """Number of surface and lattice boundary crossings"""
+        return sum(self.segments.values()) - self.rays
+
+    @property
+    def crossings_per_cm(self):
+        """Number of crossings per cm of path"""
+        length = self.total_length
+        return self.crossings/length if length > 0. else 0.
+
+    def mean_chord(self, material):
+        """Return the mean chord length of a material.
+
+        The path length in the material is divided by the number of times it
+        was entered. For rays from :func:`random_rays`, this estimates 4V/S,
+        where the surface area S includes the part of the material on the
+        boundary of the box.
+
+        Parameters
+        ----------
+        material : int
+            Material ID
+
+        Returns
+        -------
+        float
+            Mean chord length in [cm]
+
+        """
+        entries = self.entries.get(material, 0)
+        return self.length[material]/entries if entries else np.inf
+
+    def _add(self, attribute, keys, values=None):
+        totals = getattr(self, attribute)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=values,
+                           minlength=len(unique))
+        for key, value in zip(unique.tolist(), sums.tolist()):
+            totals[key] = totals.get(key, 0) + value
+
+    def report(self, names=None, top=20):
+        """Return a table of the materials with the most path length.
+
+        Parameters
+        ----------
+        names : dict, optional
+            Name of each material, keyed by material ID
+        top : int
+            Number of materials to list
+
+        Returns
+        -------
+        str
+            Multi-line report
+
+        """
+        names = names or {}
+        total = self.total_length
+        lines = ['Rays: {}, path length: {:.6g} cm, crossings per cm: '
+                 '{:.3f}'.format(self.rays, total, self.crossings_per_cm)]
+        lines.append('{:<30} {:>8} {:>12} {:>12}'.format(
+            'Material', 'Length', 'Mean chord', 'Segments/cm'))
+        materials = sorted(self.length, key=lambda m: -self.length[m])
+        for mat in materials[:top]:
+            name = 'void' if mat < 0 else names.get(mat, str(mat))
+            length = self.length[mat]
+            lines.append('{:<30} {:>8.2%} {:>12.4g} {:>12.3f}'.format(
+                name[:30], length/total, self.mean_chord(mat),
+                self.segments[mat]/length if length > 0. else 0.))
+        return '\n'.join(lines)
+
+
+def trace_rays(locator, origins, directions, lengths, nudge=1e-8):
+    """Follow rays through a geometry, stopping at every boundary.
+
+    Each ray is moved to the nearest boundary of the cell containing it and
+    just beyond, and the cell is found again, until the ray has traveled its
+    length. Rays outside the geometry, e.g. in the corners of a box around a
+    cylindrical model, are moved to the next surface bounding the cells of
+    the root universe, where they may enter the geometry; the path outside
+    is not recorded.
+
+    Parameters
+    ----------
+    locator : smr.locate.PointLocator
+        Locator for the geometry
+    origins : numpy.ndarray
+        Array of shape (N, 3) of starting points of the rays in [cm]
+    directions : numpy.ndarray
+        Array of shape (N, 3) of unit directions of the rays
+    lengths : numpy.ndarray
+        Length of each ray in [cm]
+    nudge : float
+        Distance in [cm] that rays are moved past each boundary
+
+    Returns
+    -------
+    RayStatistics
+        Path length, segments, and chords in each material
+
+    """
+    # Start just inside the boundary rays enter through
+    directions = np.asarray(directions, dtype=float)
+    position = np.asarray(origins, dtype=float) + nudge*directions
+    remaining = np.asarray(lengths, dtype=float) - nudge
+    previous = np.full(len(position), -2)
+    stats = RayStatistics()
+
+    surfaces = {}
+    for cell in locator.root.cells.values():
+        if cell.region is not None:
+            surfaces.update(cell.region.get_surfaces())
+
+    active = np.arange(len(position))
+    while active.size > 0:
+        cells, materials, distances = locator.distance(
+            position[active], directions[active])
+
+        # Move rays outside the geometry to where they may enter it; those
+        # that cannot within their length are done
+        outside = active[cells < 0]
+        gap = np.full(outside.size, np.inf)
+        for surface in surfaces.values():
+            gap = np.minimum(gap, _distance(surface, position[outside],
+                                            directions[outside]))
+        outside, gap = outside[gap < remaining[outside]], \
+            gap[gap < remaining[outside]]
+        position[outside] += (gap + nudge)[:, None]*directions[outside]
+        remaining[outside] -= gap + nudge
+
+        inside = cells >= 0
+        active, materials, distances = \
+            active[inside], materials[inside], distances[inside]
+        stats.rays += np.count_nonzero(previous[active] == -2)
+
+        step = np.minimum(distances, remaining[active])
+        stats._add('length', materials, step)
+        stats._add('segments', materials)
+        entered = previous[active] != materials
+        stats._add('entries', materials[entered])
+        previous[active] = materials
+
+        position[active] += (step + nudge)[:, None]*directions[active]
+        remaining[active] -= step + nudge
+        active = np.concatenate((
+            active[(distances < np.inf) & (remaining[active] > 0.)], outside))
+
+    return stats
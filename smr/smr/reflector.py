@@ -9,13 +9,57 @@ converted to actual dimensions by scaling according to the width of an assembly.
 
 """
 
+import numpy as np
 import openmc
 
 from .materials import mats
-from smr import surfaces
+from .surfaces import DEFAULT_PARAMETERS, get_registry
 
 
-def make_reflector(name, parameters):
+def _overlaps(x, y, r, half_width):
+    """Return whether a circle overlaps a square centered on the origin."""
+    dx = max(abs(x) - half_width, 0.)
+    dy = max(abs(y) - half_width, 0.)
+    return np.hypot(dx, dy) < r
+
+
+def _partitioned_reflector(name, parameters, partitions, width, registry):
+    """Make a reflector block as a lattice of blocks with only nearby holes.
+
+    Each lattice element contains the water holes overlapping it, positioned
+    relative to the center of the element, so the holes are cut by the
+    element boundaries but their layout is unchanged.
+
+    """
+    pitch = width/partitions
+    elements = {}
+    universes = np.empty((partitions, partitions), dtype=openmc.Universe)
+    for i in range(partitions):
+        # The first row of a lattice is at the top
+        yc = width/2 - (i + 0.5)*pitch
+        for j in range(partitions):
+            xc = -width/2 + (j + 0.5)*pitch
+            holes = tuple((x - xc, y - yc, r) for x, y, r in parameters
+                          if _overlaps(x - xc, y - yc, r, pitch/2))
+            if holes not in elements:
+                elements[holes] = make_reflector(
+                    '{} [{},{}]'.format(name, i, j), holes, registry=registry)
+            universes[i, j] = elements[holes]
+
+    lattice = openmc.RectLattice(name='reflector {}'.format(name))
+    lattice.lower_left = (-width/2, -width/2)
+    lattice.pitch = (pitch, pitch)
+    lattice.universes = universes
+    # Points within round-off of the edge of the block fall outside of the
+    # lattice and are in steel unless they are in a hole
+    lattice.outer = make_reflector('{} (outer)'.format(name), parameters,
+                                   registry=registry)
+
+    cell = openmc.Cell(name='reflector {}'.format(name), fill=lattice)
+    return openmc.Universe(name='reflector {}'.format(name), cells=[cell])
+
+
+def make_reflector(name, parameters, partitions=1, width=None, registry=None):
     """Make an assembly-sized heavy neutron reflector block with cooling holes.
 
     Parameters
@@ -25,6 +69,17 @@ def make_reflector(name, parameters):
     parameters : iterable of 3-tuples
         Iterable containing tuple with the (x,y) coordinates of the center and
         the radius of a Z-cylinder and the
+    partitions : int
+        Number of blocks in x and y that the block is divided into. With more
+        than one, the block is a lattice whose elements only contain the
+        holes overlapping them, so that locating a point in the steel only
+        involves the nearby holes.
+    width : float, optional
+        Width of the block in [cm]. Required if `partitions` is greater than
+        one.
+    registry : smr.surfaces.SurfaceRegistry, optional
+        Registry through which the surfaces of the holes are created.
+        Defaults to the registry for the default parameters.
 
     Returns
     -------
@@ -32,13 +87,25 @@ def make_reflector(name, parameters):
         Universe containing reflector block
 
     """
+    if registry is None:
+        registry = get_registry()
+    if partitions > 1:
+        if width is None:
+            raise ValueError('The width of reflector block "{}" is needed to '
+                             'partition it.'.format(name))
+        return _partitioned_reflector(name, parameters, partitions, width,
+                                      registry)
+
     water_holes = []
     for x, y, r in parameters:
-        zcyl = openmc.ZCylinder(x0=x, y0=y, r=r)
+        zcyl = registry.intern(openmc.ZCylinder(x0=x, y0=y, r=r))
         hole = openmc.Cell(fill=mats['H2O'], region=-zcyl)
         water_holes.append(hole)
 
-    ss_region = openmc.Intersection(~c.region for c in water_holes)
+    if water_holes:
+        ss_region = openmc.Intersection(~c.region for c in water_holes)
+    else:
+        ss_region = None
     ss_cell = openmc.Cell(name='reflector {} SS'.format(name), fill=mats['SS'],
                           region=ss_region)
 
@@ -48,15 +115,17 @@ def make_reflector(name, parameters):
     return univ
 
 
-def reflector_universes():
+def reflector_universes(params=None, partitions=1):
     """Generate universes for SMR heavy neutron reflector blocks.
 
     Parameters
     ----------
-    num_rings : int
-        Number of annual regions in fuel
-    num_axial : int
-        Number of axial subdivisions in fuel
+    params : smr.surfaces.GeometryParameters, optional
+        Geometric parameters of the model. The reflector blocks are scaled to
+        the lattice pitch.
+    partitions : int
+        Number of blocks in x and y that each reflector block is divided into
+        (see :func:`make_reflector`)
 
     Returns
     -------
@@ -91,7 +160,10 @@ def reflector_universes():
 
     # All pixel widths are scaled according to the actual width of an assembly
     # divided by the width of an assembly in pixels
-    lattice_pitch = surfaces.lattice_pitch
+    if params is None:
+        params = DEFAULT_PARAMETERS
+    lattice_pitch = params.lattice_pitch
+    registry = get_registry(params)
     scale = lattice_pitch/width
 
     # Physical positions
@@ -121,22 +193,24 @@ def reflector_universes():
     r1 = scale*d_small/2
     r2 = scale*d_large/2
 
-    params = [
+    holes = [
         (x1, y1, r1), (x2, y1, r1), (x3, y1, r1), (x4, y1, r2),
         (x4, y2, r1), (x4, y3, r1), (x4, y4, r1), (x5, y5, r1),
         (x6, y6, r1), (x7, y7, r1), (x8, y8, r1), (x9, y9, r1),
         (x1, y10, r1)
     ]
-    univs['NW'] = make_reflector('NW', params)
+    univs['NW'] = make_reflector('NW', holes, partitions, lattice_pitch,
+                                  registry)
 
     # Reflector at (1, 1)
 
-    params = [
+    holes = [
         (x4, y1, r1),
         (lattice_pitch/2 - scale*103, -lattice_pitch/2 + scale*156, r1),
         (lattice_pitch/2 - scale*158, -lattice_pitch/2 + scale*103, r1)
     ]
-    univs['1,1'] = make_reflector('1,1', params)
+    univs['1,1'] = make_reflector('1,1', holes, partitions, lattice_pitch,
+                                  registry)
 
     # Left reflector (4,0)
 
@@ -151,20 +225,21 @@ def reflector_universes():
     x3 = -lattice_pitch/2 + scale*(width - left3)
     y3 = scale*up3
 
-    params = [
+    holes = [
         (x1, 0, r1), (x1, d_y, r1), (x1, 2*d_y, r1), (x1, -d_y, r1), (x1, -2*d_y, r1),
         (x2, d_y/2, r1), (x2, 3/2*d_y, r1), (x2, -d_y/2, r1), (x2, -3/2*d_y, r1),
         (x3, y3, r1), (x3, -y3, r1)
        ]
-    univs['4,0'] = make_reflector('4,0', params)
+    univs['4,0'] = make_reflector('4,0', holes, partitions, lattice_pitch,
+                                  registry)
 
     # Reflector at (3,0)
 
-    params = []
+    holes = []
     for i in range(2, 7):
-        params.append((x1, i*d_y - lattice_pitch, r1))
+        holes.append((x1, i*d_y - lattice_pitch, r1))
     for i in (5, 7, 11):
-        params.append((x2, i*d_y/2 - lattice_pitch, r1))
+        holes.append((x2, i*d_y/2 - lattice_pitch, r1))
 
     left3 = 140
     left4 = 183
@@ -175,19 +250,22 @@ def reflector_universes():
     y3 = -lattice_pitch/2 + scale*up3
     x4 = -lattice_pitch/2 + scale*(width - left4)
     y4 = -lattice_pitch/2 + scale*up4
-    params += [(x3, y3, r1), (x4, y4, r1)]
+    holes += [(x3, y3, r1), (x4, y4, r1)]
 
-    univs['3,0'] = make_reflector('3,0', params)
+    univs['3,0'] = make_reflector('3,0', holes, partitions, lattice_pitch,
+                                  registry)
 
     # Reflector at (5,0)
-    params = [(x, -y, r) for x, y, r in params]
-    univs['5,0'] = make_reflector('5,0', params)
+    holes = [(x, -y, r) for x, y, r in holes]
+    univs['5,0'] = make_reflector('5,0', holes, partitions, lattice_pitch,
+                                  registry)
 
     # Reflector at (2, 0)
 
-    params = [(-lattice_pitch/2 + scale*(width - 78),
-               -lattice_pitch/2 + scale*98, r1)]
-    univs['2,0'] = make_reflector('2,0', params)
+    holes = [(-lattice_pitch/2 + scale*(width - 78),
+              -lattice_pitch/2 + scale*98, r1)]
+    univs['2,0'] = make_reflector('2,0', holes, partitions, lattice_pitch,
+                                  registry)
 
     ################################################################################
     # Beyond this point, all universes are just copies of the ones previously
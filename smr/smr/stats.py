@@ -0,0 +1,504 @@
+"""Structural statistics of a model geometry.
+
+The memory OpenMC needs for a model and the cost of tracking particles through
+it are largely determined by the structure of its geometry: how many cells,
+surfaces, universes, and lattices there are and how deeply they are nested,
+how many cells must be searched in a universe, how many cells have regions
+that cannot be tested as a simple intersection, how many cell instances there
+are, and how many materials and nuclides they are filled with.
+:func:`geometry_statistics` gathers these numbers. Instances are counted from
+the lattice structure (see :mod:`smr.instances`) rather than by enumerating
+paths, so this is fast even for a full core.
+
+Where that time is spent depends on where particles travel, which
+:func:`tracking_costs` estimates for each universe from the volume it occupies,
+the half-spaces tested to find and leave a cell in it, and how often surfaces
+in it are crossed.
+
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field, asdict
+from typing import List
+
+import numpy as np
+import openmc
+
+from .instances import _count_universes, _lattice_universes
+from .materials import CloneRange
+from .optimize import _AXES, _cell_volume, _enclose, _lattice_array, \
+    _ordered_cells, _postorder, _reference_box, _region_box, _universe_boxes
+
+
+def _is_complex(region):
+    """Return whether a region contains a union or a complement."""
+    if region is None or isinstance(region, openmc.Halfspace):
+        return False
+    if isinstance(region, (openmc.Union, openmc.Complement)):
+        return True
+    return any(_is_complex(node) for node in region)
+
+
+@dataclass
+class LevelStatistics:
+    """Number of objects first used at a level of universe nesting.
+
+    Attributes
+    ----------
+    universes : int
+        Number of universes
+    cells : int
+        Number of cells in those universes
+    surfaces : int
+        Number of distinct surfaces bounding those cells that do not bound a
+        cell at a shallower level
+    lattices : int
+        Number of lattices filling those cells
+
+    """
+    universes: int = 0
+    cells: int = 0
+    surfaces: int = 0
+    lattices: int = 0
+
+
+@dataclass
+class GeometryStatistics:
+    """Structural statistics of a geometry.
+
+    Attributes
+    ----------
+    levels : list of LevelStatistics
+        Objects at each level of nesting, starting with the root universe.
+        Objects used at several levels are counted at the shallowest.
+    cells, surfaces, universes, lattices : int
+        Total number of each kind of object
+    max_cells : int
+        Largest number of cells in a universe
+    max_cells_universe : str
+        Name (or ID if unnamed) of the universe with the most cells
+    simple_cells : int
+        Number of cells whose region is an intersection of half-spaces
+    complex_cells : int
+        Number of cells whose region contains a union or complement
+    cell_instances : int
+        Total number of instances of all cells
+    material_instances : int
+        Total number of instances of cells filled with materials
+    materials : int
+        Number of distinct materials, counting each clone
+    nuclides : collections.Counter
+        Number of distinct materials with each number of nuclides
+
+    """
+    levels: List[LevelStatistics] = field(default_factory=list)
+    cells: int = 0
+    surfaces: int = 0
+    universes: int = 0
+    lattices: int = 0
+    max_cells: int = 0
+    max_cells_universe: str = ''
+    simple_cells: int = 0
+    complex_cells: int = 0
+    cell_instances: int = 0
+    material_instances: int = 0
+    materials: int = 0
+    nuclides: Counter = field(default_factory=Counter)
+
+    @property
+    def depth(self):
+        """Number of levels of universe nesting"""
+        return len(self.levels)
+
+    @property
+    def nuclide_entries(self):
+        """Total number of nuclides over all distinct materials"""
+        return sum(n*count for n, count in self.nuclides.items())
+
+    def to_dict(self):
+        """Return the statistics as a dictionary of plain Python objects."""
+        result = asdict(self)
+        result['nuclides'] = {str(n): count for n, count in
+                              sorted(self.nuclides.items())}
+        result['depth'] = self.depth
+        result['nuclide_entries'] = self.nuclide_entries
+        return result
+
+    def report(self):
+        """Return a human-readable summary of the statistics.
+
+        Returns
+        -------
+        str
+            Multi-line report
+
+        """
+        lines = ['{:>5} {:>10} {:>10} {:>10} {:>10}'.format(
+            'Level', 'Universes', 'Cells', 'Surfaces', 'Lattices')]
+        for i, level in enumerate(self.levels):
+            lines.append('{:>5} {:>10} {:>10} {:>10} {:>10}'.format(
+                i, level.universes, level.cells, level.surfaces,
+                level.lattices))
+        lines.append('{:>5} {:>10} {:>10} {:>10} {:>10}'.format(
+            'Total', self.universes, self.cells, self.surfaces, self.lattices))
+        lines.append('')
+        lines.append('Most cells in a universe: {} ({})'.format(
+            self.max_cells, self.max_cells_universe))
+        lines.append('Simple/complex cells: {}/{}'.format(
+            self.simple_cells, self.complex_cells))
+        lines.append('Cell instances: {} ({} filled with materials)'.format(
+            self.cell_instances, self.material_instances))
+        lines.append('Distinct materials: {}'.format(self.materials))
+        if self.nuclides:
+            counts = sorted(self.nuclides.elements())
+            lines.append('Nuclides per material: min {}, mean {:.1f}, max {} '
+                         '({} in total)'.format(
+                             counts[0], self.nuclide_entries/self.materials,
+                             counts[-1], self.nuclide_entries))
+        return '\n'.join(lines)
+
+
+def geometry_statistics(geometry):
+    """Determine structural statistics of a geometry.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to describe
+
+    Returns
+    -------
+    GeometryStatistics
+        Statistics of the geometry
+
+    """
+    if isinstance(geometry, openmc.Geometry):
+        root = geometry.root_universe
+    else:
+        root = geometry
+    univ_instances, _ = _count_universes(root)
+
+    stats = GeometryStatistics()
+    all_surfaces = set()
+    lattices = set()
+    materials = {}
+    clone_ranges = {}
+
+    # Visit universes breadth first so that each is assigned to the shallowest
+    # level it is used at
+    visited = {root.id}
+    level_universes = [root]
+    while level_universes:
+        level = LevelStatistics(universes=len(level_universes))
+        level_surfaces = set()
+        next_universes = []
+
+        def descend(univ):
+            if univ.id not in visited:
+                visited.add(univ.id)
+                next_universes.append(univ)
+
+        for univ in level_universes:
+            cells = univ.cells.values()
+            level.cells += len(cells)
+            if len(cells) > stats.max_cells:
+                stats.max_cells = len(cells)
+                stats.max_cells_universe = univ.name or str(univ.id)
+
+            n = univ_instances.get(univ.id, 0)
+            for cell in cells:
+                stats.cell_instances += n
+                if cell.region is not None:
+                    level_surfaces.update(cell.region.get_surfaces())
+                if _is_complex(cell.region):
+                    stats.complex_cells += 1
+                else:
+                    stats.simple_cells += 1
+
+                if cell.fill_type == 'universe':
+                    descend(cell.fill)
+                elif cell.fill_type == 'lattice':
+                    lattice = cell.fill
+                    if lattice.id not in lattices:
+                        lattices.add(lattice.id)
+                        level.lattices += 1
+                        for child in _lattice_universes(lattice):
+                            descend(child)
+                        if lattice.outer is not None:
+                            descend(lattice.outer)
+                elif cell.fill_type == 'material':
+                    stats.material_instances += n
+                    materials[cell.fill.id] = cell.fill
+                elif isinstance(cell.fill, CloneRange):
+                    stats.material_instances += n
+                    clone_ranges[cell.fill.first_id] = cell.fill
+                elif cell.fill_type == 'distribmat':
+                    stats.material_instances += n
+                    for mat in cell.fill:
+                        if mat is not None:
+                            materials[mat.id] = mat
+
+        level.surfaces = len(level_surfaces - all_surfaces)
+        all_surfaces |= level_surfaces
+        stats.levels.append(level)
+        level_universes = next_universes
+
+    stats.universes = len(visited)
+    stats.cells = sum(level.cells for level in stats.levels)
+    stats.surfaces = len(all_surfaces)
+    stats.lattices = len(lattices)
+
+    for mat in materials.values():
+        stats.nuclides[len(mat.nuclides)] += 1
+    for clones in clone_ranges.values():
+        stats.nuclides[len(clones.material.nuclides)] += len(clones)
+    stats.materials = sum(stats.nuclides.values())
+
+    return stats
+
+
+def _num_halfspaces(region):
+    """Return the number of half-spaces in a region."""
+    if region is None:
+        return 0
+    if isinstance(region, openmc.Halfspace):
+        return 1
+    if isinstance(region, openmc.Complement):
+        return _num_halfspaces(region.node)
+    return sum(_num_halfspaces(node) for node in region)
+
+
+def _surface_area(surface, box, samples=64):
+    """Estimate the area of the part of a surface within a box."""
+    width = box[1] - box[0]
+    if surface.type in _AXES:
+        axis, name = _AXES[surface.type]
+        if not box[0, axis] <= getattr(surface, name) <= box[1, axis]:
+            return 0.
+        return np.prod(np.delete(width, axis))
+    if surface.type == 'z-cylinder':
+        # Fraction of the circumference within the box in x and y
+        angles = 2*np.pi*(np.arange(samples) + 0.5)/samples
+        x = surface.x0 + surface.r*np.cos(angles)
+        y = surface.y0 + surface.r*np.sin(angles)
+        inside = ((x >= box[0, 0]) & (x <= box[1, 0]) &
+                  (y >= box[0, 1]) & (y <= box[1, 1]))
+        return 2*np.pi*surface.r*inside.mean()*width[2]
+    return 0.
+
+
+def _lattice_coverage(lattice, box):
+    """Return the fraction of a box that is within the elements of a lattice."""
+    array = _lattice_array(lattice)
+    lower = np.asarray(lattice.lower_left, dtype=float)
+    n = len(lower)
+    upper = lower + np.asarray(lattice.pitch, dtype=float)*array.shape[::-1]
+    width = box[1, :n] - box[0, :n]
+    if not np.all(width > 0.):
+        return 1.
+    overlap = np.minimum(box[1, :n], upper) - np.maximum(box[0, :n], lower)
+    return float(np.prod(np.clip(overlap, 0., width)/width))
+
+
+@dataclass
+class UniverseCost:
+    """Estimated share of tracking cost spent in a universe.
+
+    Attributes
+    ----------
+    name : str
+        Name (or ID if unnamed) of the universe
+    cells : int
+        Number of cells in the universe
+    volume_fraction : float
+        Fraction of the volume of the model in which the universe is used
+    lookup_tests : float
+        Expected number of half-spaces tested to find the cell containing a
+        point, testing cells in order
+    distance_tests : float
+        Expected number of half-spaces bounding the cell containing a point,
+        each of which is tested to find the distance to the cell boundary
+    crossings : float
+        Expected number of crossings per cm of surfaces of the universe, of
+        the lattice elements it fills, or of universes containing it
+    cost : float
+        Half-spaces tested per cm of path in the model on account of the
+        universe
+    fraction : float
+        Fraction of the cost of all universes
+
+    """
+    name: str
+    cells: int
+    volume_fraction: float
+    lookup_tests: float
+    distance_tests: float
+    crossings: float
+    cost: float = 0.
+    fraction: float = 0.
+
+
+def tracking_costs(geometry, sigma_t=1.0):
+    """Estimate the share of tracking cost spent in each universe.
+
+    Particles are assumed to be distributed uniformly and isotropically over
+    the model, so the path length in a universe is proportional to the volume
+    in which it is used and surfaces of total area A in a volume V are crossed
+    A/(2V) times per cm of path. At each step within a universe, the distance
+    to the boundary of the containing cell is found by testing its
+    half-spaces; steps end at collisions (`sigma_t` per cm) or surface
+    crossings. After each crossing of a surface of the universe or of one
+    containing it, the cell containing the particle is found again by testing
+    cells in order. Volumes of cells are estimated as in
+    :func:`smr.optimize.order_cells`, and the outer universe of a lattice is
+    used in the part of the volume of the lattice outside of its elements.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or openmc.Universe
+        Geometry or root universe to analyze, e.g. from
+        :func:`smr.core.core_geometry`
+    sigma_t : float
+        Macroscopic total cross section in [1/cm] used for the number of
+        collisions per cm
+
+    Returns
+    -------
+    list of UniverseCost
+        Cost of each universe, from most to least expensive
+
+    """
+    if isinstance(geometry, openmc.Geometry):
+        root = geometry.root_universe
+    else:
+        root = geometry
+    boxes = _universe_boxes(root)
+
+    order = [obj for obj in reversed(_postorder(root))]
+    root_box = _reference_box(root, boxes[root.id])
+    total_volume = np.prod(root_box[1] - root_box[0])
+
+    # Total volume in which each universe and lattice is used, and the sum over
+    # its uses of volume times crossings per cm of the containing universes
+    volumes = {root.id: total_volume}
+    outer_crossings = {root.id: 0.}
+    lattice_volumes = {}
+    lattice_crossings = {}
+    lattice_boxes = {}
+
+    costs = []
+    for obj in order:
+        if isinstance(obj, openmc.RectLattice):
+            volume = lattice_volumes[obj.id]
+            crossings = lattice_crossings[obj.id]/volume if volume else 0.
+            array = _lattice_array(obj)
+            # Planes between elements spaced p apart are crossed 1/(2p) times
+            # per cm
+            element_crossings = sum(0.5/p for p in obj.pitch)
+
+            # The outer universe is used in the part of the lattice's volume
+            # not covered by its elements
+            shares = {}
+            covered = volume
+            if obj.outer is not None and obj.id in lattice_boxes:
+                covered *= _lattice_coverage(obj, lattice_boxes[obj.id])
+                shares[obj.outer.id] = (obj.outer, volume - covered)
+            for univ in array.flat:
+                share = shares.get(univ.id, (univ, 0.))[1] + covered/array.size
+                shares[univ.id] = (univ, share)
+            for univ, share in shares.values():
+                volumes[univ.id] = volumes.get(univ.id, 0.) + share
+                outer_crossings[univ.id] = outer_crossings.get(univ.id, 0.) + \
+                    share*(crossings + element_crossings)
+            continue
+
+        univ = obj
+        volume = volumes.get(univ.id, 0.)
+        box = _reference_box(univ, boxes[univ.id])
+        cells = _ordered_cells(univ)
+        if not cells:
+            continue
+        cell_volumes = np.array([_cell_volume(c, box) for c in cells])
+        if cell_volumes.sum() > 0.:
+            fractions = cell_volumes/cell_volumes.sum()
+        else:
+            fractions = np.full(len(cells), 1/len(cells))
+        halfspaces = np.array([_num_halfspaces(c.region) for c in cells])
+
+        # Crossings per cm of the surfaces bounding cells of the universe
+        surfaces = {}
+        for cell in cells:
+            if cell.region is not None:
+                surfaces.update(cell.region.get_surfaces())
+        box_volume = np.prod(box[1] - box[0])
+        area = sum(_surface_area(s, box) for s in surfaces.values())
+        own_crossings = area/(2*box_volume)
+        crossings = own_crossings
+        if volume > 0.:
+            crossings += outer_crossings.get(univ.id, 0.)/volume
+
+        lookup = float(np.sum(fractions*np.cumsum(halfspaces)))
+        distance = float(np.sum(fractions*halfspaces))
+        cost = volume/total_volume*((sigma_t + crossings)*distance +
+                                    crossings*lookup)
+        costs.append(UniverseCost(
+            univ.name or str(univ.id), len(cells), volume/total_volume,
+            lookup, distance, crossings, cost))
+
+        for cell, fraction in zip(cells, fractions):
+            if cell.fill_type not in ('universe', 'lattice'):
+                continue
+            cell_volume = volume*fraction
+            if cell.fill_type == 'universe':
+                target_volumes, target_crossings = volumes, outer_crossings
+            else:
+                target_volumes = lattice_volumes
+                target_crossings = lattice_crossings
+                if cell.rotation is None:
+                    # Box in the coordinates of the lattice in which the
+                    # cell lies
+                    region_box = _region_box(cell.region)
+                    fill_box = np.array([np.maximum(box[0], region_box[0]),
+                                         np.minimum(box[1], region_box[1])])
+                    if cell.translation is not None:
+                        fill_box = fill_box - np.asarray(cell.translation)
+                    lattice_boxes[cell.fill.id] = _enclose(
+                        lattice_boxes.get(cell.fill.id), fill_box)
+            fill_id = cell.fill.id
+            target_volumes[fill_id] = target_volumes.get(fill_id, 0.) + \
+                cell_volume
+            target_crossings[fill_id] = target_crossings.get(fill_id, 0.) + \
+                cell_volume*crossings
+
+    total_cost = sum(c.cost for c in costs)
+    for c in costs:
+        c.fraction = c.cost/total_cost if total_cost > 0. else 0.
+    costs.sort(key=lambda c: c.cost, reverse=True)
+    return costs
+
+
+def format_costs(costs, top=20):
+    """Return a table of the most expensive universes.
+
+    Parameters
+    ----------
+    costs : list of UniverseCost
+        Costs as returned by :func:`tracking_costs`
+    top : int
+        Number of universes to list
+
+    Returns
+    -------
+    str
+        Multi-line table
+
+    """
+    lines = ['{:<40} {:>6} {:>8} {:>8} {:>8} {:>8} {:>7}'.format(
+        'Universe', 'Cells', 'Volume', 'Lookup', 'Distance', 'Cross/cm',
+        'Cost')]
+    for c in costs[:top]:
+        lines.append('{:<40} {:>6} {:>8.2%} {:>8.1f} {:>8.1f} {:>8.2f} '
+                     '{:>7.1%}'.format(c.name[:40], c.cells, c.volume_fraction,
+                                       c.lookup_tests, c.distance_tests,
+                                       c.crossings, c.fraction))
+    return '\n'.join(lines)
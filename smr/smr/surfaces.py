@@ -11,12 +11,26 @@ https://www.nrc.gov/docs/ML1700/ML17007A001.pdf
 NuScale DC application, chapter 1: https://www.nrc.gov/docs/ML1701/ML17013A264.pdf
 NuScale DC application, chapter 4: https://www.nrc.gov/docs/ML1701/ML17013A274.pdf
 
+The tabulated values are the defaults of :class:`GeometryParameters`. Model
+variants (e.g., a shortened core) are described by modified copies of
+:data:`DEFAULT_PARAMETERS` rather than by changing the values here, and
+:func:`get_surfaces` returns the surfaces for a given set of parameters.
+
+Surfaces created anywhere in a model are passed through the registry returned
+by :func:`get_registry` for its parameters so that coincident surfaces (e.g.,
+the top planes of all control rod banks) are represented by a single surface.
+
 """
 
-from math import tan, pi
+import dataclasses
+from dataclasses import dataclass
+from itertools import product
+from math import floor, tan, pi
+from typing import Optional
 
 import numpy as np
-import openmc
+
+from .lazy import LazyDict
 
 INCHES = 2.54
 
@@ -83,32 +97,6 @@ rpv_OR             = 105*INCHES/2   # ML17013A274, Table 5.3-1
 
 # axial parameters
 reference_z = -36.6205
-lowest_extent        = reference_z
-bottom_support_plate = lowest_extent + 20.000
-top_support_plate    = bottom_support_plate + 5.000
-bottom_lower_nozzle  = bottom_support_plate + 5.000
-top_lower_nozzle     = bottom_lower_nozzle + 4.0*INCHES
-bottom_fuel_rod      = bottom_lower_nozzle + 4.0*INCHES
-top_lower_thimble    = bottom_fuel_rod + lower_end_cap_length
-bottom_fuel_stack    = bottom_fuel_rod + lower_end_cap_length
-bot_burn_abs         = bottom_fuel_stack + 2.0*INCHES
-top_active_core = bottom_fuel_stack + active_fuel_length
-top_plenum = top_active_core + plenum_length
-top_fuel_rod = bottom_fuel_rod + fuel_rod_length
-bottom_upper_nozzle = top_fuel_rod + (423.049 - 419.704)     # BEAVRS, Fig. 32
-top_upper_nozzle = bottom_upper_nozzle + (431.876 - 423.049) # BEAVRS, Fig. 32
-highest_extent = top_upper_nozzle + 20.0
-
-# The grid spacer locations are eyeball estimated from Figure 3-1 in NuScale's
-# FA design certification doc, ML17007A001. This assumes 6cm and 2cm spacings
-# between the bottom and top of the fuel rods and the bottom and top grid
-# spacers.
-first_grid_bot = bottom_fuel_rod + 6.0
-last_grid_top = top_fuel_rod - 2.0
-last_grid_bot = last_grid_top - spacer_height
-
-grid_bottom = np.linspace(first_grid_bot, last_grid_bot, 5)
-grid_top = grid_bottom + spacer_height
 
 # control rod step heights - taken from BEAVRS, use with caution for NuScale
 step0H                =    46.079   # temporary value for now
@@ -125,109 +113,506 @@ neutron_shield_NEbot_SWtop = tan(-pi/3)
 neutron_shield_NEtop_SWbot = tan(-pi/6)
 
 
-surfs = {}
-
-surfs['pellet OR'] = openmc.ZCylinder(r=pellet_OR, name='Pellet OR')
-surfs['plenum spring OR'] = openmc.ZCylinder(r=plenum_spring_OR, name='FR Plenum Spring OR')
-surfs['clad IR'] = openmc.ZCylinder(r=clad_IR, name='Clad IR')
-surfs['clad OR'] = openmc.ZCylinder(r=clad_OR, name='Clad OR')
-surfs['GT IR'] = openmc.ZCylinder(r=guide_tube_IR, name='GT IR (above dashpot)')
-surfs['GT OR'] = openmc.ZCylinder(r=guide_tube_OR, name='GT OR (above dashpot)')
-surfs['GT dashpot IR'] = openmc.ZCylinder(r=guide_tube_dash_IR, name='GT IR (at dashpot)')
-surfs['GT dashpot OR'] = openmc.ZCylinder(r=guide_tube_dash_OR, name='GT OR (at dashpot)')
-surfs['CP OR'] = openmc.ZCylinder(r=boron_carbide_OR, name='Control Poison OR')
-surfs['CR IR'] = openmc.ZCylinder(r=control_rod_IR, name='CR Clad IR')
-surfs['CR OR'] = openmc.ZCylinder(r=control_rod_OR, name='CR Clad OR')
-surfs['BA IR 1'] = openmc.ZCylinder(r=burn_abs_r1, name='BA IR 1')
-surfs['BA IR 2'] = openmc.ZCylinder(r=burn_abs_r2, name='BA IR 2')
-surfs['BA IR 3'] = openmc.ZCylinder(r=burn_abs_r3, name='BA IR 3')
-surfs['BA IR 4'] = openmc.ZCylinder(r=burn_abs_r4, name='BA IR 4')
-surfs['BA IR 5'] = openmc.ZCylinder(r=burn_abs_r5, name='BA IR 5')
-surfs['BA IR 6'] = openmc.ZCylinder(r=burn_abs_r6, name='BA IR 6')
-surfs['BA IR 7'] = openmc.ZCylinder(r=burn_abs_r7, name='BA IR 7')
-surfs['BA IR 8'] = openmc.ZCylinder(r=burn_abs_r8, name='BA IR 8')
-surfs['IT IR'] = surfs['BA IR 5']
-surfs['IT OR'] = surfs['BA IR 6']
-
-# Rectangular prisms for grid spacers
-surfs['rod grid box'] = openmc.rectangular_prism(rod_grid_side, rod_grid_side)
-
-# Rectangular prisms for lattice grid sleeves
-surfs['lat grid box inner'] = openmc.rectangular_prism(17.*pin_pitch, 17.*pin_pitch)
-surfs['lat grid box outer'] = openmc.rectangular_prism(grid_strap_side, grid_strap_side)
-
-surfs['bot support plate'] = openmc.ZPlane(z0=bottom_support_plate, name='bot support plate')
-surfs['top support plate'] = openmc.ZPlane(z0=top_support_plate, name='top support plate')
-surfs['bottom FR'] = openmc.ZPlane(z0=bottom_fuel_rod, name='bottom FR')
-surfs['top lower nozzle'] = surfs['bottom FR']
-surfs['bot lower nozzle'] = surfs['top support plate']
-
-# axial surfaces
-surfs['bot active core'] = openmc.ZPlane(z0=bottom_fuel_stack, name='bot active core')
-surfs['top active core'] = openmc.ZPlane(z0=top_active_core, name='top active core')
-
-surfs['top lower thimble'] = surfs['bot active core']
-surfs['BA bot'] = openmc.ZPlane(z0=bot_burn_abs, name='bottom of BA')
-
-for i, (bottom, top) in enumerate(zip(grid_bottom, grid_top)):
-    # Create plane for bottom of spacer grid
-    key = 'grid{}bot'.format(i + 1)
-    name = 'bottom grid {}'.format(i + 1)
-    surfs[key] = openmc.ZPlane(z0=bottom, name=name)
-
-    # Create plane for top of spacer grid
-    key = 'grid{}top'.format(i + 1)
-    name = 'top of grid {}'.format(i + 1)
-    surfs[key] = openmc.ZPlane(z0=top, name=name)
-
-surfs['dashpot top'] = openmc.ZPlane(z0=step0H, name='top dashpot')
-
-surfs['top pin plenum'] = openmc.ZPlane(z0=top_plenum, name='top pin plenum')
-surfs['top FR'] = openmc.ZPlane(z0=top_fuel_rod, name='top FR')
-surfs['bot upper nozzle'] = openmc.ZPlane(z0=bottom_upper_nozzle, name='bottom upper nozzle')
-surfs['top upper nozzle'] = openmc.ZPlane(z0=top_upper_nozzle, name='top upper nozzle')
-
-# Control rod bank surfaces for ARO configuration
-for bank in ['A','B','C','D','E',]:
-    surfs['bankS{} top'.format(bank)] = openmc.ZPlane(
-        z0=step248H+step_width*228, name='CR bankS{} top'.format(bank))
-    surfs['bankS{} bot'.format(bank)] = openmc.ZPlane(
-        z0=step248H, name='CR bankS{} bottom'.format(bank))
-
-surfs['bankA top'] = openmc.ZPlane(z0=bank_top, name='CR bank A top')
-surfs['bankA bot'] = openmc.ZPlane(z0=bank_bot, name='CR bank A bottom')
-surfs['bankB top'] = openmc.ZPlane(z0=bank_top, name='CR bank B top')
-surfs['bankB bot'] = openmc.ZPlane(z0=bank_bot, name='CR bank B bottom')
-surfs['bankC top'] = openmc.ZPlane(z0=bank_top, name='CR bank C top')
-surfs['bankC bot'] = openmc.ZPlane(z0=bank_bot, name='CR bank C bottom')
-surfs['bankD top'] = openmc.ZPlane(z0=bank_top, name='CR bank D top')
-surfs['bankD bot'] = openmc.ZPlane(z0=bank_bot, name='CR bank D bottom')
-
-# outer radial surfaces
-surfs['core barrel IR'] = openmc.ZCylinder(r=core_barrel_IR, name='core barrel IR')
-surfs['core barrel OR'] = openmc.ZCylinder(r=core_barrel_OR, name='core barrel OR')
-surfs['neutron shield OR'] = openmc.ZCylinder(r=neutron_shield_OR, name='neutron shield OR')
-
-# neutron shield planes
-surfs['neutron shield NWbot SEtop'] = openmc.Plane(
-    a=1., b=neutron_shield_NWbot_SEtop, c=0., d=0.,
-    name='neutron shield NWbot SEtop')
-surfs['neutron shield NWtop SEbot'] = openmc.Plane(
-    a=1., b=neutron_shield_NWtop_SEbot, c=0., d=0.,
-    name='neutron shield NWtop SEbot')
-surfs['neutron shield NEbot SWtop'] = openmc.Plane(
-    a=1., b=neutron_shield_NEbot_SWtop, c=0., d=0.,
-    name='neutron shield NEbot SWtop')
-surfs['neutron shield NEtop SWbot'] = openmc.Plane(
-    a=1., b=neutron_shield_NEtop_SWbot, c=0., d=0.,
-    name='neutron shield NEtop SWbot')
-
-# outer radial surfaces
-surfs['RPV IR'] = openmc.ZCylinder(r=rpv_IR, name='RPV IR')
-surfs['RPV OR'] = openmc.ZCylinder(r=rpv_OR, name='RPV OR', boundary_type='vacuum')
-
-# outer axial surfaces
-surfs['upper bound'] = openmc.ZPlane(
-    z0=highest_extent, name='upper problem boundary', boundary_type='vacuum')
-surfs['lower bound'] = openmc.ZPlane(
-    z0=lowest_extent, name='lower problem boundary', boundary_type='vacuum')
+@dataclass(frozen=True)
+class GeometryParameters:
+    """Immutable set of geometric parameters defining the core model.
+
+    The default value of each parameter is the module-level constant of the
+    same name. Axial positions are derived from the parameters, so changing,
+    e.g., the active fuel length moves every plane above the fuel. Model
+    variants are described by modified copies (see :meth:`replace`) that are
+    passed to the functions building universes, each of which then uses its
+    own surfaces (see :func:`get_surfaces`).
+
+    Surfaces, surface registries, and pin and assembly universes are kept in
+    module-level caches that are not locked, and OpenMC assigns IDs from
+    global counters that are not thread-safe either. Models, whether for the
+    same or different parameters, must therefore not be built by several
+    threads at once; build them concurrently in separate processes, as
+    build-sweep.py does.
+
+    Attributes
+    ----------
+    lower_bound, upper_bound : float or None
+        z position of the lower and upper problem boundary in [cm]. Defaults
+        to :attr:`lowest_extent` and :attr:`highest_extent`.
+    axial_boundary_type : str
+        Boundary condition applied at the lower and upper problem boundary
+
+    """
+    # fuel rod parameters
+    pellet_OR: float = pellet_OR
+    pellet_length: float = pellet_length
+    clad_IR: float = clad_IR
+    clad_OR: float = clad_OR
+    active_fuel_length: float = active_fuel_length
+    plenum_length: float = plenum_length
+    fuel_rod_length: float = fuel_rod_length
+    lower_end_cap_length: float = lower_end_cap_length
+
+    # pin cell parameters
+    guide_tube_IR: float = guide_tube_IR
+    guide_tube_OR: float = guide_tube_OR
+    guide_tube_dash_IR: float = guide_tube_dash_IR
+    guide_tube_dash_OR: float = guide_tube_dash_OR
+    boron_carbide_OR: float = boron_carbide_OR
+    ag_in_cd_OR: float = ag_in_cd_OR
+    control_rod_IR: float = control_rod_IR
+    control_rod_OR: float = control_rod_OR
+    burn_abs_r1: float = burn_abs_r1
+    burn_abs_r2: float = burn_abs_r2
+    burn_abs_r3: float = burn_abs_r3
+    burn_abs_r4: float = burn_abs_r4
+    burn_abs_r5: float = burn_abs_r5
+    burn_abs_r6: float = burn_abs_r6
+    burn_abs_r7: float = burn_abs_r7
+    burn_abs_r8: float = burn_abs_r8
+    instr_tube_IR: float = instr_tube_IR
+    instr_tube_OR: float = instr_tube_OR
+    plenum_spring_OR: float = plenum_spring_OR
+
+    # grid spacer parameters
+    rod_grid_side: float = rod_grid_side
+    spacer_height: float = spacer_height
+
+    # assembly parameters
+    assembly_length: float = assembly_length
+    pin_pitch: float = pin_pitch
+    lattice_pitch: float = lattice_pitch
+    grid_strap_side: float = grid_strap_side
+    top_nozzle_height: float = top_nozzle_height
+    top_nozzle_width: float = top_nozzle_width
+
+    # core radial parameters
+    core_barrel_IR: float = core_barrel_IR
+    core_barrel_OR: float = core_barrel_OR
+    neutron_shield_OR: float = neutron_shield_OR
+    rpv_IR: float = rpv_IR
+    rpv_OR: float = rpv_OR
+
+    # axial parameters
+    reference_z: float = reference_z
+
+    # control rod step heights
+    step0H: float = step0H
+    step102H: float = step102H
+    step248H: float = step248H
+    step_width: float = step_width
+    bank_bot: float = bank_bot
+    bank_step: float = bank_step
+    bank_top: float = bank_top
+
+    # problem boundaries
+    lower_bound: Optional[float] = None
+    upper_bound: Optional[float] = None
+    axial_boundary_type: str = 'vacuum'
+
+    def replace(self, **changes):
+        """Return a copy with some parameters changed.
+
+        Parameters
+        ----------
+        **changes
+            New values of parameters, keyed by name
+
+        Returns
+        -------
+        GeometryParameters
+            Modified parameters
+
+        """
+        return dataclasses.replace(self, **changes)
+
+    @property
+    def lowest_extent(self):
+        return self.reference_z
+
+    @property
+    def bottom_support_plate(self):
+        return self.lowest_extent + 20.000
+
+    @property
+    def top_support_plate(self):
+        return self.bottom_support_plate + 5.000
+
+    @property
+    def bottom_lower_nozzle(self):
+        return self.bottom_support_plate + 5.000
+
+    @property
+    def top_lower_nozzle(self):
+        return self.bottom_lower_nozzle + 4.0*INCHES
+
+    @property
+    def bottom_fuel_rod(self):
+        return self.bottom_lower_nozzle + 4.0*INCHES
+
+    @property
+    def top_lower_thimble(self):
+        return self.bottom_fuel_rod + self.lower_end_cap_length
+
+    @property
+    def bottom_fuel_stack(self):
+        return self.bottom_fuel_rod + self.lower_end_cap_length
+
+    @property
+    def bot_burn_abs(self):
+        return self.bottom_fuel_stack + 2.0*INCHES
+
+    @property
+    def top_active_core(self):
+        return self.bottom_fuel_stack + self.active_fuel_length
+
+    @property
+    def top_plenum(self):
+        return self.top_active_core + self.plenum_length
+
+    @property
+    def top_fuel_rod(self):
+        return self.bottom_fuel_rod + self.fuel_rod_length
+
+    @property
+    def bottom_upper_nozzle(self):
+        return self.top_fuel_rod + (423.049 - 419.704)     # BEAVRS, Fig. 32
+
+    @property
+    def top_upper_nozzle(self):
+        return self.bottom_upper_nozzle + (431.876 - 423.049) # BEAVRS, Fig. 32
+
+    @property
+    def highest_extent(self):
+        return self.top_upper_nozzle + 20.0
+
+    # The grid spacer locations are eyeball estimated from Figure 3-1 in
+    # NuScale's FA design certification doc, ML17007A001. This assumes 6cm and
+    # 2cm spacings between the bottom and top of the fuel rods and the bottom
+    # and top grid spacers.
+    @property
+    def first_grid_bot(self):
+        return self.bottom_fuel_rod + 6.0
+
+    @property
+    def last_grid_top(self):
+        return self.top_fuel_rod - 2.0
+
+    @property
+    def last_grid_bot(self):
+        return self.last_grid_top - self.spacer_height
+
+    @property
+    def grid_bottom(self):
+        return np.linspace(self.first_grid_bot, self.last_grid_bot, 5)
+
+    @property
+    def grid_top(self):
+        return self.grid_bottom + self.spacer_height
+
+
+DEFAULT_PARAMETERS = GeometryParameters()
+
+# Axial positions for the default parameters
+lowest_extent        = DEFAULT_PARAMETERS.lowest_extent
+bottom_support_plate = DEFAULT_PARAMETERS.bottom_support_plate
+top_support_plate    = DEFAULT_PARAMETERS.top_support_plate
+bottom_lower_nozzle  = DEFAULT_PARAMETERS.bottom_lower_nozzle
+top_lower_nozzle     = DEFAULT_PARAMETERS.top_lower_nozzle
+bottom_fuel_rod      = DEFAULT_PARAMETERS.bottom_fuel_rod
+top_lower_thimble    = DEFAULT_PARAMETERS.top_lower_thimble
+bottom_fuel_stack    = DEFAULT_PARAMETERS.bottom_fuel_stack
+bot_burn_abs         = DEFAULT_PARAMETERS.bot_burn_abs
+top_active_core      = DEFAULT_PARAMETERS.top_active_core
+top_plenum           = DEFAULT_PARAMETERS.top_plenum
+top_fuel_rod         = DEFAULT_PARAMETERS.top_fuel_rod
+bottom_upper_nozzle  = DEFAULT_PARAMETERS.bottom_upper_nozzle
+top_upper_nozzle     = DEFAULT_PARAMETERS.top_upper_nozzle
+highest_extent       = DEFAULT_PARAMETERS.highest_extent
+first_grid_bot       = DEFAULT_PARAMETERS.first_grid_bot
+last_grid_top        = DEFAULT_PARAMETERS.last_grid_top
+last_grid_bot        = DEFAULT_PARAMETERS.last_grid_bot
+grid_bottom          = DEFAULT_PARAMETERS.grid_bottom
+grid_top             = DEFAULT_PARAMETERS.grid_top
+
+
+class SurfaceRegistry:
+    """Registry that returns a single surface for coincident surfaces.
+
+    Surfaces are coincident when they have the same type and boundary
+    condition and all of their coefficients agree to within an absolute
+    tolerance.
+
+    Parameters
+    ----------
+    tolerance : float
+        Largest difference in a coefficient for which two surfaces are
+        considered coincident
+
+    Attributes
+    ----------
+    merged : int
+        Number of surfaces that have been replaced by an existing surface
+
+    """
+    def __init__(self, tolerance=1e-10):
+        self.tolerance = tolerance
+        self.merged = 0
+        self._buckets = {}
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def _bins(self, values):
+        return tuple(floor(v/self.tolerance) for v in values)
+
+    def intern(self, surface):
+        """Return the registered surface coincident with a surface.
+
+        Parameters
+        ----------
+        surface : openmc.Surface
+            Surface to look up
+
+        Returns
+        -------
+        openmc.Surface
+            Previously registered surface coincident with `surface` if there
+            is one, otherwise `surface` itself, which is then registered
+
+        """
+        names, values = zip(*sorted(surface.coefficients.items()))
+        prefix = (surface.type, surface.boundary_type, names)
+        bins = self._bins(values)
+
+        # A coincident surface may have its coefficients binned in an adjacent
+        # bin if they straddle a bin edge
+        for offsets in product((0, -1, 1), repeat=len(bins)):
+            key = prefix + tuple(b + o for b, o in zip(bins, offsets))
+            for other in self._buckets.get(key, ()):
+                # The boundary condition of a registered surface may have been
+                # changed after it was registered
+                if other.boundary_type != surface.boundary_type:
+                    continue
+                if all(abs(other.coefficients[n] - v) <= self.tolerance
+                       for n, v in zip(names, values)):
+                    if other is not surface:
+                        self.merged += 1
+                    return other
+
+        self._buckets.setdefault(prefix + bins, []).append(surface)
+        return surface
+
+    def intern_region(self, region):
+        """Replace the surfaces of a region by registered surfaces.
+
+        Parameters
+        ----------
+        region : openmc.Region
+            Region to modify in place
+
+        Returns
+        -------
+        openmc.Region
+            The region that was passed in
+
+        """
+        import openmc
+
+        if isinstance(region, openmc.Halfspace):
+            region.surface = self.intern(region.surface)
+        elif isinstance(region, openmc.Complement):
+            self.intern_region(region.node)
+        else:
+            for node in region:
+                self.intern_region(node)
+        return region
+
+
+# Surface registries, keyed by the parameters of the model they belong to
+_registries = {}
+
+
+def get_registry(params=None):
+    """Return the registry of the surfaces of the model for a set of parameters.
+
+    Models built from different parameters have separate registries so that
+    they never share surfaces.
+
+    Parameters
+    ----------
+    params : GeometryParameters, optional
+        Geometric parameters of the model. Defaults to
+        :data:`DEFAULT_PARAMETERS`.
+
+    Returns
+    -------
+    SurfaceRegistry
+        Registry of the surfaces of the model
+
+    """
+    if params is None:
+        params = DEFAULT_PARAMETERS
+    if params not in _registries:
+        _registries[params] = SurfaceRegistry()
+    return _registries[params]
+
+
+def _make_surfaces(params):
+    """Create the surfaces of the model from a set of parameters."""
+    import openmc
+
+    registry = get_registry(params)
+    surfs = {}
+
+    surfs['pellet OR'] = openmc.ZCylinder(r=params.pellet_OR, name='Pellet OR')
+    surfs['plenum spring OR'] = openmc.ZCylinder(r=params.plenum_spring_OR, name='FR Plenum Spring OR')
+    surfs['clad IR'] = openmc.ZCylinder(r=params.clad_IR, name='Clad IR')
+    surfs['clad OR'] = openmc.ZCylinder(r=params.clad_OR, name='Clad OR')
+    surfs['GT IR'] = openmc.ZCylinder(r=params.guide_tube_IR, name='GT IR (above dashpot)')
+    surfs['GT OR'] = openmc.ZCylinder(r=params.guide_tube_OR, name='GT OR (above dashpot)')
+    surfs['GT dashpot IR'] = openmc.ZCylinder(r=params.guide_tube_dash_IR, name='GT IR (at dashpot)')
+    surfs['GT dashpot OR'] = openmc.ZCylinder(r=params.guide_tube_dash_OR, name='GT OR (at dashpot)')
+    surfs['CP OR'] = openmc.ZCylinder(r=params.boron_carbide_OR, name='Control Poison OR')
+    surfs['CR IR'] = openmc.ZCylinder(r=params.control_rod_IR, name='CR Clad IR')
+    surfs['CR OR'] = openmc.ZCylinder(r=params.control_rod_OR, name='CR Clad OR')
+    surfs['BA IR 1'] = openmc.ZCylinder(r=params.burn_abs_r1, name='BA IR 1')
+    surfs['BA IR 2'] = openmc.ZCylinder(r=params.burn_abs_r2, name='BA IR 2')
+    surfs['BA IR 3'] = openmc.ZCylinder(r=params.burn_abs_r3, name='BA IR 3')
+    surfs['BA IR 4'] = openmc.ZCylinder(r=params.burn_abs_r4, name='BA IR 4')
+    surfs['BA IR 5'] = openmc.ZCylinder(r=params.burn_abs_r5, name='BA IR 5')
+    surfs['BA IR 6'] = openmc.ZCylinder(r=params.burn_abs_r6, name='BA IR 6')
+    surfs['BA IR 7'] = openmc.ZCylinder(r=params.burn_abs_r7, name='BA IR 7')
+    surfs['BA IR 8'] = openmc.ZCylinder(r=params.burn_abs_r8, name='BA IR 8')
+    surfs['IT IR'] = surfs['BA IR 5']
+    surfs['IT OR'] = surfs['BA IR 6']
+
+    # Rectangular prisms for grid spacers
+    surfs['rod grid box'] = openmc.rectangular_prism(params.rod_grid_side, params.rod_grid_side)
+
+    # Rectangular prisms for lattice grid sleeves
+    surfs['lat grid box inner'] = openmc.rectangular_prism(17.*params.pin_pitch, 17.*params.pin_pitch)
+    surfs['lat grid box outer'] = openmc.rectangular_prism(params.grid_strap_side, params.grid_strap_side)
+
+    surfs['bot support plate'] = openmc.ZPlane(z0=params.bottom_support_plate, name='bot support plate')
+    surfs['top support plate'] = openmc.ZPlane(z0=params.top_support_plate, name='top support plate')
+    surfs['bottom FR'] = openmc.ZPlane(z0=params.bottom_fuel_rod, name='bottom FR')
+    surfs['top lower nozzle'] = surfs['bottom FR']
+    surfs['bot lower nozzle'] = surfs['top support plate']
+
+    # axial surfaces
+    surfs['bot active core'] = openmc.ZPlane(z0=params.bottom_fuel_stack, name='bot active core')
+    surfs['top active core'] = openmc.ZPlane(z0=params.top_active_core, name='top active core')
+
+    surfs['top lower thimble'] = surfs['bot active core']
+    surfs['BA bot'] = openmc.ZPlane(z0=params.bot_burn_abs, name='bottom of BA')
+
+    for i, (bottom, top) in enumerate(zip(params.grid_bottom, params.grid_top)):
+        # Create plane for bottom of spacer grid
+        key = 'grid{}bot'.format(i + 1)
+        name = 'bottom grid {}'.format(i + 1)
+        surfs[key] = openmc.ZPlane(z0=bottom, name=name)
+
+        # Create plane for top of spacer grid
+        key = 'grid{}top'.format(i + 1)
+        name = 'top of grid {}'.format(i + 1)
+        surfs[key] = openmc.ZPlane(z0=top, name=name)
+
+    surfs['dashpot top'] = openmc.ZPlane(z0=params.step0H, name='top dashpot')
+
+    surfs['top pin plenum'] = openmc.ZPlane(z0=params.top_plenum, name='top pin plenum')
+    surfs['top FR'] = openmc.ZPlane(z0=params.top_fuel_rod, name='top FR')
+    surfs['bot upper nozzle'] = openmc.ZPlane(z0=params.bottom_upper_nozzle, name='bottom upper nozzle')
+    surfs['top upper nozzle'] = openmc.ZPlane(z0=params.top_upper_nozzle, name='top upper nozzle')
+
+    # Control rod bank surfaces for ARO configuration
+    for bank in ['A','B','C','D','E',]:
+        surfs['bankS{} top'.format(bank)] = openmc.ZPlane(
+            z0=params.step248H+params.step_width*228, name='CR bankS{} top'.format(bank))
+        surfs['bankS{} bot'.format(bank)] = openmc.ZPlane(
+            z0=params.step248H, name='CR bankS{} bottom'.format(bank))
+
+    surfs['bankA top'] = openmc.ZPlane(z0=params.bank_top, name='CR bank A top')
+    surfs['bankA bot'] = openmc.ZPlane(z0=params.bank_bot, name='CR bank A bottom')
+    surfs['bankB top'] = openmc.ZPlane(z0=params.bank_top, name='CR bank B top')
+    surfs['bankB bot'] = openmc.ZPlane(z0=params.bank_bot, name='CR bank B bottom')
+    surfs['bankC top'] = openmc.ZPlane(z0=params.bank_top, name='CR bank C top')
+    surfs['bankC bot'] = openmc.ZPlane(z0=params.bank_bot, name='CR bank C bottom')
+    surfs['bankD top'] = openmc.ZPlane(z0=params.bank_top, name='CR bank D top')
+    surfs['bankD bot'] = openmc.ZPlane(z0=params.bank_bot, name='CR bank D bottom')
+
+    # outer radial surfaces
+    surfs['core barrel IR'] = openmc.ZCylinder(r=params.core_barrel_IR, name='core barrel IR')
+    surfs['core barrel OR'] = openmc.ZCylinder(r=params.core_barrel_OR, name='core barrel OR')
+    surfs['neutron shield OR'] = openmc.ZCylinder(r=params.neutron_shield_OR, name='neutron shield OR')
+
+    # neutron shield planes
+    surfs['neutron shield NWbot SEtop'] = openmc.Plane(
+        a=1., b=neutron_shield_NWbot_SEtop, c=0., d=0.,
+        name='neutron shield NWbot SEtop')
+    surfs['neutron shield NWtop SEbot'] = openmc.Plane(
+        a=1., b=neutron_shield_NWtop_SEbot, c=0., d=0.,
+        name='neutron shield NWtop SEbot')
+    surfs['neutron shield NEbot SWtop'] = openmc.Plane(
+        a=1., b=neutron_shield_NEbot_SWtop, c=0., d=0.,
+        name='neutron shield NEbot SWtop')
+    surfs['neutron shield NEtop SWbot'] = openmc.Plane(
+        a=1., b=neutron_shield_NEtop_SWbot, c=0., d=0.,
+        name='neutron shield NEtop SWbot')
+
+    # outer radial surfaces
+    surfs['RPV IR'] = openmc.ZCylinder(r=params.rpv_IR, name='RPV IR')
+    surfs['RPV OR'] = openmc.ZCylinder(r=params.rpv_OR, name='RPV OR', boundary_type='vacuum')
+
+    # outer axial surfaces
+    upper_bound = params.upper_bound
+    if upper_bound is None:
+        upper_bound = params.highest_extent
+    lower_bound = params.lower_bound
+    if lower_bound is None:
+        lower_bound = params.lowest_extent
+    surfs['upper bound'] = openmc.ZPlane(
+        z0=upper_bound, name='upper problem boundary',
+        boundary_type=params.axial_boundary_type)
+    surfs['lower bound'] = openmc.ZPlane(
+        z0=lower_bound, name='lower problem boundary',
+        boundary_type=params.axial_boundary_type)
+
+    for key, value in surfs.items():
+        if isinstance(value, openmc.Surface):
+            surfs[key] = registry.intern(value)
+        else:
+            registry.intern_region(value)
+
+    return surfs
+
+
+# Surfaces already created, keyed by the parameters they were created from
+_surface_cache = {}
+
+
+def get_surfaces(params=None):
+    """Return the surfaces of the model for a set of parameters.
+
+    Calls with equal parameters return the same dictionary, so that every
+    universe of a model variant is bounded by the same surfaces.
+
+    Parameters
+    ----------
+    params : GeometryParameters, optional
+        Geometric parameters of the model. Defaults to
+        :data:`DEFAULT_PARAMETERS`.
+
+    Returns
+    -------
+    dict
+        Dictionary mapping a surface name to an openmc.Surface or openmc.Region
+
+    """
+    if params is None:
+        params = DEFAULT_PARAMETERS
+    if params not in _surface_cache:
+        _surface_cache[params] = _make_surfaces(params)
+    return _surface_cache[params]
+
+
+# Surfaces are created the first time they are accessed so that the parameters
+# above can be imported without creating any OpenMC objects
+surfs = LazyDict(get_surfaces)
@@ -0,0 +1,221 @@
+"""Verify the volumes assigned to materials by sampling points.
+
+Material volumes are needed to normalize depletion reaction rates and are
+assigned by the build scripts from formulas rather than measured from the
+geometry, so a mistake in a formula goes unnoticed. :func:`check_volumes`
+estimates the volume of each material from the fraction of uniformly
+sampled points in a box that fall within it, locating the points with a
+:class:`smr.locate.PointLocator`, and compares the estimates with the
+assigned volumes.
+
+A material filled into cells as a :class:`smr.materials.CloneRange` has one
+clone per cell instance, each of which is given the same volume; since the
+clones are too many to estimate individually, the assigned volumes of all
+clones in a range are compared with the volume of the range as a whole.
+
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .locate import PointLocator
+from .materials import CloneRange
+
+
+@dataclass
+class VolumeCheck:
+    """Comparison of an assigned and an estimated material volume.
+
+    Attributes
+    ----------
+    name : str
+        Name of the material
+    ids : range
+        IDs of the material, or of its clones
+    assigned : float
+        Assigned volume in [cm^3], summed over clones
+    estimate : float
+        Estimated volume in [cm^3]
+    std_dev : float
+        Standard deviation of the estimate in [cm^3]
+
+    """
+    name: str
+    ids: range
+    assigned: float
+    estimate: float
+    std_dev: float
+
+    @property
+    def relative_error(self):
+        """Difference of the assigned from the estimated volume, relative to
+        the estimate"""
+        if self.estimate == 0.:
+            return np.inf
+        return (self.assigned - self.estimate)/self.estimate
+
+    def interval(self, sigma=3.):
+        """Return a confidence interval for the volume.
+
+        Parameters
+        ----------
+        sigma : float
+            Half-width of the interval in standard deviations
+
+        Returns
+        -------
+        tuple of float
+            Lower and upper bound in [cm^3]
+
+        """
+        return (self.estimate - sigma*self.std_dev,
+                self.estimate + sigma*self.std_dev)
+
+    def consistent(self, sigma=3.):
+        """Return whether the assigned volume is within the interval.
+
+        Parameters
+        ----------
+        sigma : float
+            Half-width of the interval in standard deviations
+
+        Returns
+        -------
+        bool
+            Whether the assigned volume is consistent with the estimate
+
+        """
+        lower, upper = self.interval(sigma)
+        return lower <= self.assigned <= upper
+
+
+def estimate_volumes(locator, lower_left, upper_right, samples,
+                     batch_size=1000000, seed=1):
+    """Estimate the volume of each material within a box.
+
+    Parameters
+    ----------
+    locator : smr.locate.PointLocator
+        Locator for the geometry
+    lower_left, upper_right : iterable of float
+        Corners of the box to sample in [cm]
+    samples : int
+        Number of points to sample
+    batch_size : int
+        Number of points located at once
+    seed : int
+        Seed of the random number generator
+
+    Returns
+    -------
+    ids : numpy.ndarray of int
+        Material IDs found, in increasing order (-1 for void or outside the
+        geometry)
+    hits : numpy.ndarray of int
+        Number of points within each material
+    box_volume : float
+        Volume of the box in [cm^3]
+
+    """
+    rng = np.random.default_rng(seed)
+    lower_left = np.asarray(lower_left, dtype=float)
+    upper_right = np.asarray(upper_right, dtype=float)
+
+    hits = {}
+    for start in range(0, samples, batch_size):
+        n = min(batch_size, samples - start)
+        xyz = rng.uniform(lower_left, upper_right, (n, 3))
+        _, materials = locator.locate(xyz)
+        ids, counts = np.unique(materials, return_counts=True)
+        for uid, count in zip(ids.tolist(), counts.tolist()):
+            hits[uid] = hits.get(uid, 0) + count
+
+    ids = np.array(sorted(hits), dtype=int)
+    counts = np.array([hits[uid] for uid in ids.tolist()], dtype=int)
+    return ids, counts, np.prod(upper_right - lower_left)
+
+
+def check_volumes(geometry, materials, lower_left, upper_right,
+                  samples=10000000, seed=1):
+    """Compare assigned material volumes with estimates from sampling.
+
+    The box should contain every cell filled with the materials checked;
+    materials are only counted within it.
+
+    Parameters
+    ----------
+    geometry : openmc.Geometry or smr.locate.PointLocator
+        Geometry containing the materials, or a locator for it
+    materials : iterable of openmc.Material or smr.materials.CloneRange
+        Materials to check. Materials without a volume are skipped.
+    lower_left, upper_right : iterable of float
+        Corners of the box to sample in [cm]
+    samples : int
+        Number of points to sample
+    seed : int
+        Seed of the random number generator
+
+    Returns
+    -------
+    list of VolumeCheck
+        Comparison for each material
+
+    """
+    if isinstance(geometry, PointLocator):
+        locator = geometry
+    else:
+        locator = PointLocator(geometry)
+    ids, hits, box_volume = estimate_volumes(
+        locator, lower_left, upper_right, samples, seed=seed)
+    cumulative = np.concatenate(([0], np.cumsum(hits)))
+
+    checks = []
+    for mat in materials:
+        if mat.volume is None:
+            continue
+        if isinstance(mat, CloneRange):
+            name = mat.material.name
+            mat_ids = mat.ids
+        else:
+            name = mat.name
+            mat_ids = range(mat.id, mat.id + 1)
+
+        # Number of points in any of the IDs
+        first, last = np.searchsorted(ids, [mat_ids.start, mat_ids.stop])
+        count = cumulative[last] - cumulative[first]
+        p = count/samples
+        checks.append(VolumeCheck(
+            name, mat_ids, mat.volume*len(mat_ids), p*box_volume,
+            np.sqrt(p*(1. - p)/samples)*box_volume))
+    return checks
+
+
+def format_checks(checks, sigma=3.):
+    """Return a table comparing assigned and estimated volumes.
+
+    Parameters
+    ----------
+    checks : list of VolumeCheck
+        Comparisons as returned by :func:`check_volumes`
+    sigma : float
+        Half-width of confidence intervals in standard deviations
+
+    Returns
+    -------
+    str
+        Multi-line table
+
+    """
+    lines = ['{:<30} {:>8} {:>13} {:>13} {:>10} {:>9}  {}'.format(
+        'Material', 'IDs', 'Assigned', 'Estimate', '+/-', 'Error', '')]
+    for c in checks:
+        if len(c.ids) == 1:
+            ids = str(c.ids.start)
+        else:
+            ids = '{}-{}'.format(c.ids.start, c.ids[-1])
+        lines.append('{:<30} {:>8} {:>13.6g} {:>13.6g} {:>10.3g} {:>9.2%}  {}'
+                     .format(c.name[:30], ids, c.assigned, c.estimate,
+                             sigma*c.std_dev, c.relative_error,
+                             '' if c.consistent(sigma) else 'MISMATCH'))
+    return '\n'.join(lines)
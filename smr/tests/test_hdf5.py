@@ -0,0 +1,47 @@
+"""Round trip of the core model through an HDF5 model file."""
+
+import numpy as np
+import pytest
+
+openmc = pytest.importorskip('openmc')
+pytest.importorskip('h5py')
+
+from smr.core import core_geometry
+from smr.hdf5 import export_model, load_model
+
+
+@pytest.mark.parametrize('lattice_stacks', [False, True])
+def test_core_round_trip(tmp_path, lattice_stacks):
+    geometry = core_geometry(None, 2, False, lattice_stacks=lattice_stacks,
+                             reflector_partitions=2)
+    materials = list(geometry.get_all_materials().values())
+    export_model(tmp_path / 'model.h5', geometry, materials)
+    loaded, loaded_materials = load_model(tmp_path / 'model.h5')
+
+    assert loaded.root_universe.id == geometry.root_universe.id
+    assert sorted(m.id for m in loaded_materials) == \
+        sorted(m.id for m in materials)
+
+    cells = geometry.get_all_cells()
+    loaded_cells = loaded.get_all_cells()
+    assert sorted(loaded_cells) == sorted(cells)
+
+    # Heavy reflector blocks are rotated copies, and stacks indexed by a
+    # z-lattice translate the stacks placed within them
+    assert any(c.rotation is not None for c in cells.values())
+    if lattice_stacks:
+        assert any(c.translation is not None for c in cells.values())
+
+    for uid, cell in cells.items():
+        other = loaded_cells[uid]
+        assert other.name == cell.name
+        assert str(other.region) == str(cell.region)
+        assert other.fill_type == cell.fill_type
+        if cell.fill_type in ('material', 'universe', 'lattice'):
+            assert other.fill.id == cell.fill.id
+        for attr in ('translation', 'rotation'):
+            value = getattr(cell, attr)
+            if value is None:
+                assert getattr(other, attr) is None
+            else:
+                np.testing.assert_allclose(getattr(other, attr), value)
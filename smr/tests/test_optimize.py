@@ -0,0 +1,100 @@
+"""Geometry passes leave the material at every point unchanged."""
+
+import numpy as np
+import pytest
+
+openmc = pytest.importorskip('openmc')
+
+from smr.assemblies import assembly_universes, clear_cache
+from smr.locate import PointLocator
+from smr.optimize import flatten_universes, merge_universes, simplify_regions
+from smr.pins import pin_universes
+from smr.surfaces import get_surfaces, lattice_pitch, pin_pitch
+
+
+def box(lower_left, upper_right):
+    """Return the region within a box."""
+    x0, y0, z0 = lower_left
+    x1, y1, z1 = upper_right
+    return (+openmc.XPlane(x0=x0) & -openmc.XPlane(x0=x1) &
+            +openmc.YPlane(y0=y0) & -openmc.YPlane(y0=y1) &
+            +openmc.ZPlane(z0=z0) & -openmc.ZPlane(z0=z1))
+
+
+def build(model, lattice_stacks=False):
+    """Return a freshly built pin or assembly bounded by a box, and the box."""
+    # Universes are memoized, and the passes modify them in place
+    clear_cache()
+    ring_radii = [0.2, 0.3]
+    if model == 'assembly':
+        univ = assembly_universes(ring_radii, 3, False,
+                                  lattice_stacks=lattice_stacks)
+        univ = univ['Assembly (3.1%)']
+        half_width = lattice_pitch/2
+    else:
+        univ = pin_universes(ring_radii, 3, False,
+                             lattice_stacks=lattice_stacks)
+        univ = univ['Fuel (3.1%) stack']
+        half_width = pin_pitch/2
+
+    surfs = get_surfaces()
+    lower_left = (-half_width, -half_width, surfs['lower bound'].z0)
+    upper_right = (half_width, half_width, surfs['upper bound'].z0)
+    root = openmc.Universe(cells=[
+        openmc.Cell(fill=univ, region=box(lower_left, upper_right))])
+    return root, lower_left, upper_right
+
+
+def materials_at(root, lower_left, upper_right, samples=20000):
+    """Return the ID of the material at uniformly sampled points."""
+    rng = np.random.default_rng(1)
+    xyz = rng.uniform(lower_left, upper_right, (samples, 3))
+    return PointLocator(root).locate(xyz)[1]
+
+
+@pytest.mark.parametrize('model', ['pin', 'assembly'])
+@pytest.mark.parametrize('lattice_stacks', [False, True])
+@pytest.mark.parametrize('apply', [simplify_regions, flatten_universes,
+                                   merge_universes],
+                         ids=['simplify', 'flatten', 'merge'])
+def test_materials_unchanged(model, lattice_stacks, apply):
+    root, lower_left, upper_right = build(model, lattice_stacks)
+    before = materials_at(root, lower_left, upper_right)
+
+    apply(root)
+    after = materials_at(root, lower_left, upper_right)
+    np.testing.assert_array_equal(after, before)
+
+
+def test_merge_distinct_fills():
+    fuel = openmc.Material(name='fuel')
+    other_fuel = openmc.Material(name='other fuel')
+    water = openmc.Material(name='water')
+    cyl = openmc.ZCylinder(r=0.4)
+
+    def pin(material):
+        return openmc.Universe(cells=[openmc.Cell(fill=material, region=-cyl),
+                                      openmc.Cell(fill=water, region=+cyl)])
+
+    def nested(univ):
+        return openmc.Universe(cells=[openmc.Cell(fill=univ, region=-cyl),
+                                      openmc.Cell(fill=water, region=+cyl)])
+
+    a, same_as_a, b = pin(fuel), pin(fuel), pin(other_fuel)
+    c, same_as_c, d = nested(a), nested(same_as_a), nested(b)
+
+    lattice = openmc.RectLattice()
+    lattice.lower_left = (-3., -1.)
+    lattice.pitch = (1., 1.)
+    lattice.universes = [[a, same_as_a, b], [c, same_as_c, d]]
+    lower_left, upper_right = (-3., -1., -1.), (0., 1., 1.)
+    root = openmc.Universe(cells=[
+        openmc.Cell(fill=lattice, region=box(lower_left, upper_right))])
+
+    before = materials_at(root, lower_left, upper_right)
+    replaced = merge_universes(root)
+
+    # Universes are merged only with the ones that have the same fills
+    assert replaced == {same_as_a.id: a, same_as_c.id: c}
+    np.testing.assert_array_equal(
+        materials_at(root, lower_left, upper_right), before)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""Trace random rays through a model to compare fuel discretizations.
+
+For each combination of the given numbers of rings and axial subdivisions, the
+geometry is built in memory and rays crossing it with a uniform isotropic flux
+are followed from cell to cell without running OpenMC. The number of surface
+crossings per cm of path is a measure of the cost of tracking a particle
+through the model, and the mean chord length of each material shows how
+finely it is divided.
+
+"""
+
+import argparse
+from itertools import product
+import time
+
+import numpy as np
+
+from smr.locate import PointLocator
+from smr.rays import random_rays, trace_rays
+from smr.surfaces import get_surfaces, lattice_pitch, pellet_OR, pin_pitch, \
+    rpv_OR
+
+
+# Define command-line options
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument('-m', '--model', choices=('core', 'assembly', 'pin'),
+                    default='core', help='Model to trace rays through')
+parser.add_argument('-r', '--rings', type=int, nargs='+', default=[10],
+                    help='Numbers of annular regions in fuel')
+parser.add_argument('-a', '--axial', type=int, nargs='+', default=[196],
+                    help='Numbers of axial subdivisions in fuel')
+parser.add_argument('-d', '--depleted', action='store_true',
+                    help='Whether UO2 compositions should represent depleted fuel')
+parser.add_argument('--axial-lattice', action='store_true',
+                    help='Stack axial segments of fuel in a z-lattice instead '
+                    'of bounding them by planes')
+parser.add_argument('--lattice-stacks', action='store_true',
+                    help='Index axial stacks of pin cells by a z-lattice '
+                    'instead of bounding their layers by planes')
+parser.add_argument('-n', '--rays', type=int, default=10000,
+                    help='Number of rays')
+parser.add_argument('-s', '--seed', type=int, default=1,
+                    help='Seed of the random number generator')
+parser.add_argument('-v', '--verbose', action='store_true',
+                    help='Show statistics of each material for each '
+                    'discretization')
+args = parser.parse_args()
+
+
+def build(rings, axial):
+    """Return the root universe of the model and the box to trace rays over."""
+    if rings > 1:
+        ring_radii = np.sqrt(np.arange(1, rings)*pellet_OR**2 / rings)
+    else:
+        ring_radii = None
+    options = dict(axial_lattice=args.axial_lattice,
+                   lattice_stacks=args.lattice_stacks)
+
+    if args.model == 'core':
+        from smr.core import core_geometry
+        root = core_geometry(ring_radii, axial, args.depleted,
+                             **options).root_universe
+        half_width = rpv_OR
+    elif args.model == 'assembly':
+        from smr.assemblies import assembly_universes
+        root = assembly_universes(ring_radii, axial, args.depleted,
+                                  **options)['Assembly (3.1%)']
+        half_width = lattice_pitch/2
+    else:
+        from smr.pins import pin_universes
+        root = pin_universes(ring_radii, axial, args.depleted,
+                             **options)['Fuel (3.1%) stack']
+        half_width = pin_pitch/2
+
+    surfs = get_surfaces()
+    lower_left = (-half_width, -half_width, surfs['lower bound'].z0)
+    upper_right = (half_width, half_width, surfs['upper bound'].z0)
+    return root, lower_left, upper_right
+
+
+rows = []
+for rings, axial in product(args.rings, args.axial):
+    root, lower_left, upper_right = build(rings, axial)
+    locator = PointLocator(root)
+    origins, directions, lengths = random_rays(lower_left, upper_right,
+                                               args.rays, args.seed)
+    start = time.perf_counter()
+    stats = trace_rays(locator, origins, directions, lengths)
+    elapsed = time.perf_counter() - start
+
+    materials = root.get_all_materials()
+    names = {uid: m.name for uid, m in materials.items()}
+    fuel = [uid for uid, name in names.items() if 'UO2' in name
+            and uid in stats.length]
+    fuel_length = sum(stats.length[uid] for uid in fuel)
+    fuel_entries = sum(stats.entries.get(uid, 0) for uid in fuel)
+    fuel_segments = sum(stats.segments[uid] for uid in fuel)
+
+    if args.verbose:
+        print('Rings: {}, axial subdivisions: {}'.format(rings, axial))
+        print(stats.report(names))
+        print()
+    rows.append((rings, axial, stats.crossings_per_cm,
+                 fuel_length/fuel_entries if fuel_entries else np.inf,
+                 fuel_segments/fuel_length if fuel_length else 0.,
+                 stats.crossings/elapsed))
+
+print('{:>6} {:>6} {:>10} {:>11} {:>12} {:>13}'.format(
+    'Rings', 'Axial', 'Cross/cm', 'Fuel chord', 'Fuel seg/cm', 'Crossings/s'))
+for row in rows:
+    print('{:>6} {:>6} {:>10.3f} {:>11.4f} {:>12.3f} {:>13.3g}'.format(*row))